@@ -1,23 +1,120 @@
 # backend/app.py
 import os
-from flask import Flask
+import threading
+import time
+from flask import Flask, jsonify, request
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 from routes import api_bp  # Import the blueprint
+from pdf_pool import start_render_pool, stop_render_pool
+from ollama_utils import start_ollama_residency
+import metrics
+import profiling
+from uploads import MAX_UPLOAD_MB, UploadRequest
 
 app = Flask(__name__)
 
+# Reject oversized bodies up front and spool large uploads to disk (see uploads.py)
+app.request_class = UploadRequest
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_MB * 1024 * 1024
+
+# Per-stage timings: Server-Timing on every response, histograms on /api/metrics
+metrics.init_app(app)
+# Opt-in cProfile capture of single requests (PROFILE_ADMIN_TOKEN / PROFILE_SAMPLE_PERCENT)
+profiling.init_app(app)
+
 # This allows your React app (e.g., from localhost:5173) to make requests to your Flask app (at localhost:5000)
 CORS(app)
 
 # Register the blueprint
 app.register_blueprint(api_bp, url_prefix='/api')
 
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    limit = request.max_content_length
+    return jsonify({"error": f"Upload is larger than the {limit // (1024 * 1024)} MB limit.", "maxBytes": limit}), 413
+
+
+def warm_heavy_modules():
+    """
+    Import and exercise the heavy libraries once. Request handlers import
+    them lazily, so the app itself starts fast; under gunicorn this runs in
+    the master before it forks (see wsgi.py), so every worker shares these
+    pages copy-on-write instead of loading its own copy.
+    """
+    import io
+    import docx
+    import pypdf  # noqa: F401
+    import PIL.Image  # noqa: F401
+    import weasyprint  # noqa: F401
+    import google.generativeai  # noqa: F401
+    from document_generator import ASSETS_DIR
+    from jinja2 import Environment, FileSystemLoader
+
+    # python-docx parses its default template on first use
+    docx.Document().save(io.BytesIO())
+    Environment(loader=FileSystemLoader(ASSETS_DIR)).get_template('resume_template.html')
+
+
+def start_background_services():
+    """
+    Per-process resources: processes and threads don't survive a fork, so
+    under gunicorn this runs in each worker after forking (post_fork).
+    Returns immediately; the warm-up runs on a background thread so the
+    server can accept requests (health checks included) right away.
+    """
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+    # Load the local Ollama model in the background and keep it resident
+    # (no-op unless Ollama is a configured provider or OLLAMA_WARMUP / OLLAMA_HEARTBEAT_SECONDS are set)
+    start_ollama_residency()
+
+
+def _warm_up():
+    started = time.perf_counter()
+    # Already done in the gunicorn master when preloading; cheap to repeat
+    try:
+        warm_heavy_modules()
+    except Exception as e:
+        print(f"⚠️ Heavy module warm-up failed: {e}")
+
+    # Fork the PDF render workers now (each compiles the template, parses the
+    # base CSS and does one warm-up render), so the first /api/generate-pdf
+    # call doesn't pay for it. With PDF_RENDER_WORKERS=0 this warms the
+    # in-process engine instead.
+    try:
+        start_render_pool()
+    except Exception as e:
+        print(f"🚨 PDF render engine warm-up failed: {e}")
+
+    # Start the PDF extraction workers too (from a fork server, see file_parser.get_extract_pool)
+    try:
+        from file_parser import start_extract_pool
+
+        ready = start_extract_pool()
+        if ready:
+            print(f"📄 PDF extraction pool ready: {ready} worker process(es)")
+    except Exception as e:
+        print(f"🚨 PDF extraction pool start failed: {e}")
+    print(f"🔥 Background warm-up finished in {time.perf_counter() - started:.2f}s")
+
+
+def stop_background_services():
+    """Graceful shutdown: let in-flight renders and extractions finish."""
+    from file_parser import reset_extract_pool
+
+    stop_render_pool()
+    reset_extract_pool()
+
+
+# wsgi.py defers this so a pre-forking server can start them per worker
+if os.getenv("DEFER_BACKGROUND_SERVICES", "0") != "1":
+    start_background_services()
+
 if __name__ == '__main__':
+    # Development server only; production runs gunicorn (see gunicorn.conf.py).
     # disable Flask’s built-in reloader so the single server process
     # never gets killed/restarted mid-upload
     port = int(os.environ.get("PORT", 5000))
     app.run(debug=True, host="0.0.0.0", port=port, use_reloader=False)
-
-
-
-
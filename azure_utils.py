@@ -1,9 +1,12 @@
 # backend/azure_utils.py
 import os
-import json
 from azure.ai.inference import ChatCompletionsClient
 from azure.core.credentials import AzureKeyCredential
 
+import json_repair
+from gemini_utils import COMPACT_RESUME_JSON_SCHEMA
+from metrics import timed
+
 # IMPORTANT: Replace these with your actual Azure endpoint and key
 # You can get these from your model's deployment page in the Azure AI Studio
 AZURE_AI_ENDPOINT = os.getenv("AZURE_AI_ENDPOINT", "YOUR_AZURE_ENDPOINT")
@@ -27,9 +30,9 @@ def get_azure_ai_client():
         print(f"🚨 Failed to initialize Azure AI client: {e}")
         return None
 
-def enhance_with_azure(client, section_name: str, text_to_enhance: str) -> list[str]:
-    """Sends text to Azure AI for enhancement and returns multiple versions."""
-    if not client or not text_to_enhance.strip():
+def enhance_with_azure_raising(client, section_name: str, text_to_enhance: str) -> list[str]:
+    """Like enhance_with_azure, but raises on API errors or an unusable reply."""
+    if not text_to_enhance.strip():
         return [text_to_enhance]
 
     if section_name.lower() == 'summary':
@@ -45,15 +48,11 @@ def enhance_with_azure(client, section_name: str, text_to_enhance: str) -> list[
         {text_to_enhance}
         ---
         """
-        messages = [{"role": "user", "content": prompt}]
-        try:
-            response = client.complete(messages=messages, response_format={"type": "json_object"})
-            response_json = json.loads(response.choices[0].message.content)
-            versions = response_json.get("versions", [])
-            return versions if versions else [text_to_enhance]
-        except Exception as e:
-            print(f"Error enhancing '{section_name}' with Azure AI: {e}")
-            return [text_to_enhance]
+        response_json = json_repair.loads(complete_text(client, prompt, json_mode=True))
+        versions = response_json.get("versions") if isinstance(response_json, dict) else None
+        if not (isinstance(versions, list) and versions and all(isinstance(v, str) for v in versions)):
+            raise ValueError("Azure AI returned no enhanced versions")
+        return versions
     else:
         # Simplified prompt for other sections
         prompt = f"""
@@ -66,34 +65,28 @@ def enhance_with_azure(client, section_name: str, text_to_enhance: str) -> list[
         ---
         Improved Text:
         """
-        messages = [{"role": "user", "content": prompt}]
-        try:
-            response = client.complete(messages=messages)
-            return [response.choices[0].message.content.strip()]
-        except Exception as e:
-            print(f"Error enhancing '{section_name}' with Azure AI: {e}")
-            return [text_to_enhance]
+        enhanced = (complete_text(client, prompt) or "").strip()
+        if not enhanced:
+            raise ValueError("Azure AI returned an empty enhancement")
+        return [enhanced]
 
-def generate_resume_fields_from_raw_text_azure(client, resume_text: str) -> dict:
-    """Extracts structured resume data from raw text using Azure AI."""
-    if not client or not resume_text.strip():
-        return {}
-        
-    schema = {
-        "personal": {"name": "string", "email": "string", "phone": "string", "location": "string"},
-        "summary": "string",
-        "experience": [{"jobTitle": "string", "company": "string", "dates": "string", "description": "string"}],
-        "education": [{"degree": "string", "institution": "string", "graduationYear": "string", "gpa": "string", "achievements": "string"}],
-        "skills": [{"category": "string", "skills_list": "string"}],
-        "certifications": [{"name": "string", "issuer": "string", "date": "string"}]
-    }
-    
-    prompt = f"""
+def enhance_with_azure(client, section_name: str, text_to_enhance: str) -> list[str]:
+    """Sends text to Azure AI for enhancement and returns multiple versions."""
+    if not client:
+        return [text_to_enhance]
+    try:
+        return enhance_with_azure_raising(client, section_name, text_to_enhance)
+    except Exception as e:
+        print(f"Error enhancing '{section_name}' with Azure AI: {e}")
+        return [text_to_enhance]
+
+# Prompt used to structure raw resume text; filled in with str.format
+STRUCTURE_PROMPT = """
     You are an expert resume parser. Extract the information from the following resume text and provide the output in a valid JSON format that adheres to the schema provided below.
     Ensure all fields are filled, even if with an empty string or empty list if no information is found.
     
     Schema:
-    {json.dumps(schema, indent=2)}
+    {json_schema}
     
     Resume Text:
     ---
@@ -102,11 +95,40 @@ def generate_resume_fields_from_raw_text_azure(client, resume_text: str) -> dict
     
     JSON Output:
     """
+
+@timed("prompt_build")
+def build_structure_prompt(resume_text: str) -> str:
+    return STRUCTURE_PROMPT.format(json_schema=COMPACT_RESUME_JSON_SCHEMA, resume_text=resume_text)
+
+@timed("llm")
+def complete_text(client, prompt: str, json_mode: bool = False) -> str:
+    """Single-turn completion. Raises on any client or API error."""
     messages = [{"role": "user", "content": prompt}]
+    if json_mode:
+        response = client.complete(messages=messages, response_format={"type": "json_object"})
+    else:
+        response = client.complete(messages=messages)
+    return response.choices[0].message.content
+
+def stream_text(client, prompt: str):
+    """Yields completion text as Azure streams it; closing the generator closes the stream."""
+    response = client.complete(messages=[{"role": "user", "content": prompt}], stream=True)
+    try:
+        for update in response:
+            if update.choices and update.choices[0].delta and update.choices[0].delta.content:
+                yield update.choices[0].delta.content
+    finally:
+        close = getattr(response, "close", None)
+        if callable(close):
+            close()
+
+def generate_resume_fields_from_raw_text_azure(client, resume_text: str) -> dict:
+    """Extracts structured resume data from raw text using Azure AI."""
+    if not client or not resume_text.strip():
+        return {}
     
     try:
-        response = client.complete(messages=messages, response_format={"type": "json_object"})
-        return json.loads(response.choices[0].message.content)
+        return json_repair.loads(complete_text(client, build_structure_prompt(resume_text), json_mode=True))
     except Exception as e:
         print(f"Error parsing with Azure AI: {e}")
         return {}
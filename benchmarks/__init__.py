@@ -0,0 +1,12 @@
+# backend/benchmarks/__init__.py
+"""
+Offline benchmarks for the backend hot paths.
+
+Run them from the backend directory as modules, e.g.:
+
+    python -m benchmarks.bench_docx_extract
+
+bench_hot_paths times all the main paths at once and can compare its
+results with those from another commit. bench_structured_output counts
+LLM round trips per successful parse when responses come back malformed.
+"""
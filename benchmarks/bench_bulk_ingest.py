@@ -0,0 +1,80 @@
+# backend/benchmarks/bench_bulk_ingest.py
+"""
+Throughput of bulk ingestion against a stub LLM, compared with pushing the
+same files one by one through parse_resume_file.
+
+    python -m benchmarks.bench_bulk_ingest [--files N] [--llm-latency S] [--serial-sample N]
+
+The stub sleeps for --llm-latency seconds and returns a canned structure, so
+the numbers measure our pipeline, not the provider.
+"""
+import argparse
+import io
+import time
+
+from werkzeug.datastructures import FileStorage
+
+import bulk_ingest
+import file_parser
+import parse_cache
+from benchmarks.corpus import docx_corpus, pdf_corpus
+
+
+def install_stub_llm(latency):
+    def structure_resume(raw_text):
+        time.sleep(latency)
+        return {"personal": {"name": raw_text.split("\n", 1)[0]}, "summary": "", "experience": [],
+                "education": [], "skills": [], "projects": [], "publications": [], "certifications": []}
+    file_parser.structure_resume = structure_resume
+
+
+def build_batch(size):
+    half = (size + 1) // 2
+    return (docx_corpus(half) + pdf_corpus(size - half))[:size]
+
+
+def run_serial(batch):
+    start = time.perf_counter()
+    for name, raw in batch:
+        file_parser.parse_resume_file(FileStorage(stream=io.BytesIO(raw), filename=name))
+    return time.perf_counter() - start
+
+
+def run_bulk(batch):
+    uploads = [(name, (lambda raw=raw: raw)) for name, raw in batch]
+    start = time.perf_counter()
+    records = list(bulk_ingest.ingest(uploads))
+    elapsed = time.perf_counter() - start
+    failures = sum(1 for r in records if r["status"] != "ok")
+    return elapsed, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--serial-sample", type=int, default=10,
+                        help="files to push through the serial path (it is slow)")
+    args = parser.parse_args()
+
+    parse_cache.PARSE_CACHE_ENABLED = False
+    install_stub_llm(args.llm_latency)
+    batch = build_batch(args.files)
+    print(f"{len(batch)} files, stub LLM latency {args.llm_latency:.2f}s, "
+          f"LLM concurrency {bulk_ingest.BULK_LLM_CONCURRENCY}, "
+          f"extract workers {file_parser.PDF_EXTRACT_WORKERS}\n")
+
+    sample = batch[:args.serial_sample]
+    serial_s = run_serial(sample)
+    bulk_s, failures = run_bulk(batch)
+
+    serial_rate = len(sample) / serial_s * 60
+    bulk_rate = len(batch) / bulk_s * 60
+    print(f"serial parse_resume_file: {serial_rate:8.1f} resumes/min ({len(sample)} files in {serial_s:.2f}s)")
+    print(f"bulk ingest:              {bulk_rate:8.1f} resumes/min ({len(batch)} files in {bulk_s:.2f}s, "
+          f"{failures} failed)")
+    print(f"speedup: {bulk_rate / serial_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# backend/benchmarks/bench_docx_extract.py
+"""
+Compare the streaming DOCX extractor in file_parser against the old
+python-docx implementation (docx.Document + paragraph join).
+
+    python -m benchmarks.bench_docx_extract [--corpus DIR] [--repeat N]
+
+Without --corpus a synthetic corpus from benchmarks.corpus is used.
+"""
+import argparse
+import glob
+import io
+import os
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.corpus import docx_corpus
+from file_parser import _extract_text_from_docx_bytes
+
+
+def extract_with_python_docx(raw_bytes: bytes) -> str:
+    """The previous implementation, kept here as the baseline."""
+    import docx
+
+    doc = docx.Document(io.BytesIO(raw_bytes))
+    return "\n".join(para.text for para in doc.paragraphs)
+
+
+def load_corpus(directory):
+    if not directory:
+        return docx_corpus()
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.docx"))):
+        with open(path, "rb") as f:
+            corpus.append((os.path.basename(path), f.read()))
+    return corpus
+
+
+def measure(fn, corpus, repeat):
+    timings = []
+    peaks = []
+    chars = 0
+    for _, raw in corpus:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text = fn(raw)
+            timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        fn(raw)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        chars += len(text)
+    return {
+        "total_s": sum(timings),
+        "median_ms": statistics.median(timings) * 1000,
+        "peak_kib_median": statistics.median(peaks) / 1024,
+        "peak_kib_max": max(peaks) / 1024,
+        "chars": chars,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="directory of .docx files (default: synthetic corpus)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    print(f"{len(corpus)} documents, {args.repeat} runs each\n")
+
+    results = {
+        "python-docx": measure(extract_with_python_docx, corpus, args.repeat),
+        "streaming": measure(_extract_text_from_docx_bytes, corpus, args.repeat),
+    }
+    print(f"{'extractor':<12} {'total s':>9} {'median ms':>10} {'peak KiB (median/max)':>24} {'chars':>9}")
+    for name, r in results.items():
+        print(f"{name:<12} {r['total_s']:>9.3f} {r['median_ms']:>10.2f} "
+              f"{r['peak_kib_median']:>11.0f} / {r['peak_kib_max']:<10.0f} {r['chars']:>9}")
+
+    base, new = results["python-docx"], results["streaming"]
+    print(f"\nspeedup: {base['total_s'] / new['total_s']:.1f}x, "
+          f"median peak memory: {new['peak_kib_median'] / base['peak_kib_median']:.0%} of python-docx")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# backend/benchmarks/bench_docx_generate.py
+"""
+DOCX generation throughput with and without the cached base documents.
+
+    python -m benchmarks.bench_docx_generate [--docs N] [--clients N] [--styles N]
+
+Renders the same resumes (with the logo, spread over --styles font/size/
+accent combinations) to saved .docx bytes, first building every document
+from a blank Document() (DOCX_BASE_CACHE_SIZE=0), then copying the cached
+base. The document and styles XML of both runs are compared so a faster
+but different output can't go unnoticed. Keep --styles within
+DOCX_BASE_CACHE_SIZE, or every request misses and builds its base.
+"""
+import argparse
+import io
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import document_generator
+from benchmarks.corpus import make_resume
+
+STYLES = [
+    {"fontFamily": font, "fontSize": size, "accentColor": accent}
+    for font in ("Calibri, sans-serif", "Georgia, serif", "Arial, sans-serif")
+    for size in (10, 11, 12)
+    for accent in ("#34495e", "#1a5276", "#7b241c")
+]
+
+
+def render(data):
+    buf = io.BytesIO()
+    document_generator.generate_docx_from_data(data).save(buf)
+    return buf.getvalue()
+
+
+def body_xml(docx_bytes):
+    with zipfile.ZipFile(io.BytesIO(docx_bytes)) as z:
+        return z.read("word/document.xml"), z.read("word/styles.xml")
+
+
+def run(resumes, clients, cache_size):
+    document_generator.DOCX_BASE_CACHE_SIZE = cache_size
+    document_generator._docx_bases.clear()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        outputs = list(pool.map(render, resumes))
+    return time.perf_counter() - start, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--styles", type=int, default=3, help=f"distinct style combinations (max {len(STYLES)})")
+    args = parser.parse_args()
+
+    resumes = []
+    for seed in range(args.docs):
+        resume = make_resume(seed, jobs=2 + seed % 5)
+        resume["includeLogo"] = True
+        resume["styleOptions"] = STYLES[seed % max(1, min(args.styles, len(STYLES)))]
+        resumes.append(resume)
+    render(resumes[0])  # imports and the logo
+
+    print(f"{args.docs} DOCX renders, {args.clients} client(s), {min(args.styles, len(STYLES))} style(s)\n")
+    cache_size = document_generator.DOCX_BASE_CACHE_SIZE or 16
+    before, old = run(resumes, args.clients, 0)
+    after, new = run(resumes, args.clients, cache_size)
+    print(f"{'from scratch':>14s}: {args.docs / before:7.1f} docs/s  {before / args.docs * 1000:6.2f} ms/doc")
+    print(f"{'cached base':>14s}: {args.docs / after:7.1f} docs/s  {after / args.docs * 1000:6.2f} ms/doc  "
+          f"({before / after:.2f}x)")
+    same = all(body_xml(a) == body_xml(b) for a, b in zip(old, new))
+    print(f"\noutput identical: {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
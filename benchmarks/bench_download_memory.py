@@ -0,0 +1,117 @@
+# backend/benchmarks/bench_download_memory.py
+"""
+Server memory while many generated documents are being downloaded at once.
+
+    python -m benchmarks.bench_download_memory [--downloads N] [--format pdf|docx] [--jobs N]
+
+Each mode runs in a fresh process. "in memory" keeps every document as
+bytes until it has been sent (a spool threshold no document reaches, as
+before spooling) and "spooled" uses the configured DOCUMENT_SPOOL_MAX_KB,
+both with the render cache off. "default" is the deployed configuration:
+the render cache is on, so documents are rendered to bytes that the cache
+keeps and every response streams from without a copy; the growth is then
+the cache's content, bounded by RENDER_CACHE_MAX_MB, not a copy per
+download. Downloads are admitted one at a time: each request
+is rendered, its first chunk read and the response then left open, like
+a slow client, and garbage is collected after each one. The growth in
+RSS therefore comes from what in-flight responses hold rather than from
+rendering. Reports peak RSS (VmHWM) and
+RSS with every download in flight, relative to after a warm-up request.
+Linux only (reads /proc/self/status).
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def child(downloads, fmt, jobs):
+    from werkzeug.test import EnvironBuilder
+
+    import app as app_module
+    from benchmarks.corpus import make_resume
+
+    app = app_module.app
+    path = f"/api/generate-{fmt}"
+
+    def start(resume):
+        environ = EnvironBuilder(path=path, method="POST", json=resume).get_environ()
+        status = []
+        body = app.wsgi_app(environ, lambda s, headers, exc_info=None: status.append(s))
+        chunks = iter(body)
+        first = next(chunks)
+        if not status[0].startswith("200"):
+            raise SystemExit(f"{path} answered {status[0]}: {first[:200]!r}")
+        # python-docx documents are reference cycles; collect them now so
+        # render garbage waiting for the cyclic GC isn't counted
+        gc.collect()
+        return body, chunks, len(first)
+
+    resumes = [make_resume(seed, jobs=jobs) for seed in range(downloads + 1)]
+    body, chunks, received = start(resumes[-1])  # warm-up
+    received += sum(len(c) for c in chunks)
+    body.close()
+    baseline = _status_kb("VmRSS")
+    hwm_before = _status_kb("VmHWM")
+
+    in_flight = [start(resume) for resume in resumes[:downloads]]
+    rss = _status_kb("VmRSS")
+    sizes = []
+    for body, chunks, first in in_flight:
+        sizes.append(first + sum(len(c) for c in chunks))
+        body.close()
+    print(json.dumps({
+        "document_kb": statistics.median(sizes) / 1024,
+        "rss_in_flight_mb": (rss - baseline) / 1024,
+        "peak_growth_mb": (max(_status_kb("VmHWM"), hwm_before) - baseline) / 1024,
+    }))
+
+
+def run_mode(args, spool_kb, cache):
+    env = dict(os.environ, RENDER_CACHE_ENABLED="1" if cache else "0", DEFER_BACKGROUND_SERVICES="1",
+               PDF_RENDER_WORKERS="0")
+    if spool_kb is not None:
+        env["DOCUMENT_SPOOL_MAX_KB"] = str(spool_kb)
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_download_memory", "--child",
+         "--downloads", str(args.downloads), "--format", args.format, "--jobs", str(args.jobs)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr[-2000:])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--downloads", type=int, default=50)
+    parser.add_argument("--format", choices=("pdf", "docx"), default="pdf")
+    parser.add_argument("--jobs", type=int, default=40, help="experience entries per resume (document size)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.downloads, args.format, args.jobs)
+        return
+
+    print(f"{args.downloads} concurrent {args.format.upper()} downloads, {args.jobs} jobs per resume\n")
+    print(f"{'mode':>10s} {'doc KB':>8s} {'RSS in flight':>15s} {'peak RSS growth':>17s}")
+    for name, spool_kb, cache in (("in memory", 1 << 30, False), ("spooled", None, False), ("default", None, True)):
+        r = run_mode(args, spool_kb, cache)
+        print(f"{name:>10s} {r['document_kb']:8.1f} {r['rss_in_flight_mb']:12.1f} MB {r['peak_growth_mb']:14.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
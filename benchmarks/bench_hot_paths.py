@@ -0,0 +1,227 @@
+# backend/benchmarks/bench_hot_paths.py
+"""
+Latency percentiles for the parse, render and pitch hot paths, offline.
+
+    python -m benchmarks.bench_hot_paths [--runs N] [--only TEXT] [--llm-latency S]
+                                         [--caches] [--out FILE] [--compare FILE] [--threshold F]
+                                         [--min-delta-ms MS]
+
+Times text extraction (_extract_text_from_pdf_bytes,
+_extract_text_from_docx_bytes), document generation (generate_pdf_from_data,
+generate_docx_from_data), clean_text/strip_html and the route handlers,
+the latter through Flask's test client. Inputs come from the seeded
+corpus: short, medium and long resumes, plus a medium one with a photo.
+LLM calls go to benchmarks.fake_llm (canned JSON after --llm-latency
+seconds). The parse, render and image caches are off unless --caches is
+given, so repeated runs measure the work rather than cache hits; set
+PDF_RENDER_WORKERS=0 to render route PDFs in-process.
+
+--out writes the percentiles as JSON together with the commit they were
+measured on. --compare reads such a file and reports every case whose
+p50 grew by more than --threshold (default 0.15, i.e. 15%) and by more
+than --min-delta-ms (so microsecond cases don't flap); the script then
+exits non-zero, so two commits can be compared with:
+
+    git checkout A && python -m benchmarks.bench_hot_paths --out a.json
+    git checkout B && python -m benchmarks.bench_hot_paths --compare a.json
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import document_generator
+import file_parser
+import image_cache
+import parse_cache
+import render_cache
+from benchmarks import fake_llm
+from benchmarks.corpus import make_docx, make_pdf, make_photo, make_resume, with_photo
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (seed, jobs, publications, with an image)
+VARIANTS = {
+    "short": (1, 2, 0, False),
+    "medium": (2, 5, 15, False),
+    "long": (3, 8, 45, False),
+    "medium+image": (2, 5, 15, True),
+}
+
+
+def variant_inputs(name):
+    """(resume, pdf bytes, docx bytes) for a corpus variant."""
+    seed, jobs, publications, image = VARIANTS[name]
+    resume = make_resume(seed, jobs=jobs, publications=publications)
+    photo = make_photo(seed) if image else None
+    if image:
+        resume = with_photo(resume, seed)
+    return resume, make_pdf(resume, photo), make_docx(resume, photo)
+
+
+def html_description(resume):
+    """The resume's bullets as the rich-text editor sends them."""
+    return "".join(f"<p><b>{exp['jobTitle']}</b><br>{exp['description'].replace(chr(10), '<br><br>')}</p>"
+                   for exp in resume["experience"])
+
+
+def _expect(status, response, label):
+    if response.status_code != status:
+        raise SystemExit(f"{label} answered {response.status_code}: {response.get_data()[:200]!r}")
+    return response
+
+
+def build_cases(client):
+    """[(name, setup, run)]: run(*setup()) is timed, setup() isn't."""
+    inputs = {name: variant_inputs(name) for name in VARIANTS}
+    cases = []
+
+    for name, (_, pdf, docx) in inputs.items():
+        cases.append((f"extract_pdf.{name}", lambda pdf=pdf: (pdf,), file_parser._extract_text_from_pdf_bytes))
+        cases.append((f"extract_docx.{name}", lambda docx=docx: (docx,), file_parser._extract_text_from_docx_bytes))
+    for name, (resume, _, _) in inputs.items():
+        # both generators clean the data in place, so each run gets a fresh copy
+        cases.append((f"generate_pdf.{name}", lambda resume=resume: (copy.deepcopy(resume),),
+                      document_generator.generate_pdf_from_data))
+        if not VARIANTS[name][3]:  # the DOCX has no profile photo
+            cases.append((f"generate_docx.{name}", lambda resume=resume: (copy.deepcopy(resume),),
+                          lambda data: document_generator.generate_docx_from_data(data).save(io.BytesIO())))
+
+    html = html_description(inputs["long"][0])
+    cases.append(("strip_html.long", lambda: (html,), document_generator.strip_html))
+    text = document_generator.strip_html(html)
+    cases.append(("clean_text.long", lambda: (text,), document_generator.clean_text))
+
+    def parse(filename, raw):
+        return _expect(200, client.post("/api/parse-resume", data={"file": (io.BytesIO(raw), filename)},
+                                        content_type="multipart/form-data"), "/api/parse-resume")
+
+    def post_json(path, resume):
+        return _expect(200, client.post(path, json=resume), path)
+
+    for name in ("medium", "medium+image"):
+        resume, pdf, docx = inputs[name]
+        cases.append((f"route.parse_resume.pdf.{name}", lambda pdf=pdf: ("resume.pdf", pdf), parse))
+        cases.append((f"route.generate_pdf.{name}", lambda resume=resume: ("/api/generate-pdf", resume), post_json))
+    resume, _, docx = inputs["medium"]
+    cases.append(("route.parse_resume.docx.medium", lambda: ("resume.docx", docx), parse))
+    cases.append(("route.generate_docx.medium", lambda: ("/api/generate-docx", resume), post_json))
+    cases.append(("route.elevator_pitch.medium", lambda: ("/api/generate-elevator-pitch", resume), post_json))
+    cases.append(("route.elevator_pitch_stream.medium",
+                  lambda: ("/api/generate-elevator-pitch/stream", resume), post_json))
+    return cases
+
+
+def time_case(setup, run, runs, warmup):
+    samples = []
+    for i in range(warmup + runs):
+        args = setup()
+        start = time.perf_counter()
+        run(*args)
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed * 1000)
+    return samples
+
+
+def summarize(samples) -> dict:
+    if len(samples) > 1:
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    else:
+        p50 = p90 = p99 = samples[0]
+    return {"runs": len(samples), "p50_ms": round(p50, 3), "p90_ms": round(p90, 3), "p99_ms": round(p99, 3),
+            "mean_ms": round(statistics.fmean(samples), 3), "min_ms": round(min(samples), 3),
+            "max_ms": round(max(samples), 3)}
+
+
+def git_revision() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def compare(baseline, results, threshold, min_delta_ms):
+    """Print p50 changes against a baseline file; returns the cases that got slower than threshold."""
+    regressions = []
+    print(f"\nagainst {baseline['meta'].get('commit', '?')} (p50, slower by more than {threshold:.0%} flagged)\n")
+    print(f"{'case':42s}{'before':>11s}{'after':>11s}{'change':>9s}")
+    for name, current in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:42s}{'-':>11s}{current['p50_ms']:8.2f} ms{'new':>9s}")
+            continue
+        change = current["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        slower = change > threshold and current["p50_ms"] - before["p50_ms"] > min_delta_ms
+        if slower:
+            regressions.append(name)
+        print(f"{name:42s}{before['p50_ms']:8.2f} ms{current['p50_ms']:8.2f} ms{change:+8.0%}{'  SLOWER' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2, help="untimed runs per case")
+    parser.add_argument("--only", action="append", default=[], help="run cases whose name contains TEXT (repeatable)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument("--caches", action="store_true", help="keep the parse, render and image caches on")
+    parser.add_argument("--out", help="write the results as JSON")
+    parser.add_argument("--compare", help="results JSON from another commit to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    parser.add_argument("--min-delta-ms", type=float, default=0.25)
+    args = parser.parse_args()
+
+    # no warm-up thread or Ollama residency; the untimed runs warm things up
+    os.environ.setdefault("DEFER_BACKGROUND_SERVICES", "1")
+    from app import app, stop_background_services
+
+    parse_cache.PARSE_CACHE_ENABLED = args.caches
+    render_cache.RENDER_CACHE_ENABLED = args.caches
+    image_cache.IMAGE_CACHE_ENABLED = args.caches
+    fake_llm.install(args.llm_latency)
+
+    cases = [case for case in build_cases(app.test_client())
+             if not args.only or any(text in case[0] for text in args.only)]
+    results = {}
+    print(f"{'case':42s}{'p50':>11s}{'p90':>11s}{'p99':>11s}")
+    try:
+        for name, setup, run in cases:
+            # the handlers log every request; keep that out of the report
+            with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+                samples = time_case(setup, run, args.runs, args.warmup)
+            results[name] = summary = summarize(samples)
+            print(f"{name:42s}{summary['p50_ms']:8.2f} ms{summary['p90_ms']:8.2f} ms{summary['p99_ms']:8.2f} ms")
+    finally:
+        stop_background_services()
+
+    if args.out:
+        meta = {"commit": git_revision(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                "runs": args.runs, "warmup": args.warmup, "llm_latency_s": args.llm_latency, "caches": args.caches}
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"\nwrote {len(results)} cases to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
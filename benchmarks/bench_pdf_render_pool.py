@@ -0,0 +1,72 @@
+# backend/benchmarks/bench_pdf_render_pool.py
+"""
+PDF rendering throughput as the render pool grows, against rendering in
+request threads.
+
+    python -m benchmarks.bench_pdf_render_pool [--renders N] [--clients N] [--workers 1,2,4]
+
+Each configuration renders the same resumes from --clients concurrent
+threads. "threads" is the old in-process path (PDF_RENDER_WORKERS=0).
+While it runs, a probe thread measures how late a 10 ms sleep wakes up in
+the server process: that is the delay every other endpoint (e.g.
+/api/health) sees while PDFs are rendering.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import document_generator
+import pdf_pool
+from benchmarks.corpus import make_resume
+
+
+def probe(stop, lags):
+    while not stop.is_set():
+        start = time.perf_counter()
+        time.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+def run(render, resumes, clients):
+    stop, lags = threading.Event(), []
+    prober = threading.Thread(target=probe, args=(stop, lags), daemon=True)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        # copies, because rendering cleans the data in place
+        list(pool.map(lambda r: render({**r, "experience": [dict(e) for e in r["experience"]]}), resumes))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    prober.join()
+    lags.sort()
+    return elapsed, lags[int(0.95 * (len(lags) - 1))] if lags else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--renders", type=int, default=80)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--workers", default="1,2,4,8")
+    args = parser.parse_args()
+
+    resumes = [make_resume(seed, jobs=3 + seed % 5, publications=(seed % 3) * 10) for seed in range(args.renders)]
+    document_generator.init_pdf_engine()
+
+    print(f"{args.renders} renders from {args.clients} concurrent clients\n")
+    elapsed, lag = run(document_generator.generate_pdf_from_data, resumes, args.clients)
+    baseline = args.renders / elapsed
+    print(f"{'threads':>10s}: {baseline:7.1f} PDFs/s   probe lag p95 {lag * 1000:7.1f} ms")
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        pool = pdf_pool.PdfRenderPool(workers=workers, queue_depth=args.renders, timeout=120)
+        pool.start()
+        elapsed, lag = run(pool.render, resumes, args.clients)
+        rate = args.renders / elapsed
+        print(f"{workers:>2d} workers: {rate:7.1f} PDFs/s   probe lag p95 {lag * 1000:7.1f} ms   "
+              f"({rate / baseline:.1f}x threads)")
+        pool.restart()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# backend/benchmarks/bench_prompt_compaction.py
+"""
+Token reduction and end-to-end parse latency of prompt compaction.
+
+    python -m benchmarks.bench_prompt_compaction [--size N] [--base-latency S] [--ms-per-1k-tokens MS] [--live]
+
+Prompt sizes are estimated (chars/4) for the Gemini structuring prompt with
+and without compaction. Latency runs parse_resume_file over the corpus
+against a stub LLM whose latency grows with the prompt size
+(--base-latency + --ms-per-1k-tokens per 1k prompt tokens), or against the
+configured providers with --live.
+
+It first checks that compaction keeps a resume's contact details when
+they are repeated at the top of every page (stripped as a running header
+on all but the first), and exits non-zero if it doesn't.
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+
+from werkzeug.datastructures import FileStorage
+
+import file_parser
+import gemini_utils
+import parse_cache
+import text_compaction
+from benchmarks.corpus import docx_corpus, pdf_corpus
+
+
+def uncompacted_prompt(raw_text):
+    """The structuring prompt as it was built before compaction existed."""
+    return gemini_utils.STRUCTURE_PROMPT.format(json_schema=gemini_utils.RESUME_JSON_SCHEMA,
+                                                raw_resume_text=raw_text.replace(text_compaction.PAGE_BREAK, "\n"))
+
+
+def install_stub_llm(base_latency, ms_per_1k_tokens):
+    def structure_resume(raw_text):
+        if text_compaction.TEXT_COMPACTION_ENABLED:
+            prompt = gemini_utils.build_structure_prompt(raw_text)
+        else:
+            prompt = uncompacted_prompt(raw_text)
+        tokens = text_compaction.estimate_tokens(prompt)
+        time.sleep(base_latency + tokens / 1000 * ms_per_1k_tokens / 1000)
+        return {"personal": {"name": raw_text.split("\n", 1)[0]}, "summary": "", "experience": [],
+                "education": [], "skills": [], "projects": [], "publications": [], "certifications": []}
+    file_parser.structure_resume = structure_resume
+
+
+def check_contact_lines():
+    """Contact lines repeated as a header on every page that compaction lost."""
+    contact = ["Jane Doe", "jane@x.com | 555-123-4567"]
+    pages = [contact + ["", "EXPERIENCE", "Engineer at Acme", "Built the billing service."],
+             contact + ["", "EDUCATION", "B.S. Computer Science", "Page 2 of 3"],
+             contact + ["", "SKILLS", "Python, SQL", "Page 3 of 3"]]
+    text = text_compaction.PAGE_BREAK.join("\n".join(page) for page in pages)
+    compacted = text_compaction.compact_resume_text(text).split("\n")
+    lost = [line for line in contact if line not in compacted]
+    repeated = [line for line in contact if compacted.count(line) > 1]
+    return lost + [f"{line} (kept more than once)" for line in repeated]
+
+
+def token_report(corpus):
+    before, after, compact_ms = [], [], []
+    for name, raw in corpus:
+        raw_text = file_parser.extract_text(name, raw)
+        start = time.perf_counter()
+        compacted = text_compaction.compact_resume_text(raw_text)
+        compact_ms.append((time.perf_counter() - start) * 1000)
+        before.append(text_compaction.estimate_tokens(uncompacted_prompt(raw_text)))
+        after.append(text_compaction.estimate_tokens(gemini_utils.build_structure_prompt(compacted)))
+    return before, after, compact_ms
+
+
+def parse_latency(corpus, compaction):
+    text_compaction.TEXT_COMPACTION_ENABLED = compaction
+    timings = []
+    for name, raw in corpus:
+        start = time.perf_counter()
+        file_parser.parse_resume_file(FileStorage(stream=io.BytesIO(raw), filename=name))
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=20, help="resumes per format")
+    parser.add_argument("--base-latency", type=float, default=0.3)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=250.0)
+    parser.add_argument("--live", action="store_true", help="call the configured LLM providers")
+    args = parser.parse_args()
+
+    failures = check_contact_lines()
+    if failures:
+        print(f"FAILED: compaction dropped contact lines: {', '.join(failures)}")
+        sys.exit(1)
+    print("contact lines repeated on every page survive compaction once")
+
+    parse_cache.PARSE_CACHE_ENABLED = False
+    corpus = pdf_corpus(args.size) + docx_corpus(args.size)
+
+    print(f"{len(corpus)} resumes ({args.size} PDF, {args.size} DOCX)\n")
+    for label, subset in (("pdf", corpus[:args.size]), ("docx", corpus[args.size:]), ("all", corpus)):
+        before, after, compact_ms = token_report(subset)
+        print(f"{label:5s} prompt tokens: mean {statistics.mean(before):7.0f} → {statistics.mean(after):7.0f} "
+              f"({(1 - sum(after) / sum(before)) * 100:4.1f}% fewer), "
+              f"compaction {statistics.mean(compact_ms):.2f} ms/resume")
+
+    if not args.live:
+        install_stub_llm(args.base_latency, args.ms_per_1k_tokens)
+        print(f"\nstub LLM: {args.base_latency:.2f}s + {args.ms_per_1k_tokens:.0f} ms per 1k prompt tokens")
+    else:
+        print("\nlive LLM providers")
+    results = {}
+    for compaction in (False, True):
+        timings = parse_latency(corpus, compaction)
+        results[compaction] = statistics.mean(timings)
+        print(f"compaction {'on ' if compaction else 'off'}: mean {results[compaction] * 1000:7.1f} ms, "
+              f"p95 {sorted(timings)[int(0.95 * (len(timings) - 1))] * 1000:7.1f} ms")
+    print(f"end-to-end change: {(results[True] / results[False] - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
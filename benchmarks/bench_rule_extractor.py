@@ -0,0 +1,140 @@
+# backend/benchmarks/bench_rule_extractor.py
+"""
+Speed and field accuracy of the rule-based extractor against labelled resumes.
+
+    python -m benchmarks.bench_rule_extractor [--size N] [--labels DIR] [--live] [--llm-latency S]
+
+Labels are the synthetic corpus' source JSON by default, or, with --labels,
+every <name>.pdf / <name>.docx in DIR that has a <name>.json next to it
+holding the expected parsedData. Every file goes through real extraction
+and compaction. "rules" never calls an LLM; "hybrid" reports how many
+resumes needed it at all. With --live the configured LLM providers are
+scored on the same labels; otherwise LLM calls go to benchmarks.fake_llm,
+which answers with schema-valid canned JSON after --llm-latency seconds.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import time
+from collections import defaultdict
+
+import file_parser
+import llm_providers
+import rule_extractor
+import text_compaction
+from benchmarks import fake_llm
+from benchmarks.corpus import make_docx, make_pdf, make_resume
+
+SCALAR_FIELDS = {
+    "personal": ("name", "email", "phone", "location"),
+    "experience": ("jobTitle", "company", "dates", "description"),
+    "education": ("degree", "institution", "graduationYear"),
+    "certifications": ("name", "issuer", "date"),
+}
+
+
+def synthetic_labelled(size):
+    samples = []
+    for seed in range(size):
+        resume = make_resume(seed, jobs=2 + seed % 5, publications=(seed % 3) * 4)
+        make = make_pdf if seed % 2 else make_docx
+        name = f"synthetic_{seed:03d}.{'pdf' if seed % 2 else 'docx'}"
+        samples.append((name, make(resume), resume))
+    return samples
+
+
+def labelled_dir(path):
+    samples = []
+    for name in sorted(os.listdir(path)):
+        stem, ext = os.path.splitext(name)
+        label = os.path.join(path, stem + ".json")
+        if ext.lower() in (".pdf", ".docx") and os.path.exists(label):
+            with open(os.path.join(path, name), "rb") as f, open(label, encoding="utf-8") as lf:
+                samples.append((name, f.read(), json.load(lf)))
+    return samples
+
+
+def _norm(value):
+    # bullets and spacing differ between extractors without changing the content
+    text = re.sub(r"^\s*[•\-*▪●]\s*", "", str(value or ""), flags=re.MULTILINE)
+    return " ".join(text.lower().split())
+
+
+def _skills(resume):
+    return {_norm(skill) for entry in resume.get("skills", [])
+            for skill in re.split(r"[,|]", entry.get("skills_list", "")) if skill.strip()}
+
+
+def score(predicted, expected, tally):
+    """Add per-field (correct, total) counts for one resume to tally."""
+    for field in SCALAR_FIELDS["personal"]:
+        tally[f"personal.{field}"].append(_norm(predicted["personal"].get(field)) == _norm(expected["personal"].get(field)))
+    tally["summary"].append(_norm(predicted.get("summary")) == _norm(expected.get("summary")))
+    for section in ("experience", "education", "certifications"):
+        got, want = predicted.get(section, []), expected.get(section, [])
+        for i, entry in enumerate(want):
+            other = got[i] if i < len(got) else {}
+            for field in SCALAR_FIELDS[section]:
+                tally[f"{section}.{field}"].append(_norm(other.get(field)) == _norm(entry.get(field)))
+    want = _skills(expected)
+    if want:
+        got = _skills(predicted)
+        tally["skills (F1)"].append(2 * len(got & want) / (len(got) + len(want)))
+
+
+def run_mode(samples, mode, provider=None):
+    tally, timings, llm_calls = defaultdict(list), [], 0
+    round_trips = provider.calls if provider else 0
+    for name, raw, label in samples:
+        text = text_compaction.compact_resume_text(file_parser.extract_text(name, raw))
+        start = time.perf_counter()
+        if mode == "rules":
+            predicted = llm_providers.normalize_resume(rule_extractor.extract_with_rules(text)[0])
+        else:
+            _, confidence = rule_extractor.extract_with_rules(text)
+            llm_calls += any(c < rule_extractor.RULES_MIN_CONFIDENCE for c in confidence.values()) if mode == "hybrid" else 1
+            predicted = rule_extractor.structure_with_mode(text, mode)
+        timings.append(time.perf_counter() - start)
+        score(predicted, llm_providers.normalize_resume(label), tally)
+    if provider:
+        print(f"{mode:7s} {provider.calls - round_trips} fake LLM round trips for {len(samples)} resumes")
+    return tally, timings, llm_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=40)
+    parser.add_argument("--labels", help="directory of resumes with <name>.json labels")
+    parser.add_argument("--live", action="store_true", help="score the configured LLM providers too")
+    parser.add_argument("--llm-latency", type=float, default=3.0, help="stub LLM latency without --live")
+    args = parser.parse_args()
+
+    samples = labelled_dir(args.labels) if args.labels else synthetic_labelled(args.size)
+    provider = None if args.live else fake_llm.install(args.llm_latency)
+    print(f"{len(samples)} labelled resumes, {'live LLM' if args.live else f'fake LLM ({args.llm_latency:.1f}s, accuracy not scored)'}\n")
+
+    modes = ("rules", "hybrid", "llm") if args.live else ("rules", "hybrid")
+    results = {mode: run_mode(samples, mode, provider) for mode in modes}
+    print()
+
+    # the fake LLM answers with one canned resume, so only rules-only output is scored then
+    scored = modes if args.live else ("rules",)
+    fields = sorted({field for tally, _, _ in results.values() for field in tally})
+    print(f"{'field':28s}" + "".join(f"{mode:>10s}" for mode in scored))
+    for field in fields:
+        row = "".join(f"{statistics.mean(results[m][0][field]) * 100:9.1f}%" if results[m][0][field] else f"{'-':>10s}"
+                      for m in scored)
+        print(f"{field:28s}{row}")
+    overall = {m: statistics.mean(v for values in results[m][0].values() for v in values) for m in scored}
+    print(f"{'overall':28s}" + "".join(f"{overall[m] * 100:9.1f}%" for m in scored))
+    print()
+    for mode in modes:
+        _, timings, llm_calls = results[mode]
+        print(f"{mode:7s} mean {statistics.mean(timings) * 1000:9.2f} ms/resume, "
+              f"LLM needed for {llm_calls}/{len(samples)} resumes")
+
+
+if __name__ == "__main__":
+    main()
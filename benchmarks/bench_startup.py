@@ -0,0 +1,132 @@
+# backend/benchmarks/bench_startup.py
+"""
+Cold-start cost of the Flask app: import time per module and time until the
+server answers its first health check.
+
+    python -m benchmarks.bench_startup [--runs N] [--top N] [--json]
+
+Each run is a fresh interpreter. "import" runs `python -X importtime -c
+"import app"` (background services deferred) and attributes the time to
+the modules that app pulls in; "first health" starts the dev server on a
+free port, with background services on, and polls /api/health until it
+answers. Heavy libraries that request handlers import lazily should not
+show up in the import table at all.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules whose presence at import time means a lazy import regressed
+HEAVY_MODULES = ("google.generativeai", "weasyprint", "docx", "pypdf", "bs4")
+
+
+def _env(**extra):
+    env = dict(os.environ)
+    env.update(extra)
+    return env
+
+
+def parse_importtime(stderr: str):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure_import():
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=BACKEND_DIR,
+                          env=_env(DEFER_BACKGROUND_SERVICES="1"), capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise SystemExit(f"import app failed:\n{proc.stderr[-2000:]}")
+    return wall, parse_importtime(proc.stderr)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_health(timeout=60.0):
+    port = _free_port()
+    code = f"from app import app; app.run(host='127.0.0.1', port={port}, use_reloader=False)"
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=BACKEND_DIR, env=_env(DEFER_BACKGROUND_SERVICES="0"),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise SystemExit("dev server exited before answering /api/health")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise SystemExit(f"no /api/health response within {timeout:g}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules to list by cumulative import time")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    walls, health, cumulative, loaded = [], [], defaultdict(list), set()
+    for _ in range(args.runs):
+        wall, rows = measure_import()
+        walls.append(wall)
+        for name, _, cum_us, depth in rows:
+            loaded.add(name)
+            # top-level packages and everything app imports directly
+            if depth <= 1:
+                cumulative[name].append(cum_us / 1000)
+        health.append(measure_first_health())
+
+    app_ms = statistics.median(cumulative["app"]) if cumulative["app"] else 0.0
+    top = sorted(((name, statistics.median(ms)) for name, ms in cumulative.items() if name != "app"),
+                 key=lambda item: item[1], reverse=True)[:args.top]
+    heavy = sorted(m for m in HEAVY_MODULES if m in loaded)
+    result = {
+        "runs": args.runs,
+        "interpreter_wall_ms": round(statistics.median(walls) * 1000, 1),
+        "import_app_ms": round(app_ms, 1),
+        "first_health_ms": round(statistics.median(health) * 1000, 1),
+        "heavy_modules_at_import": heavy,
+        "top_modules_ms": {name: round(ms, 1) for name, ms in top},
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{args.runs} cold starts (medians)\n")
+    print(f"{'interpreter + import app wall':32s}{result['interpreter_wall_ms']:9.1f} ms")
+    print(f"{'import app (importtime)':32s}{result['import_app_ms']:9.1f} ms")
+    print(f"{'first /api/health response':32s}{result['first_health_ms']:9.1f} ms")
+    print(f"{'heavy modules loaded at import':32s}{', '.join(heavy) or 'none':>12s}\n")
+    print(f"{'module':48s}{'cumulative':>12s}")
+    for name, ms in top:
+        print(f"{name:48s}{ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
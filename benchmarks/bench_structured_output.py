@@ -0,0 +1,127 @@
+# backend/benchmarks/bench_structured_output.py
+"""
+LLM round trips per successful resume parse when responses come back
+malformed, with and without local JSON repair and section retries.
+
+    python -m benchmarks.bench_structured_output [--parses N] [--truncate P] [--prose P]
+                                                 [--trailing-comma P] [--max-uploads N] [--seed N]
+
+A fake provider answers every structuring call with the expected JSON as
+text, damaged at the given per-call rates (cut off at a random point,
+wrapped in prose, or with trailing commas), and decodes it with the real
+gemini_utils.parse_structured_response. Each parse goes through
+llm_providers.structure_resume; one that doesn't produce the full resume
+counts as a re-upload by the user, up to --max-uploads. Modes:
+
+  before         strict decoding, no section retries (the empty structure on any error)
+  repair         json_repair plus re-requesting only the invalid sections
+  repair+schema  as repair, with schema-constrained output: prose and trailing
+                 commas can't occur, cut-offs (token limits) still can
+
+Both the single-call path (medium resume) and the sectioned one (long
+resume, LLM_SECTIONED=on) are measured.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+
+import json_repair
+import llm_providers
+from benchmarks import fake_llm
+from benchmarks.corpus import make_resume, resume_to_text
+from gemini_utils import SECTION_SCHEMA_KEYS, parse_structured_response
+
+MODES = {
+    # name -> (local repair, section retries, schema-constrained output)
+    "before": (False, False, False),
+    "repair": (True, True, False),
+    "repair+schema": (True, True, True),
+}
+
+# name -> (seed, jobs, publications, sectioned)
+VARIANTS = {
+    "single.medium": (2, 5, 15, "off"),
+    "sectioned.long": (3, 8, 45, "on"),
+}
+
+
+class DamagingProvider(fake_llm.FakeProvider):
+    """FakeProvider whose JSON arrives as text, sometimes damaged, and goes through the real decoder."""
+
+    def __init__(self, resume, rng, truncate, prose, trailing_comma, structured):
+        super().__init__(resume=resume)
+        self.rng = rng
+        self.truncate = truncate
+        self.prose = 0.0 if structured else prose
+        self.trailing_comma = 0.0 if structured else trailing_comma
+
+    def _respond(self, data):
+        self._wait()
+        text = json.dumps(data, indent=2)
+        if self.rng.random() < self.trailing_comma:
+            text = text.replace('"\n    }', '",\n    }').replace("}\n  ]", "},\n  ]")
+        if self.rng.random() < self.prose:
+            text = f"Here is the structured resume:\n{text}\nLet me know if you need anything else."
+        if self.rng.random() < self.truncate:
+            text = text[:int(len(text) * self.rng.uniform(0.2, 0.95))]
+        return parse_structured_response(text)
+
+    def structure_resume(self, raw_text):
+        return self._respond(self.resume)
+
+    def structure_section(self, section, text):
+        return self._respond({key: self.resume[key] for key in SECTION_SCHEMA_KEYS[section]})
+
+
+def run(mode, variant, args):
+    repair, retry, structured = MODES[mode]
+    seed, jobs, publications, sectioned = VARIANTS[variant]
+    resume = make_resume(seed, jobs=jobs, publications=publications)
+    expected = llm_providers.normalize_resume(resume)
+    raw_text = resume_to_text(resume)
+
+    json_repair.LLM_JSON_REPAIR = repair
+    llm_providers.LLM_SECTION_RETRY = retry
+    llm_providers.LLM_SECTIONED = sectioned
+    provider = DamagingProvider(resume, random.Random(args.seed), args.truncate, args.prose,
+                                args.trailing_comma, structured)
+    with llm_providers._router_lock:
+        llm_providers._router = llm_providers.LLMRouter([provider], hedge=False)
+
+    succeeded = first_try = uploads = 0
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        for _ in range(args.parses):
+            for attempt in range(args.max_uploads):
+                uploads += 1
+                if llm_providers.structure_resume(raw_text) == expected:
+                    succeeded += 1
+                    first_try += attempt == 0
+                    break
+    return {"round_trips": provider.calls, "uploads": uploads, "succeeded": succeeded, "first_try": first_try}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--parses", type=int, default=300)
+    parser.add_argument("--truncate", type=float, default=0.1, help="share of responses cut off")
+    parser.add_argument("--prose", type=float, default=0.15, help="share of responses wrapped in prose")
+    parser.add_argument("--trailing-comma", type=float, default=0.1, help="share of responses with trailing commas")
+    parser.add_argument("--max-uploads", type=int, default=5, help="re-uploads before a parse is given up")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"damage per call: {args.truncate:.0%} cut off, {args.prose:.0%} prose, "
+          f"{args.trailing_comma:.0%} trailing commas; {args.parses} parses\n")
+    print(f"{'path':16s}{'mode':15s}{'calls/success':>15s}{'uploads/success':>17s}{'first try':>11s}{'gave up':>9s}")
+    for variant in VARIANTS:
+        for mode in MODES:
+            r = run(mode, variant, args)
+            per = lambda n: f"{n / r['succeeded']:.2f}" if r["succeeded"] else "-"
+            print(f"{variant:16s}{mode:15s}{per(r['round_trips']):>15s}{per(r['uploads']):>17s}"
+                  f"{r['first_try'] / args.parses:>11.0%}{args.parses - r['succeeded']:>9d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# backend/benchmarks/check_upload_rss.py
+"""
+Check that the server's peak memory for one PDF upload doesn't grow with
+the size of the file.
+
+    python -m benchmarks.check_upload_rss [--sizes 5,50,150] [--max-growth-mb 40]
+
+For each size, a fresh dev server (parse cache off, rules-only parsing so
+no LLM is called, uploads allowed up to 256 MB) takes a warm-up upload and
+then a resume PDF padded to that size with pages holding large images,
+like scanned attachments. The server process's peak RSS (VmHWM, from
+/proc) is compared to the one after the warm-up. Text extraction of a
+large upload runs in the PDF extraction pool, whose workers are separate
+processes and not counted here.
+
+The script exits non-zero if any upload grows the peak by more than
+--max-growth-mb, or if an upload over MAX_UPLOAD_MB (at its default) is
+not refused with 413. The 413 case's growth is only reported: the dev
+server reads and discards the unread body in 10 MB chunks so the client
+sees the response; gunicorn closes the connection instead. Linux only.
+"""
+import argparse
+import io
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.corpus import make_pdf, make_resume
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_large_pdf(path, size_mb, page_mb=32):
+    """
+    A short text resume followed by pages of photo-sized noise images (at
+    most page_mb each, below pypdf's stream size limit), about size_mb in total.
+    """
+    import pypdf
+    from PIL import Image
+
+    writer = pypdf.PdfWriter(clone_from=io.BytesIO(make_pdf(make_resume(7, jobs=4))))
+    remaining = size_mb
+    while remaining > 0:
+        # random pixels barely compress: a JPEG of them is about 1.2 bytes per pixel at quality 95
+        side = max(64, int((min(remaining, page_mb) * 1024 * 1024 / 1.2) ** 0.5))
+        noise = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+        page = io.BytesIO()
+        noise.save(page, "PDF", quality=95)
+        writer.append(io.BytesIO(page.getvalue()))
+        remaining -= page_mb
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _peak_rss_kb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def start_server(**env):
+    port = _free_port()
+    code = f"from app import app; app.run(host='127.0.0.1', port={port}, use_reloader=False, threaded=True)"
+    proc = subprocess.Popen(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env=dict(os.environ, PARSE_CACHE_ENABLED="0", PARSE_MODE="rules", DEFER_BACKGROUND_SERVICES="1",
+                 PDF_RENDER_WORKERS="0", PDF_EXTRACT_WORKERS="2", **env))
+    url = f"http://127.0.0.1:{port}/api"
+    for _ in range(300):
+        try:
+            requests.get(f"{url}/health", timeout=1)
+            return proc, url
+        except requests.ConnectionError:
+            time.sleep(0.05)
+    proc.kill()
+    raise SystemExit("dev server did not start")
+
+
+def upload(url, path):
+    with open(path, "rb") as f:
+        return requests.post(f"{url}/parse-resume", files={"file": ("resume.pdf", f, "application/pdf")},
+                             data={"mode": "rules"}, timeout=600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="5,50,150", help="upload sizes in MB")
+    parser.add_argument("--max-growth-mb", type=float, default=40.0)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        small = os.path.join(tmp, "small.pdf")
+        with open(small, "wb") as f:
+            f.write(make_pdf(make_resume(3)))
+
+        print(f"{'upload':>10s} {'status':>7s} {'peak RSS growth':>17s}")
+        for size_mb in (float(s) for s in args.sizes.split(",")):
+            path = os.path.join(tmp, f"large_{size_mb:g}.pdf")
+            make_large_pdf(path, size_mb)
+            proc, url = start_server(MAX_UPLOAD_MB="256")
+            try:
+                upload(url, small)
+                baseline = _peak_rss_kb(proc.pid)
+                resp = upload(url, path)
+                growth = (_peak_rss_kb(proc.pid) - baseline) / 1024
+            finally:
+                proc.terminate()
+                proc.wait()
+            actual_mb = os.path.getsize(path) / (1024 * 1024)
+            ok = resp.status_code == 200 and "parsedData" in resp.json() and growth <= args.max_growth_mb
+            print(f"{actual_mb:7.1f} MB {resp.status_code:7d} {growth:14.1f} MB{'' if ok else '   FAIL'}")
+            if not ok:
+                failures.append(f"{actual_mb:.1f} MB upload: status {resp.status_code}, peak RSS +{growth:.1f} MB")
+
+        # over the default cap: refused from Content-Length, nothing parsed
+        proc, url = start_server()
+        try:
+            from uploads import MAX_UPLOAD_MB
+            path = os.path.join(tmp, "too_large.pdf")
+            make_large_pdf(path, MAX_UPLOAD_MB + 5)
+            upload(url, small)
+            baseline = _peak_rss_kb(proc.pid)
+            resp = upload(url, path)
+            growth = (_peak_rss_kb(proc.pid) - baseline) / 1024
+        finally:
+            proc.terminate()
+            proc.wait()
+        ok = resp.status_code == 413
+        print(f"\n{os.path.getsize(path) / (1024 * 1024):7.1f} MB over the {MAX_UPLOAD_MB} MB cap: "
+              f"{resp.status_code}, peak RSS +{growth:.1f} MB{'' if ok else '   FAIL'}")
+        if not ok:
+            failures.append(f"over-cap upload answered {resp.status_code}, expected 413")
+
+    if failures:
+        print("\nFAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"\nOK: every upload stayed within +{args.max_growth_mb:g} MB peak RSS")
+
+
+if __name__ == "__main__":
+    main()
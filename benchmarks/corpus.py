@@ -0,0 +1,208 @@
+# backend/benchmarks/corpus.py
+"""
+Deterministic synthetic resume corpus for the benchmarks.
+
+Every resume is generated from a seeded RNG, so two runs (or two commits)
+always measure exactly the same inputs.
+"""
+import base64
+import copy
+import io
+import random
+
+FIRST_NAMES = ["Ava", "Liam", "Maya", "Noah", "Priya", "Omar", "Chen", "Sofia", "Ravi", "Elena"]
+LAST_NAMES = ["Patel", "Nguyen", "Garcia", "Kim", "Okafor", "Rossi", "Schmidt", "Sato", "Haddad", "Lopez"]
+TITLES = ["Software Engineer", "Data Scientist", "Product Manager", "DevOps Engineer", "QA Analyst"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Enterprises"]
+SCHOOLS = ["State University", "Institute of Technology", "City College", "Polytechnic University"]
+DEGREES = ["B.S. Computer Science", "M.S. Data Science", "B.A. Economics", "Ph.D. Physics"]
+SKILLS = ["Python", "Java", "SQL", "AWS", "Docker", "Kubernetes", "React", "Flask", "Spark", "Terraform"]
+VERBS = ["Built", "Led", "Designed", "Migrated", "Optimized", "Automated", "Shipped", "Reduced"]
+OBJECTS = ["a billing pipeline", "the search service", "CI/CD workflows", "a data warehouse",
+           "customer onboarding", "latency dashboards", "an internal API gateway"]
+
+
+def make_resume(seed: int, jobs: int = 3, publications: int = 0) -> dict:
+    """Resume JSON in the shape the frontend posts to the generate endpoints."""
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    experience = []
+    for i in range(jobs):
+        start = 2024 - 2 * (i + 1)
+        bullets = [f"• {rng.choice(VERBS)} {rng.choice(OBJECTS)}, improving throughput by {rng.randint(5, 80)}%."
+                   for _ in range(rng.randint(3, 6))]
+        experience.append({
+            "id": f"exp{i}",
+            "jobTitle": rng.choice(TITLES),
+            "company": rng.choice(COMPANIES),
+            "dates": f"Jan {start} - Dec {start + 1}",
+            "description": "\n".join(bullets),
+        })
+    return {
+        "personal": {
+            "name": name,
+            "email": f"{name.split()[0].lower()}.{name.split()[1].lower()}@example.com",
+            "phone": f"+1 (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            "location": "Austin, TX",
+        },
+        "summary": f"{rng.choice(TITLES)} with {rng.randint(3, 15)} years of experience.",
+        "experience": experience,
+        "education": [{
+            "id": "edu0",
+            "degree": rng.choice(DEGREES),
+            "institution": rng.choice(SCHOOLS),
+            "graduationYear": str(rng.randint(2005, 2020)),
+            "gpa": "",
+            "achievements": "",
+        }],
+        "skills": [{"id": "sk0", "category": "Technical", "skills_list": ", ".join(rng.sample(SKILLS, 5))}],
+        "projects": [],
+        "publications": [
+            {"id": f"pub{i}", "title": f"On {rng.choice(OBJECTS)} at scale ({i})",
+             "authors": name, "journal": "Journal of Systems", "date": str(2010 + i % 14), "link": ""}
+            for i in range(publications)
+        ],
+        "certifications": [{"id": "cert0", "name": "AWS Solutions Architect", "issuer": "Amazon", "date": "2022"}],
+        "styleOptions": {},
+    }
+
+
+def make_photo(seed: int, size: int = 800) -> bytes:
+    """Square JPEG standing in for a profile photo: seeded noise over gradients."""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    gradient = Image.linear_gradient("L").resize((size, size))
+    noise = Image.frombytes("L", (size, size), rng.randbytes(size * size))
+    buf = io.BytesIO()
+    Image.merge("RGB", (gradient, noise, gradient.rotate(90))).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def with_photo(resume: dict, seed: int = 0) -> dict:
+    """Copy of resume with a profile photo, as the frontend sends it for PDF generation."""
+    resume = copy.deepcopy(resume)
+    resume["personal"]["profile_image_b64"] = base64.b64encode(make_photo(seed)).decode("ascii")
+    resume["personal"]["profile_image_format"] = "jpeg"
+    return resume
+
+
+def resume_to_text(resume: dict) -> str:
+    """Plain-text rendering of a resume, roughly what extraction produces."""
+    p = resume["personal"]
+    lines = [p["name"], f'{p["email"]} | {p["phone"]} | {p["location"]}', "", "SUMMARY", resume["summary"], "",
+             "EXPERIENCE"]
+    for exp in resume["experience"]:
+        lines += [exp["jobTitle"], f'{exp["company"]} | {exp["dates"]}', exp["description"], ""]
+    lines.append("EDUCATION")
+    for edu in resume["education"]:
+        lines += [edu["degree"], f'{edu["institution"]}, {edu["graduationYear"]}', ""]
+    lines += ["SKILLS", ", ".join(s["skills_list"] for s in resume["skills"]), ""]
+    if resume["publications"]:
+        lines.append("PUBLICATIONS")
+        lines += [f'{pub["title"]}. {pub["authors"]}. {pub["journal"]}, {pub["date"]}.' for pub in resume["publications"]]
+        lines.append("")
+    lines.append("CERTIFICATIONS")
+    lines += [f'{c["name"]} - {c["issuer"]}, {c["date"]}' for c in resume["certifications"]]
+    return "\n".join(lines)
+
+
+def make_docx(resume: dict, image: bytes = None) -> bytes:
+    """
+    DOCX with a header, a contact table and a skills table, like common
+    templates, and the image under the name if one is given.
+    """
+    import docx
+    from docx.shared import Inches
+
+    doc = docx.Document()
+    p = resume["personal"]
+    doc.sections[0].header.paragraphs[0].text = f'{p["name"]} - Resume'
+    doc.add_heading(p["name"], level=0)
+    if image:
+        doc.add_picture(io.BytesIO(image), width=Inches(1.2))
+    table = doc.add_table(rows=1, cols=3)
+    for cell, value in zip(table.rows[0].cells, (p["email"], p["phone"], p["location"])):
+        cell.text = value
+    doc.add_heading("Summary", level=1)
+    doc.add_paragraph(resume["summary"])
+    doc.add_heading("Experience", level=1)
+    for exp in resume["experience"]:
+        doc.add_paragraph(exp["jobTitle"]).runs[0].bold = True
+        doc.add_paragraph(f'{exp["company"]} | {exp["dates"]}')
+        for bullet in exp["description"].split("\n"):
+            doc.add_paragraph(bullet.lstrip("• "), style="List Bullet")
+    doc.add_heading("Education", level=1)
+    for edu in resume["education"]:
+        doc.add_paragraph(f'{edu["degree"]}, {edu["institution"]} ({edu["graduationYear"]})')
+    doc.add_heading("Skills", level=1)
+    skills = doc.add_table(rows=len(resume["skills"]), cols=2)
+    for row, skill in zip(skills.rows, resume["skills"]):
+        row.cells[0].text = skill["category"]
+        row.cells[1].text = skill["skills_list"]
+    if resume["publications"]:
+        doc.add_heading("Publications", level=1)
+        for pub in resume["publications"]:
+            doc.add_paragraph(f'{pub["title"]}. {pub["authors"]}. {pub["journal"]}, {pub["date"]}.')
+    doc.add_heading("Certifications", level=1)
+    for cert in resume["certifications"]:
+        doc.add_paragraph(f'{cert["name"]} - {cert["issuer"]}, {cert["date"]}')
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def make_pdf(resume: dict, image: bytes = None) -> bytes:
+    """
+    Text PDF of resume_to_text(), with a running header and page numbers,
+    and the image in the top right corner of the first page if one is given.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4, invariant=1)
+    width, height = A4
+    header = f'{resume["personal"]["name"]} - Curriculum Vitae'
+    lines = []
+    for line in resume_to_text(resume).split("\n"):
+        # crude wrap so long bullets stay on the page
+        while len(line) > 95:
+            lines.append(line[:95])
+            line = line[95:]
+        lines.append(line)
+    per_page = 48
+    pages = [lines[i:i + per_page] for i in range(0, len(lines), per_page)]
+    for number, page in enumerate(pages, start=1):
+        c.setFont("Helvetica", 8)
+        c.drawString(50, height - 30, header)
+        c.drawString(width / 2, 25, f"Page {number} of {len(pages)}")
+        if image and number == 1:
+            c.drawImage(ImageReader(io.BytesIO(image)), width - 150, height - 150, 100, 100)
+        c.setFont("Helvetica", 10)
+        y = height - 60
+        for line in page:
+            c.drawString(50, y, line)
+            y -= 15
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def pdf_corpus(size: int = 20) -> list:
+    """(name, bytes) pairs ranging from one-page resumes to multi-page academic CVs."""
+    corpus = []
+    for seed in range(size):
+        resume = make_resume(seed, jobs=2 + seed % 6, publications=(seed % 4) * 15)
+        corpus.append((f"synthetic_{seed:03d}.pdf", make_pdf(resume)))
+    return corpus
+
+
+def docx_corpus(size: int = 20) -> list:
+    """(name, bytes) pairs ranging from one-page resumes to long academic CVs."""
+    corpus = []
+    for seed in range(size):
+        resume = make_resume(seed, jobs=2 + seed % 6, publications=(seed % 4) * 15)
+        corpus.append((f"synthetic_{seed:03d}.docx", make_docx(resume)))
+    return corpus
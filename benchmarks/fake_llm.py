@@ -0,0 +1,68 @@
+# backend/benchmarks/fake_llm.py
+"""
+Offline stand-in for the LLM providers.
+
+FakeProvider implements the llm_providers interface with canned JSON and a
+fixed latency per call, so benchmarks exercise the real router, sectioned
+structuring and response handling without network access. install() puts
+it in place of whatever LLM_PROVIDERS configures.
+"""
+import copy
+import time
+
+import llm_providers
+from benchmarks.corpus import make_resume
+from gemini_utils import SECTION_SCHEMA_KEYS
+from metrics import stage
+
+CANNED_PITCH = ("Seasoned engineer who ships reliable systems, mentors teams and turns ambiguous "
+                "problems into measurable results.")
+
+
+class FakeProvider(llm_providers.LLMProvider):
+    name = "fake"
+
+    def __init__(self, latency=0.0, resume=None, pitch=CANNED_PITCH, stream_chunks=8):
+        self.latency = latency
+        self.resume = llm_providers.normalize_resume(resume or make_resume(0))
+        self.pitch = pitch
+        self.stream_chunks = stream_chunks
+        self.calls = 0
+
+    def _wait(self):
+        self.calls += 1
+        if self.latency > 0:
+            with stage("llm"):  # as the real providers time their calls
+                time.sleep(self.latency)
+
+    def structure_resume(self, raw_text):
+        self._wait()
+        return copy.deepcopy(self.resume)
+
+    def structure_section(self, section, text):
+        self._wait()
+        return {key: copy.deepcopy(self.resume[key]) for key in SECTION_SCHEMA_KEYS[section]}
+
+    def elevator_pitch(self, resume_data):
+        self._wait()
+        return self.pitch
+
+    def enhance_section(self, section_name, text):
+        self._wait()
+        return [text, f"Improved: {text}"]
+
+    def stream_elevator_pitch(self, resume_data):
+        # the latency goes before the first chunk, like time to first token
+        self._wait()
+        words = self.pitch.split(" ")
+        step = max(1, -(-len(words) // self.stream_chunks))
+        for start in range(0, len(words), step):
+            yield " ".join(words[start:start + step]) + (" " if start + step < len(words) else "")
+
+
+def install(latency=0.0, **options) -> FakeProvider:
+    """Route every LLM call in this process to a new FakeProvider and return it."""
+    provider = FakeProvider(latency, **options)
+    with llm_providers._router_lock:
+        llm_providers._router = llm_providers.LLMRouter([provider], hedge=False)
+    return provider
@@ -0,0 +1,217 @@
+# backend/bulk_ingest.py
+"""
+Bulk resume ingestion: a zip archive or a multipart list of PDF/DOCX files in,
+one NDJSON record per file out, in completion order.
+
+Each file goes through two pools:
+  1. text extraction on the shared CPU process pool (file_parser.get_extract_pool)
+  2. AI structuring on a thread pool capped at BULK_LLM_CONCURRENCY calls
+so extraction of later files overlaps with LLM calls for earlier ones.
+A failure only produces an error record for that file; the batch carries on.
+"""
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import file_parser
+
+BULK_LLM_CONCURRENCY = int(os.getenv("BULK_LLM_CONCURRENCY", "8"))
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "500"))
+BULK_MAX_FILE_MB = int(os.getenv("BULK_MAX_FILE_MB", "20"))
+# Files read but not yet finished; bounds memory for very large batches
+BULK_MAX_IN_FLIGHT = int(os.getenv("BULK_MAX_IN_FLIGHT", str(4 * BULK_LLM_CONCURRENCY)))
+# Files up to this size are held in memory until read, bigger ones wait in a
+# temp file; a full batch holds at most BULK_MAX_FILES times this in memory
+BULK_SPOOL_KB = int(os.getenv("BULK_SPOOL_KB", "128"))
+
+_llm_pool = None
+_llm_pool_lock = threading.Lock()
+
+
+class BulkInputError(ValueError):
+    """The batch itself (not a single file in it) is unusable."""
+
+
+def get_llm_pool():
+    global _llm_pool
+    with _llm_pool_lock:
+        if _llm_pool is None:
+            _llm_pool = ThreadPoolExecutor(max_workers=BULK_LLM_CONCURRENCY, thread_name_prefix="bulk-llm")
+        return _llm_pool
+
+
+def _detach(stream):
+    """
+    Copy an upload into a temp file owned by the batch. Flask closes request
+    files as soon as the view returns, before the streamed response runs.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_KB * 1024)
+    shutil.copyfileobj(stream, spooled)
+    spooled.seek(0)
+    return spooled
+
+
+def _reader(spooled):
+    def read():
+        with spooled:
+            return spooled.read()
+    return read
+
+
+def _failing_reader(message):
+    def read():
+        raise ValueError(message)
+    return read
+
+
+class _LimitedReader:
+    """File-like that stops after limit bytes (for copying untrusted zip members)."""
+
+    def __init__(self, f, limit):
+        self.f = f
+        self.remaining = limit
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def uploads_from_zip(stream):
+    """
+    (filename, read) pairs for every file in a zip archive. The members are
+    copied out while the archive is open, so it is closed before returning.
+    """
+    too_large = f"File is larger than {BULK_MAX_FILE_MB} MB."
+    # the archive itself goes straight to disk: it's only read here
+    with tempfile.TemporaryFile() as spooled:
+        shutil.copyfileobj(stream, spooled)
+        spooled.seek(0)
+        try:
+            archive = zipfile.ZipFile(spooled)
+        except zipfile.BadZipFile as e:
+            raise BulkInputError(f"Not a valid zip archive: {e}")
+        with archive:
+            members = [info for info in archive.infolist()
+                       if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+                       and not os.path.basename(info.filename).startswith(".")]
+            if len(members) > BULK_MAX_FILES:
+                raise BulkInputError(f"Archive has {len(members)} files; the limit is {BULK_MAX_FILES}.")
+
+            uploads = []
+            for info in members:
+                # file_size is the declared uncompressed size; stop at the cap
+                # even if the header lies
+                if info.file_size > BULK_MAX_FILE_MB * 1024 * 1024:
+                    uploads.append((info.filename, _failing_reader(too_large)))
+                    continue
+                try:
+                    with archive.open(info) as f:
+                        member = _detach(_LimitedReader(f, BULK_MAX_FILE_MB * 1024 * 1024 + 1))
+                except (zipfile.BadZipFile, OSError, RuntimeError, NotImplementedError) as e:
+                    # corrupt, encrypted or unsupported member: an error record for that file only
+                    uploads.append((info.filename, _failing_reader(str(e))))
+                    continue
+                if member.seek(0, os.SEEK_END) > BULK_MAX_FILE_MB * 1024 * 1024:
+                    member.close()
+                    uploads.append((info.filename, _failing_reader(too_large)))
+                    continue
+                member.seek(0)
+                uploads.append((info.filename, _reader(member)))
+    return uploads
+
+
+def uploads_from_files(files):
+    """(filename, read) pairs for a list of werkzeug FileStorage objects."""
+    if len(files) > BULK_MAX_FILES:
+        raise BulkInputError(f"Got {len(files)} files; the limit is {BULK_MAX_FILES}.")
+    return [(f.filename or "", _reader(_detach(f.stream))) for f in files]
+
+
+def ingest(uploads, llm_pool=None, mode=None):
+    """
+    Run every (filename, read) upload through extraction and structuring and
+    yield one record dict per file as soon as it finishes.
+    """
+    uploads = list(uploads)
+    results = queue.Queue()
+    in_flight = threading.BoundedSemaphore(max(1, BULK_MAX_IN_FLIGHT))
+    cancelled = threading.Event()
+    llm_pool = llm_pool or get_llm_pool()
+
+    def finish(index, filename, started, parsed=None, error=None):
+        record = {"index": index, "filename": filename,
+                  "elapsedMs": round((time.perf_counter() - started) * 1000, 1)}
+        if error is None:
+            record.update(status="ok", parsedData=parsed)
+        else:
+            record.update(status="error", error=error)
+        in_flight.release()
+        results.put(record)
+
+    def structure(index, filename, started, raw_text, raw_bytes):
+        try:
+            if cancelled.is_set():
+                raise RuntimeError("Batch cancelled.")
+            finish(index, filename, started, parsed=file_parser.structure_text(raw_text, raw_bytes, mode))
+        except Exception as e:
+            finish(index, filename, started, error=str(e))
+
+    def on_extracted(index, filename, started, raw_bytes):
+        def callback(future):
+            try:
+                raw_text = future.result()
+                if not raw_text.strip():
+                    raise ValueError("Could not extract any text from the document.")
+                llm_pool.submit(structure, index, filename, started, raw_text, raw_bytes)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    file_parser.reset_extract_pool()
+                finish(index, filename, started, error=str(e))
+        return callback
+
+    def feed():
+        for index, (filename, read) in enumerate(uploads):
+            in_flight.acquire()
+            started = time.perf_counter()
+            if cancelled.is_set():
+                finish(index, filename, started, error="Batch cancelled.")
+                continue
+            try:
+                if not file_parser.is_supported_filename(filename):
+                    raise ValueError("Unsupported file type. Please upload a .docx or .pdf file.")
+                raw_bytes = read()
+                cached = file_parser.lookup_cached_parse(raw_bytes, mode)
+                if cached is not None:
+                    finish(index, filename, started, parsed=cached)
+                    continue
+                future = file_parser.get_extract_pool().submit(file_parser.extract_text, filename, raw_bytes)
+                future.add_done_callback(on_extracted(index, filename, started, raw_bytes))
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    file_parser.reset_extract_pool()
+                finish(index, filename, started, error=str(e))
+
+    feeder = threading.Thread(target=feed, name="bulk-feed", daemon=True)
+    feeder.start()
+    try:
+        for _ in range(len(uploads)):
+            yield results.get()
+    finally:
+        # client went away or the caller stopped early: stop feeding new files
+        cancelled.set()
+
+
+def ingest_ndjson(uploads, llm_pool=None, mode=None):
+    """ingest() rendered as NDJSON lines for a streaming response."""
+    for record in ingest(uploads, llm_pool=llm_pool, mode=mode):
+        yield json.dumps(record) + "\n"
@@ -147,34 +147,50 @@ def generate_pdf_from_data(data):
 '''
 
 
-import os, re
-from docx import Document
-from docx.shared import Pt, Inches, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from weasyprint import HTML
-from jinja2 import Environment, FileSystemLoader
-from bs4 import BeautifulSoup
+import copy, io, os, re, threading
+from collections import OrderedDict
+
+from image_cache import docx_logo
+from metrics import stage, timed
+
+# python-docx, WeasyPrint, Jinja and bs4 are imported where they're used so
+# importing this module (and therefore the app) stays cheap; they are loaded
+# ahead of the first request by app.warm_heavy_modules().
+
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), 'assets')
 
 def clean_text(t): return re.sub(r'\n\s*\n','\n', t or '').strip()
 def strip_html(s):
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(s or '', 'html.parser')
     for br in soup.find_all('br'): br.replace_with('\n')
     return soup.get_text()
 
-def generate_docx_from_data(data):
+# ── DOCX base documents ──
+# The blank document, logo and Normal/SectionHeading styles only depend on
+# the style options, so each combination is built once and copied per
+# request instead of starting from Document(), which re-reads and parses
+# the default template (a 350 KB styles part) every time.
+DOCX_BASE_CACHE_SIZE = int(os.getenv('DOCX_BASE_CACHE_SIZE', '16'))
+# PDF stylesheets per font/size/accent; the keys come from the client, so bounded
+PDF_STYLE_CACHE_SIZE = int(os.getenv('PDF_STYLE_CACHE_SIZE', '32'))
+_docx_bases = OrderedDict()  # style key -> OpcPackage
+_docx_bases_lock = threading.Lock()
+
+def _build_docx_base(font, sz, accent, include_logo):
+    from docx import Document
+    from docx.shared import Pt, Inches, RGBColor
+
     doc = Document()
     # ── Logo ──
-    if data.get('includeLogo'):
-        logo = os.path.join(os.path.dirname(__file__), 'assets', 'PamTen_Logo.png')
-        if os.path.exists(logo):
-            doc.add_picture(logo, width=Inches(1.5))
+    if include_logo:
+        logo = docx_logo()
+        if logo:
+            doc.add_picture(io.BytesIO(logo), width=Inches(1.5))
             doc.add_paragraph()
 
     # ── Styles ──
-    style = data.get('styleOptions', {})
-    font = style.get('fontFamily','Calibri').split(',')[0]
-    sz   = style.get('fontSize',11)
-    accent = RGBColor.from_string(style.get('accentColor','#34495e').lstrip('#'))
+    accent = RGBColor.from_string(accent)
 
     normal = doc.styles['Normal']
     normal.font.name = font
@@ -187,6 +203,55 @@ def generate_docx_from_data(data):
     heading.font.color.rgb = accent
     heading.paragraph_format.space_before = Pt(12)
     heading.paragraph_format.space_after  = Pt(6)
+    return doc
+
+def _copy_docx(package):
+    # Copy the package, not a Document: each part holds the root of its own
+    # XML tree, so the trees are copied whole. A Document also references
+    # inner elements (its body), which deepcopy would detach into new trees.
+    return copy.deepcopy(package).main_document_part.document
+
+def new_docx_document(font, sz, accent, include_logo):
+    """A fresh document for these style options, copied from a cached base."""
+    key = (font, sz, accent, bool(include_logo))
+    if DOCX_BASE_CACHE_SIZE <= 0:
+        return _build_docx_base(*key)
+    with _docx_bases_lock:
+        package = _docx_bases.get(key)
+        if package is not None:
+            _docx_bases.move_to_end(key)
+            # copied under the lock so no other thread reads the trees meanwhile
+            return _copy_docx(package)
+    doc = _build_docx_base(*key)
+    with _docx_bases_lock:
+        if key not in _docx_bases:
+            _docx_bases[key] = copy.deepcopy(doc.part.package)
+            while len(_docx_bases) > DOCX_BASE_CACHE_SIZE:
+                _docx_bases.popitem(last=False)
+    return doc
+
+def add_section_heading(doc, text):
+    # Same as add_paragraph(text, style='SectionHeading') but without
+    # python-docx resolving the style, which scans every style in the
+    # document (~2.5 ms per call). Paragraphs without a style get Normal,
+    # the default, so body paragraphs need no style at all.
+    p = doc.add_paragraph(text)
+    p._p.get_or_add_pPr().style = 'SectionHeading'
+    return p
+
+@timed('docx_build')
+def generate_docx_from_data(data):
+    from docx.shared import Pt, RGBColor
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    # ── Base document: logo and styles ──
+    style = data.get('styleOptions') or {}
+    font = style.get('fontFamily','Calibri').split(',')[0]
+    sz   = style.get('fontSize',11)
+    accent_hex = style.get('accentColor','#34495e').lstrip('#')
+
+    doc = new_docx_document(font, sz, accent_hex, data.get('includeLogo'))
+    accent = RGBColor.from_string(accent_hex)
 
     # ── Header ──
     p = doc.add_paragraph()
@@ -205,37 +270,133 @@ def generate_docx_from_data(data):
 
     # ── Summary ──
     if data.get('summary'):
-        doc.add_paragraph('Summary', style='SectionHeading')
-        doc.add_paragraph(clean_text(strip_html(data['summary'])), style=normal)
+        add_section_heading(doc, 'Summary')
+        doc.add_paragraph(clean_text(strip_html(data['summary'])))
 
     # ── Experience ──
     if data.get('experience'):
-        doc.add_paragraph('Experience', style='SectionHeading')
+        add_section_heading(doc, 'Experience')
         for exp in data['experience']:
             p = doc.add_paragraph()
             p.add_run(exp.get('jobTitle','')).bold = True
             p.add_run(f"\n{exp.get('company','')} | {exp.get('dates','')}\n").italic = True
             p.add_run(clean_text(strip_html(exp.get('description',''))))
-            p.style = normal
             p.paragraph_format.space_after = Pt(12)
 
     return doc
 
-def generate_pdf_from_data(data):
+# ── PDF render engine ──
+# Only the per-resume style values below are computed per request; everything
+# else in the stylesheet lives in assets/resume_base.css and is parsed once.
+STYLE_CSS = """
+body {{ font-family: {font}; font-size: {size}pt; }}
+.name {{ color: {accent}; }}
+.contact-info {{ font-size: {contact_size}pt; }}
+.section-title {{ color: {accent}; border-bottom-color: {accent}; }}
+"""
+
+# Small but representative resume rendered once at startup so the first real
+# request doesn't pay for font discovery and layout warm-up.
+WARMUP_RESUME = {
+    'personal': {'name': 'Warm Up', 'email': 'warm@up.dev', 'phone': '000', 'location': 'Nowhere'},
+    'summary': 'Warm-up render.',
+    'experience': [{'jobTitle': 'Engineer', 'company': 'Acme', 'dates': '2020 - 2024', 'description': 'Built things.'}],
+    'education': [{'degree': 'BSc', 'institution': 'University', 'graduationYear': '2020', 'achievements': ''}],
+    'skills': [{'category': 'Languages', 'skills_list': 'Python'}],
+    'certifications': [{'name': 'Cert', 'issuer': 'Issuer', 'date': '2021'}],
+    'styleOptions': {},
+}
+
+class PdfRenderEngine:
+    """
+    Long-lived PDF renderer. Holds the compiled Jinja template, a shared
+    WeasyPrint font configuration and the pre-parsed base stylesheet so
+    each request only renders HTML and lays out the PDF.
+    """
+
+    def __init__(self, assets_dir=ASSETS_DIR, template_name='resume_template.html',
+                 base_css_name='resume_base.css'):
+        from weasyprint import CSS
+        from weasyprint.text.fonts import FontConfiguration
+        from jinja2 import Environment, FileSystemLoader
+
+        self.assets_dir = assets_dir
+        self.font_config = FontConfiguration()
+        env = Environment(loader=FileSystemLoader(assets_dir), auto_reload=False)
+        self.template = env.get_template(template_name)
+        self.base_css = CSS(filename=os.path.join(assets_dir, base_css_name),
+                            font_config=self.font_config)
+        self._style_sheets = OrderedDict()  # (font, size, accent) -> CSS, least recently used first
+        self._style_lock = threading.Lock()
+
+    def style_css(self, style_options):
+        """Return the (cached) stylesheet for one font/size/accent combination."""
+        style_options = style_options or {}
+        font = style_options.get('fontFamily') or 'Calibri, sans-serif'
+        try:
+            size = float(style_options.get('fontSize') or 11)
+        except (TypeError, ValueError):
+            size = 11.0
+        if not 4 <= size <= 72:  # also rejects nan/inf
+            size = 11.0
+        accent = style_options.get('accentColor') or '#34495e'
+        key = (font, size, accent)
+        with self._style_lock:
+            sheet = self._style_sheets.get(key)
+            if sheet is not None:
+                self._style_sheets.move_to_end(key)
+                return sheet
+        from weasyprint import CSS
+        css = STYLE_CSS.format(font=font, size=f'{size:g}', contact_size=f'{size - 1:g}', accent=accent)
+        sheet = CSS(string=css, font_config=self.font_config)
+        if PDF_STYLE_CACHE_SIZE > 0:
+            with self._style_lock:
+                self._style_sheets[key] = sheet
+                while len(self._style_sheets) > PDF_STYLE_CACHE_SIZE:
+                    self._style_sheets.popitem(last=False)
+        return sheet
+
+    def render_html(self, data):
+        return self.template.render(**{**data, 'styleOptions': data.get('styleOptions') or {}})
+
+    def render(self, data, target=None):
+        """PDF bytes, or None after writing them to target (a path or file object)."""
+        from weasyprint import HTML
+        with stage('template_render'):
+            html = self.render_html(data)
+        with stage('pdf_write'):
+            return HTML(string=html, base_url=self.assets_dir).write_pdf(
+                target=target,
+                stylesheets=[self.base_css, self.style_css(data.get('styleOptions'))],
+                font_config=self.font_config,
+            )
+
+    def warm_up(self):
+        self.render(WARMUP_RESUME)
+
+_pdf_engine = None
+_pdf_engine_lock = threading.Lock()
+
+def init_pdf_engine(warm_up=True):
+    """Create the process-wide render engine (called once at app startup)."""
+    global _pdf_engine
+    with _pdf_engine_lock:
+        if _pdf_engine is None:
+            engine = PdfRenderEngine()
+            if warm_up:
+                engine.warm_up()
+            _pdf_engine = engine
+    return _pdf_engine
+
+def get_pdf_engine():
+    return _pdf_engine or init_pdf_engine(warm_up=False)
+
+def generate_pdf_from_data(data, target=None):
     # ── Clean ──
     if data.get('summary'): data['summary']=clean_text(data['summary'])
     for section in ('experience','education'):
         for item in data.get(section,[]):
             for k in item: item[k]=clean_text(item[k])
 
-    # ── Render HTML ──
-    env = Environment(loader=FileSystemLoader(os.path.join(os.path.dirname(__file__),'assets')))
-    tpl = env.get_template('resume_template.html')
-    html = tpl.render(**data)
-
-    # ── PDF ──
-    return HTML(string=html,
-                base_url=os.path.join(os.path.dirname(__file__),'assets')
-               ).write_pdf()
-
-
+    # ── Render ──
+    return get_pdf_engine().render(data, target)
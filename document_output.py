@@ -0,0 +1,74 @@
+# backend/document_output.py
+"""
+Hand-off of generated documents from the renderer to the response.
+
+Documents are written straight into a spooled temporary file rather than
+built up as bytes and copied into the response. Small ones (up to
+DOCUMENT_SPOOL_MAX_KB) come back as bytes. Anything larger is left in an
+unlinked temp file that the response streams from; under gunicorn that
+goes through sendfile(), so an in-flight download holds a file descriptor
+rather than the document in memory.
+
+Renders in the PDF pool's worker processes use write_to_temp(): the
+worker writes the file and only its path crosses the process boundary,
+instead of the pickled document. open_rendered() takes it over in the
+server process. A file is left behind only if a worker is killed
+mid-render, and then it has the "resume-render-" prefix.
+"""
+import os
+import tempfile
+
+DOCUMENT_SPOOL_MAX_KB = int(os.getenv("DOCUMENT_SPOOL_MAX_KB", "64"))
+# Empty = the system temp directory
+DOCUMENT_SPOOL_DIR = os.getenv("DOCUMENT_SPOOL_DIR", "") or None
+
+TEMP_PREFIX = "resume-render-"
+
+
+def _small_or_file(f, size):
+    if size <= DOCUMENT_SPOOL_MAX_KB * 1024:
+        with f:
+            return f.read()
+    return f
+
+
+def spool(write):
+    """
+    Run write(file) into a spooled temp file. Returns bytes for a small
+    document, else the file, positioned at its start; the caller closes it.
+    """
+    f = tempfile.SpooledTemporaryFile(max_size=DOCUMENT_SPOOL_MAX_KB * 1024, dir=DOCUMENT_SPOOL_DIR)
+    try:
+        write(f)
+        size = f.tell()
+        f.seek(0)
+    except BaseException:
+        f.close()
+        raise
+    return _small_or_file(f, size)
+
+
+def write_to_temp(write, suffix="") -> str:
+    """Run write(file) into a new named temp file and return its path (for another process to open)."""
+    fd, path = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix=suffix, dir=DOCUMENT_SPOOL_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def open_rendered(path):
+    """Take over a file from write_to_temp(): bytes if it's small, else the open (already unlinked) file."""
+    f = open(path, "rb")
+    os.unlink(path)
+    return _small_or_file(f, os.fstat(f.fileno()).st_size)
+
+
+def document_size(body) -> int:
+    """Length of a document returned by spool() / open_rendered()."""
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    return os.fstat(body.fileno()).st_size
@@ -3,68 +3,411 @@
 import io
 import os
 import sys
-import docx
-import pypdf
-from bs4 import BeautifulSoup
+import re
+import mmap
+import threading
+import zipfile
+import multiprocessing
+import contextlib
+import tempfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-from gemini_utils import structure_text_with_ai  # your AI structuring function
+from gemini_utils import empty_resume_structure
+from llm_providers import collect_incomplete, structure_resume  # AI structuring via the configured providers
+from metrics import stage
+from parse_cache import get_parse_cache
+from text_compaction import PAGE_BREAK, compact_for_prompt
+from rule_extractor import resolve_mode, structure_with_mode
+from uploads import UPLOAD_SPOOL_DIR, UPLOAD_SPOOL_KB, UPLOAD_TEMP_PREFIX
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_W_P, _W_T, _W_TAB, _W_BR, _W_CR = _W + "p", _W + "t", _W + "tab", _W + "br", _W + "cr"
+_W_TC, _W_TR, _W_TBL, _W_PPR = _W + "tc", _W + "tr", _W + "tbl", _W + "pPr"
+_W_NO_BREAK_HYPHEN = _W + "noBreakHyphen"
+
+_DOCX_HEADER_RE = re.compile(r"^word/header\d*\.xml$")
+_DOCX_FOOTER_RE = re.compile(r"^word/footer\d*\.xml$")
+
+
+def _iter_docx_part_text(stream):
+    """
+    Incrementally parse one WordprocessingML part and yield its text in
+    reading order: one item per body paragraph and one per table row
+    (cells joined with tabs). Text boxes are nested paragraphs, so they come
+    out too; the VML duplicate of each text box (mc:Fallback) is skipped.
+    """
+    paragraphs = []  # stack of run-text buffers (text boxes nest paragraphs)
+    cells = []       # stack of paragraph lists, one per open table cell
+    rows = []        # stack of cell lists, one per open table row
+    skip = 0         # depth inside mc:Fallback
+    in_ppr = 0       # w:tab inside w:pPr is a tab stop, not text
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == _MC_FALLBACK:
+                skip += 1
+            elif skip:
+                pass
+            elif tag == _W_P:
+                paragraphs.append([])
+            elif tag == _W_TC:
+                cells.append([])
+            elif tag == _W_TR:
+                rows.append([])
+            elif tag == _W_PPR:
+                in_ppr += 1
+            continue
+
+        if tag == _MC_FALLBACK:
+            skip -= 1
+            elem.clear()
+            continue
+        if skip:
+            continue
+
+        if tag == _W_T:
+            if paragraphs:
+                paragraphs[-1].append(elem.text or "")
+        elif tag == _W_PPR:
+            in_ppr -= 1
+        elif tag == _W_TAB:
+            if paragraphs and not in_ppr:
+                paragraphs[-1].append("\t")
+        elif tag in (_W_BR, _W_CR):
+            if paragraphs:
+                paragraphs[-1].append("\n")
+        elif tag == _W_NO_BREAK_HYPHEN:
+            if paragraphs:
+                paragraphs[-1].append("-")
+        elif tag == _W_P:
+            text = "".join(paragraphs.pop())
+            if cells:
+                if text:
+                    cells[-1].append(text)
+            else:
+                yield text
+            elem.clear()
+        elif tag == _W_TC:
+            rows[-1].append("\n".join(cells.pop()))
+        elif tag == _W_TR:
+            row_text = "\t".join(cell for cell in rows.pop() if cell)
+            if cells:  # nested table: the row belongs to the outer cell
+                if row_text:
+                    cells[-1].append(row_text)
+            elif row_text:
+                yield row_text
+        elif tag == _W_TBL:
+            elem.clear()
+
+
+def _as_stream(raw_bytes):
+    # An mmap is already a seekable file-like object; wrapping bytes in
+    # BytesIO shares them rather than copying
+    return raw_bytes if isinstance(raw_bytes, mmap.mmap) else io.BytesIO(raw_bytes)
 
 
 def _extract_text_from_docx_bytes(raw_bytes: bytes) -> str:
-    doc = docx.Document(io.BytesIO(raw_bytes))
-    return "\n".join(para.text for para in doc.paragraphs)
+    """
+    Stream the text out of word/document.xml (plus header and footer parts)
+    without building the python-docx object model. Unlike doc.paragraphs this
+    also picks up tables, text boxes, headers and footers.
+    """
+    with zipfile.ZipFile(_as_stream(raw_bytes)) as zf:
+        names = zf.namelist()
+        headers = sorted(n for n in names if _DOCX_HEADER_RE.match(n))
+        footers = sorted(n for n in names if _DOCX_FOOTER_RE.match(n))
+
+        lines = []
+        seen_parts = set()
+        for name in headers + ["word/document.xml"] + footers:
+            if name not in names:
+                continue
+            with zf.open(name) as part:
+                part_lines = list(_iter_docx_part_text(part))
+            # first-page/even-page headers often repeat the default one
+            key = tuple(part_lines)
+            if name != "word/document.xml" and (key in seen_parts or not any(part_lines)):
+                continue
+            seen_parts.add(key)
+            lines.extend(part_lines)
+    return "\n".join(lines)
+
+
+# PDFs with at least this many pages are extracted in parallel
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "8"))
+# Size of the process pool shared by all requests (0 or 1 = no page fan-out;
+# 0 also keeps large uploads in the request's own process, see below)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+_in_extract_worker = False
+
+SUPPORTED_EXTENSIONS = (".docx", ".pdf")
+
 
+def _mark_extract_worker():
+    # Pool workers extract serially; they must never try to fan out again
+    global _in_extract_worker
+    _in_extract_worker = True
 
-def _extract_text_from_pdf_bytes(raw_bytes: bytes) -> str:
-    reader = pypdf.PdfReader(io.BytesIO(raw_bytes))
-    texts = []
-    for page in reader.pages:
+
+def _worker_ready():
+    pass
+
+
+def get_extract_pool():
+    """
+    Lazily create the process pool shared by PDF page fan-out and bulk
+    extraction. Workers come from a fork server rather than a fork of this
+    process: by the time one is needed the server has request, LLM and
+    heartbeat threads running, and forking a threaded process can leave
+    the child holding locks no thread will ever release.
+    """
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                # imported once in the fork server instead of in every worker
+                context.set_forkserver_preload(["file_parser", "pypdf"])
+            else:
+                context = multiprocessing.get_context("spawn")
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=max(1, PDF_EXTRACT_WORKERS),
+                mp_context=context,
+                initializer=_mark_extract_worker,
+            )
+        return _extract_pool
+
+
+def start_extract_pool():
+    """Start every extraction worker now, so the first large PDF doesn't wait for them."""
+    if PDF_EXTRACT_WORKERS <= 0:
+        return 0
+    pool = get_extract_pool()
+    # workers only start when there's work and no idle one, so submit one trivial job per worker
+    for future in [pool.submit(_worker_ready) for _ in range(max(1, PDF_EXTRACT_WORKERS))]:
+        future.result()
+    return len(getattr(pool, "_processes", None) or {})
+
+
+def reset_extract_pool():
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is not None:
+            _extract_pool.shutdown(wait=False, cancel_futures=True)
+        _extract_pool = None
+
+
+def _extract_pdf_page_range(source, start: int, stop: int) -> list:
+    """Runs in a pool worker: extract pages [start, stop) of the PDF (a path to map, or bytes)."""
+    import pypdf  # deferred: heavy, and only needed once a PDF arrives
+
+    with contextlib.ExitStack() as stack:
+        if isinstance(source, str):
+            f = stack.enter_context(open(source, "rb"))
+            source = stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        reader = pypdf.PdfReader(_as_stream(source))
         # some pages may return None
-        txt = page.extract_text()
-        if txt:
-            texts.append(txt)
-    return "\n".join(texts)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+@contextlib.contextmanager
+def _temp_copy(raw_bytes):
+    """Path of a temp file holding raw_bytes, removed on exit."""
+    fd, path = tempfile.mkstemp(prefix=UPLOAD_TEMP_PREFIX, suffix=".pdf", dir=UPLOAD_SPOOL_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw_bytes)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+def _extract_pdf_pages_parallel(raw_bytes, page_count: int, path: str = None) -> list:
+    chunks = min(PDF_EXTRACT_WORKERS, page_count)
+    step = -(-page_count // chunks)  # ceil
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    with contextlib.ExitStack() as stack:
+        # workers map a file on disk themselves rather than each being sent a
+        # pickled copy; an upload held in memory is written out once for them
+        if path is None:
+            path = stack.enter_context(_temp_copy(raw_bytes))
+        pool = get_extract_pool()
+        futures = [pool.submit(_extract_pdf_page_range, path, start, stop) for start, stop in ranges]
+        pages = []
+        for future in futures:  # in submission order, so pages stay in order
+            pages.extend(future.result())
+    return pages
+
+
+def _extract_text_from_pdf_bytes(raw_bytes: bytes, path: str = None) -> str:
+    import pypdf  # deferred: heavy, and only needed once a PDF arrives
 
+    reader = pypdf.PdfReader(_as_stream(raw_bytes))
+    page_count = len(reader.pages)
 
-def parse_resume_file(source) -> dict:
+    # pypdf reads every stream a page references into memory, scanned images
+    # included, so a large upload on disk goes to the pool even when short:
+    # the spike then lands in a worker rather than the server process
+    offload = path is not None and isinstance(raw_bytes, mmap.mmap) and PDF_EXTRACT_WORKERS > 0
+    fan_out = PDF_EXTRACT_WORKERS > 1 and page_count >= PDF_PARALLEL_PAGE_THRESHOLD
+
+    pages = None
+    if (fan_out or offload) and not _in_extract_worker:
+        try:
+            pages = _extract_pdf_pages_parallel(raw_bytes, page_count, path)
+        except BrokenProcessPool as e:
+            print(f"⚠️ PDF extraction pool broke ({e}); falling back to serial extraction")
+            reset_extract_pool()
+
+    if pages is None:
+        # some pages may return None
+        pages = [page.extract_text() or "" for page in reader.pages]
+
+    # form feed between pages lets prompt compaction spot running headers/footers
+    return PAGE_BREAK.join(txt for txt in pages if txt)
+
+
+def is_supported_filename(filename: str) -> bool:
+    return (filename or "").lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def extract_text(filename: str, raw_bytes: bytes, path: str = None) -> str:
+    """
+    Extract plain text from a PDF or DOCX upload, chosen by file extension.
+    raw_bytes may be an mmap (see open_upload); path, if the file is on
+    disk, lets PDF page workers open it themselves.
+    """
+    with stage("extract"):
+        if (filename or "").lower().endswith(".docx"):
+            return _extract_text_from_docx_bytes(raw_bytes)
+        return _extract_text_from_pdf_bytes(raw_bytes, path)
+
+
+@contextlib.contextmanager
+def open_upload(source):
+    """
+    (filename, data, path) for a filesystem path or an uploaded file.
+    data is bytes for an upload small enough to be held in memory
+    (UPLOAD_SPOOL_KB), otherwise a read-only memory map of the file, so a
+    large upload is never copied into the process; path is set when the
+    file can be opened by name.
+    """
+    with contextlib.ExitStack() as stack:
+        if isinstance(source, str):
+            # filesystem path
+            stream = stack.enter_context(open(source, "rb"))
+            filename, path = os.path.basename(source), source
+        else:
+            # FileStorage or file-like (uploads.UploadRequest spools large ones to a named temp file)
+            stream = getattr(source, "stream", source)
+            filename = getattr(source, "filename", None) or ""
+            path = getattr(stream, "name", None)
+            if not (isinstance(path, str) and os.path.isfile(path)):
+                path = None
+
+        with stage("upload_read"):
+            data = None
+            if stream.seek(0, os.SEEK_END) > UPLOAD_SPOOL_KB * 1024:
+                try:
+                    data = stack.enter_context(mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ))
+                except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+                    pass  # no file descriptor behind it (e.g. BytesIO)
+            if data is None:
+                stream.seek(0)
+                data = stream.read()
+        yield filename, data, path
+
+
+def lookup_cached_parse(raw_bytes: bytes, mode: str = None):
+    """Structured data for these exact upload bytes, if parsed before in this mode."""
+    cache = get_parse_cache()
+    if not cache:
+        return None
+    cached = cache.get(cache.bytes_key(raw_bytes, resolve_mode(mode)))
+    if cached is not None:
+        print("--- Parse cache hit (upload bytes). ---")
+    return cached
+
+
+def structure_text(raw_text: str, raw_bytes: bytes = None, mode: str = None) -> dict:
+    """
+    Structure extracted text with the AI (or the rules, see rule_extractor),
+    going through the parse cache. Results are stored under the text key
+    and, if given, the upload bytes key.
+    """
+    mode = resolve_mode(mode)
+    cache = get_parse_cache()
+    bytes_key = cache.bytes_key(raw_bytes, mode) if cache and raw_bytes is not None else None
+
+    # Same text seen before (e.g. re-exported file)?
+    text_key = cache.text_key(raw_text, mode) if cache else None
+    if cache:
+        cached = cache.get(text_key)
+        if cached is not None:
+            print("--- Parse cache hit (extracted text). ---")
+            if bytes_key:
+                cache.put(bytes_key, cached)
+            return cached
+
+    with stage("prompt_build"):
+        compacted = compact_for_prompt(raw_text)
+    if mode == "llm":
+        print("--- Successfully extracted text; sending to AI… ---")
+        structured, incomplete = collect_incomplete(structure_resume, compacted)
+        print("--- AI returned structured data. ---")
+    else:
+        structured, incomplete = collect_incomplete(structure_with_mode, compacted, mode)
+
+    # Never cache the empty fallback or a resume missing sections the AI
+    # failed on, so the next upload of the file tries again
+    if incomplete:
+        print(f"⚠️ Not caching the parse: sections not recovered ({', '.join(incomplete)})")
+    elif cache and structured != empty_resume_structure():
+        cache.put(text_key, structured)
+        if bytes_key:
+            cache.put(bytes_key, structured)
+    return structured
+
+
+def parse_resume_file(source, mode: str = None) -> dict:
     """
     Parses an uploaded resume (PDF or DOCX) into structured JSON via AI.
 
     Args:
       source: either a Flask FileStorage, any file-like with .read(),
               or a filesystem path string.
+      mode:   "llm", "hybrid" or "rules" (see rule_extractor); default PARSE_MODE.
 
     Returns:
       {"parsedData": {...}} on success
       {"error": "..."} on failure
     """
     try:
-        # --- 1) Load raw bytes exactly once ---
-        if isinstance(source, str):
-            # filesystem path
-            raw_bytes = open(source, "rb").read()
-            filename = os.path.basename(source)
-        else:
-            # FileStorage or file-like
-            raw_bytes = source.read()
-            filename = getattr(source, "filename", None) or ""
+        # --- 1) Open the upload once: bytes if small, else a memory map ---
+        with open_upload(source) as (filename, raw_bytes, path):
+            if not is_supported_filename(filename):
+                return {"error": "Unsupported file type. Please upload a .docx or .pdf file."}
 
-        # --- 2) Extract text based on extension ---
-        lower = filename.lower()
-        if lower.endswith(".docx"):
-            raw_text = _extract_text_from_docx_bytes(raw_bytes)
-        elif lower.endswith(".pdf"):
-            raw_text = _extract_text_from_pdf_bytes(raw_bytes)
-        else:
-            return {"error": "Unsupported file type. Please upload a .docx or .pdf file."}
+            # --- 2) Same bytes seen before? Skip extraction and AI entirely ---
+            cached = lookup_cached_parse(raw_bytes, mode)
+            if cached is not None:
+                return {"parsedData": cached}
 
-        if not raw_text.strip():
-            return {"error": "Could not extract any text from the document."}
+            # --- 3) Extract text based on extension ---
+            raw_text = extract_text(filename, raw_bytes, path)
+            if not raw_text.strip():
+                return {"error": "Could not extract any text from the document."}
 
-        # --- 3) Send to AI for structuring ---
-        print("--- Successfully extracted text; sending to AI… ---")
-        structured = structure_text_with_ai(raw_text)
-        print("--- AI returned structured data. ---")
+            # --- 4) Send to AI for structuring ---
+            structured = structure_text(raw_text, raw_bytes, mode)
 
         return {"parsedData": structured}
 
@@ -1,35 +1,24 @@
-import os
 import json
-import google.generativeai as genai
 from dotenv import load_dotenv
 
+import json_repair
+from llm_clients import LLM_STRUCTURED_OUTPUT, get_gemini_model
+from metrics import LLM_FALLBACKS, timed
+from text_compaction import compact_schema
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure the Gemini API with your key
-try:
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not found in .env file.")
-    genai.configure(api_key=api_key)
-except Exception as e:
-    print(f"Error configuring Gemini API: {e}")
+# The Gemini SDK takes ~0.5s to import, so it is loaded and configured with
+# GEMINI_API_KEY on the first call (llm_clients.get_gemini_model), not here.
 
-def structure_text_with_ai(raw_resume_text: str) -> dict:
-    """
-    Uses the Gemini model to parse raw resume text into a structured JSON object.
+# Model used for every Gemini call in this module
+MODEL_NAME = 'gemini-2.0-flash'
 
-    Args:
-        raw_resume_text: A string containing the full text from the resume.
-
-    Returns:
-        A dictionary with the structured resume data.
-    """
-    
-    # Define the JSON schema the AI must follow, now correctly specifying projects and certifications
-    # Removed hardcoded IDs like "exp1", "cert1" to avoid "duplicate key" warnings.
-    # The AI should now generate unique IDs or the frontend will assign crypto.randomUUID().
-    json_schema = """
+# Define the JSON schema the AI must follow, now correctly specifying projects and certifications
+# Removed hardcoded IDs like "exp1", "cert1" to avoid "duplicate key" warnings.
+# The AI should now generate unique IDs or the frontend will assign crypto.randomUUID().
+RESUME_JSON_SCHEMA = """
     {
       "personal": {"name": "", "email": "", "phone": "", "location": "", "legalStatus": ""},
       "summary": "",
@@ -54,8 +43,11 @@ def structure_text_with_ai(raw_resume_text: str) -> dict:
     }
     """
 
-    # Create the prompt for the AI model
-    prompt = f"""
+# Same schema minified for the prompt; indentation is only tokens to the model
+COMPACT_RESUME_JSON_SCHEMA = compact_schema(RESUME_JSON_SCHEMA)
+
+# Prompt used to structure raw resume text; filled in with str.format
+STRUCTURE_PROMPT = """
     You are an expert resume parsing assistant. Analyze the following raw text extracted from a resume and convert it into a structured JSON object. 
     The JSON object must follow this exact schema. 
     Do not add any fields that are not in the schema. Do not enclose the JSON in markdown backticks.
@@ -73,32 +65,126 @@ def structure_text_with_ai(raw_resume_text: str) -> dict:
     ```
     """
 
-    try:
-        # Changed model to gemini-2.0-flash for consistency and better performance
-        model = genai.GenerativeModel('gemini-2.0-flash') 
+# Smaller prompt for one section of a long resume (see llm_providers.structure_resume_sectioned)
+SECTION_PROMPT = """
+    You are an expert resume parsing assistant. The following text is the {section_label} part of a resume.
+    Convert it into a JSON object that follows this exact schema. Do not add any fields that are not in the schema.
+    Do not enclose the JSON in markdown backticks. For 'description' and 'achievements' fields, maintain the
+    original line breaks. Use empty strings or lists for anything not present.
+
+    **JSON Schema to follow:**
+    {json_schema}
+
+    **Resume Text to Parse:**
+    ```
+    {section_text}
+    ```
+    """
+
+# Schema keys each section is structured into; "header" is everything before the first section heading
+SECTION_SCHEMA_KEYS = {
+    "header": ("personal", "summary"),
+    "experience": ("experience",),
+    "education": ("education",),
+    "skills": ("skills",),
+    "projects": ("projects",),
+    "publications": ("publications",),
+    "certifications": ("certifications",),
+}
+
+def response_schema(example) -> dict:
+    """
+    JSON schema (the OpenAPI subset Gemini and Ollama accept for structured
+    output) for an example-valued schema like RESUME_JSON_SCHEMA.
+    """
+    if isinstance(example, dict):
+        return {"type": "object", "properties": {key: response_schema(value) for key, value in example.items()},
+                "required": list(example)}
+    if isinstance(example, list):
+        return {"type": "array", "items": response_schema(example[0] if example else "")}
+    return {"type": "string"}
+
+_RESUME_SCHEMA_EXAMPLE = json.loads(RESUME_JSON_SCHEMA)
+RESUME_RESPONSE_SCHEMA = response_schema(_RESUME_SCHEMA_EXAMPLE)
+
+def section_response_schema(section: str) -> dict:
+    """Response schema holding just the keys one section is structured into."""
+    properties = RESUME_RESPONSE_SCHEMA["properties"]
+    keys = SECTION_SCHEMA_KEYS[section]
+    return {"type": "object", "properties": {key: properties[key] for key in keys}, "required": list(keys)}
+
+def empty_resume_structure() -> dict:
+    """
+    The default empty structure returned when the AI call fails. Its keys and
+    types come from RESUME_JSON_SCHEMA, like every provider's prompt and
+    response schema and llm_providers' validation.
+    """
+    return {key: type(value)() for key, value in _RESUME_SCHEMA_EXAMPLE.items()}
+
+@timed("llm")
+def _generate(prompt: str, schema: dict = None) -> str:
+    """
+    Send one prompt to Gemini and return the response text. With a schema
+    (and LLM_STRUCTURED_OUTPUT on) the response is JSON constrained to it.
+    Raises on failure.
+    """
+    # Shared model object, created once per process
+    model = get_gemini_model(MODEL_NAME)
+    if schema is not None and LLM_STRUCTURED_OUTPUT:
+        response = model.generate_content(prompt, generation_config={
+            "response_mime_type": "application/json", "response_schema": schema})
+    else:
         response = model.generate_content(prompt)
-        cleaned_json_string = response.text.strip().replace('```json', '').replace('```', '').strip()
-        structured_data = json.loads(cleaned_json_string)
-        
-        return structured_data
+    return response.text
+
+@timed("prompt_build")
+def build_structure_prompt(raw_resume_text: str) -> str:
+    return STRUCTURE_PROMPT.format(json_schema=COMPACT_RESUME_JSON_SCHEMA, raw_resume_text=raw_resume_text)
+
+@timed("prompt_build")
+def build_section_prompt(section: str, section_text: str) -> str:
+    schema = json.loads(RESUME_JSON_SCHEMA)
+    section_schema = {key: schema[key] for key in SECTION_SCHEMA_KEYS[section]}
+    label = "name, contact details and summary" if section == "header" else section
+    return SECTION_PROMPT.format(section_label=label, json_schema=compact_schema(section_schema),
+                                 section_text=section_text)
+
+@timed("json_decode")
+def parse_structured_response(response_text: str) -> dict:
+    # fences, stray prose, trailing commas and truncation are repaired locally
+    return json_repair.loads(response_text)
+
+def structure_text_raising(raw_resume_text: str) -> dict:
+    """Like structure_text_with_ai, but lets API and JSON errors propagate."""
+    return parse_structured_response(_generate(build_structure_prompt(raw_resume_text), RESUME_RESPONSE_SCHEMA))
+
+def structure_section_raising(section: str, section_text: str) -> dict:
+    """Structure one section of a resume; returns a dict with that section's schema keys."""
+    return parse_structured_response(_generate(build_section_prompt(section, section_text),
+                                               section_response_schema(section)))
+
+def structure_text_with_ai(raw_resume_text: str) -> dict:
+    """
+    Uses the Gemini model to parse raw resume text into a structured JSON object.
 
+    Args:
+        raw_resume_text: A string containing the full text from the resume.
+
+    Returns:
+        A dictionary with the structured resume data.
+    """
+    try:
+        return structure_text_raising(raw_resume_text)
     except Exception as e:
         print(f"An error occurred while calling the Gemini API or parsing its response: {e}")
+        LLM_FALLBACKS.inc("empty_structure")
         # Return a default empty structure on error to prevent frontend crashes
-        return {
-            "personal": {},
-            "summary": "",
-            "experience": [],
-            "education": [],
-            "skills": [],
-            "projects": [],
-            "publications": [],
-            "certifications": []
-        }
+        return empty_resume_structure()
 
 # --- NEW: Elevator Pitch Function for Gemini ---
-def generate_elevator_pitch(resume_data: dict) -> str:
-    """Generates a concise elevator pitch from resume data using Gemini."""
+@timed("prompt_build")
+def build_pitch_prompt(resume_data: dict) -> str:
+    """Builds the elevator pitch prompt from the resume fields that matter for it."""
     
     # Extract relevant info from resume_data
     personal = resume_data.get('personal', {})
@@ -146,7 +232,7 @@ def generate_elevator_pitch(resume_data: dict) -> str:
 
     full_context = "\n\n".join(context_parts)
     
-    prompt = f"""
+    return f"""
     Based on the following resume data, generate a compelling and concise 30-second elevator pitch.
     The pitch should be professional, engaging, and highlight the candidate's key strengths, experiences, and career goals.
     Focus on what makes the candidate unique and valuable.
@@ -159,29 +245,40 @@ def generate_elevator_pitch(resume_data: dict) -> str:
 
     Elevator Pitch:
     """
-    
+
+def generate_elevator_pitch_raising(resume_data: dict) -> str:
+    return _generate(build_pitch_prompt(resume_data)).strip()
+
+def generate_elevator_pitch(resume_data: dict) -> str:
+    """Generates a concise elevator pitch from resume data using Gemini."""
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash') # Ensure you have this model downloaded for Gemini
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        return generate_elevator_pitch_raising(resume_data)
     except Exception as e:
         print(f"Error calling Gemini for elevator pitch: {e}")
         return "Could not generate elevator pitch at this time."
 
-def enhance_section_with_ai(section_name, text_to_enhance):
+def stream_elevator_pitch(resume_data: dict):
     """
-    Enhances a given text section using a generative AI model.
-
-    Args:
-        section_name (str): The name of the section (e.g., "Summary", "Experience Description").
-        text_to_enhance (str): The original text content to be enhanced.
-
-    Returns:
-        list: A list of enhanced versions of the text.
+    Yields the elevator pitch text as Gemini generates it. Closing the
+    generator early (client went away) cancels the upstream stream.
     """
+    model = get_gemini_model(MODEL_NAME)
+    response = model.generate_content(build_pitch_prompt(resume_data), stream=True)
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        prompt = f"""
+        for chunk in response:
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+    finally:
+        # The SDK keeps the gRPC/REST stream on a private iterator; cancel it
+        # if it's still open so Gemini stops generating for nobody
+        cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+        if callable(cancel):
+            cancel()
+
+@timed("prompt_build")
+def build_enhance_prompt(section_name, text_to_enhance) -> str:
+    return f"""
         Rewrite the following {section_name} to be more impactful, professional, and concise.
         Provide 3 different versions. Ensure the output is clean text, without any markdown formatting like bullet points or bolding, unless it's inherent to the content (e.g., a list of skills).
         Return each version on a new line.
@@ -191,9 +288,25 @@ def enhance_section_with_ai(section_name, text_to_enhance):
 
         Enhanced Versions:
         """
-        response = model.generate_content(prompt)
-        # Split the response into lines, assuming each line is a new version
-        return [version.strip() for version in response.text.split('\n') if version.strip()]
+
+def enhance_section_raising(section_name, text_to_enhance) -> list:
+    response_text = _generate(build_enhance_prompt(section_name, text_to_enhance))
+    # Split the response into lines, assuming each line is a new version
+    return [version.strip() for version in response_text.split('\n') if version.strip()]
+
+def enhance_section_with_ai(section_name, text_to_enhance):
+    """
+    Enhances a given text section using a generative AI model.
+
+    Args:
+        section_name (str): The name of the section (e.g., "Summary", "Experience Description").
+        text_to_enhance (str): The original text content to be enhanced.
+
+    Returns:
+        list: A list of enhanced versions of the text.
+    """
+    try:
+        return enhance_section_raising(section_name, text_to_enhance)
     except Exception as e:
         print(f"Error enhancing section with AI: {e}")
         return [text_to_enhance] # Return original on error
@@ -0,0 +1,61 @@
+# backend/gunicorn.conf.py
+"""
+gunicorn settings for production: gunicorn -c gunicorn.conf.py wsgi:app
+
+Pre-fork multi-worker server with a thread pool per worker (gthread). Every
+value can be overridden from the environment:
+  PORT                       listen port (default 5000)
+  WEB_CONCURRENCY            worker processes (default: CPU count)
+  GUNICORN_THREADS           request threads per worker (default 8)
+  GUNICORN_TIMEOUT           seconds a silent worker may hang before being killed (default 120)
+  GUNICORN_GRACEFUL_TIMEOUT  seconds workers get to finish requests on shutdown/restart (default 30)
+  GUNICORN_PRELOAD           "0" to import the app in each worker instead of the master
+  GUNICORN_MAX_REQUESTS      recycle a worker after this many requests (default 0 = never)
+
+A parse job runs in the worker that accepted it, but its status is written
+to JOB_STATE_DIR (see jobs.py), so GET /api/jobs/<id> and its /events work
+whichever worker they reach. Every worker must see the same directory,
+which the default under the system temp directory does on one host.
+
+Each worker runs its own PDF render and extraction pools, so
+PDF_RENDER_WORKERS defaults to 1 and PDF_EXTRACT_WORKERS to 2 here
+(total processes = workers x pool size).
+"""
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# LLM calls and PDF renders can legitimately take a while
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+
+accesslog = "-"
+errorlog = "-"
+
+# Read by the app's modules at import, which with preload happens after this file runs
+os.environ.setdefault("DEFER_BACKGROUND_SERVICES", "1")
+os.environ.setdefault("PDF_RENDER_WORKERS", "1")
+os.environ.setdefault("PDF_EXTRACT_WORKERS", "2")
+
+
+def post_fork(server, worker):
+    # Pools and threads started in the master would not survive the fork
+    from app import start_background_services
+
+    start_background_services()
+
+
+def worker_exit(server, worker):
+    from app import stop_background_services
+
+    stop_background_services()
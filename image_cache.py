@@ -0,0 +1,193 @@
+# backend/image_cache.py
+"""
+Downscaled copies of the images embedded in generated documents.
+
+Profile photos and letterheads arrive as full-resolution base64 but are
+displayed at 120x120 and 200x60 CSS px, so WeasyPrint would decode
+megapixel images on every render and embed them whole in the PDF. Each
+distinct image is decoded once instead, reduced to twice its display size
+(enough for print), re-encoded (JPEG, or PNG when it has transparency) and
+cached by a hash of its content and target size. The DOCX logo is read
+from disk and reduced the same way once per process.
+
+An image that can't be decoded is passed through untouched.
+"""
+import base64
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+IMAGE_CACHE_ENABLED = os.getenv("IMAGE_CACHE_ENABLED", "1") != "0"
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "32"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+
+# Target pixel boxes: 2x the size the template displays them at
+PROFILE_IMAGE_BOX = (240, 240)     # 120x120 px, object-fit: cover
+LETTERHEAD_IMAGE_BOX = (400, 120)  # .logo img: height 60px, max-width 200px
+DOCX_LOGO_BOX = (450, 450)         # 1.5in wide at 300 dpi
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "PamTen_Logo.png")
+
+
+def _encode(image):
+    """(bytes, format) for a decoded image: PNG if it has transparency, else JPEG."""
+    out = io.BytesIO()
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image.save(out, format="PNG", optimize=True)
+        return out.getvalue(), "png"
+    image.convert("RGB").save(out, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+    return out.getvalue(), "jpeg"
+
+
+def downscale(raw: bytes, box, crop=False):
+    """
+    (bytes, format) for raw reduced to fit box, or to fill it and be
+    centre-cropped with crop (what object-fit: cover would show).
+    Images already within box are only re-encoded, and kept as they are
+    if that doesn't make them smaller.
+    """
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(raw))
+    source_format = (image.format or "").lower()
+    # JPEG can decode straight to a fraction of its size, far cheaper than a full decode
+    image.draft("RGB", (box[0] * 2, box[1] * 2))
+    image = ImageOps.exif_transpose(image)
+    if image.width <= box[0] and image.height <= box[1]:
+        body, fmt = _encode(image)
+        if len(body) >= len(raw) and source_format in ("png", "jpeg", "gif", "webp"):
+            return raw, source_format
+        return body, fmt
+    if crop:
+        image = ImageOps.fit(image, box, Image.LANCZOS)
+    else:
+        image.thumbnail(box, Image.LANCZOS)
+    return _encode(image)
+
+
+class ImageCache:
+    """Byte-bounded LRU of downscaled images keyed by content hash and target box."""
+
+    def __init__(self, max_bytes=IMAGE_CACHE_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (bytes, format)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "errors": 0, "evictions": 0,
+                          "source_bytes": 0, "output_bytes": 0}
+
+    def get(self, source: bytes, box, crop=False, decode=None):
+        """
+        (bytes, format) for the image in source reduced to box; None if it
+        can't be decoded. decode turns source into raw image bytes, so a hit
+        on base64 input costs one hash and no decoding.
+        """
+        h = hashlib.sha256(source)
+        h.update(f"|{box[0]}x{box[1]}|{int(crop)}|{IMAGE_JPEG_QUALITY}".encode())
+        key = h.hexdigest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry
+
+        try:
+            raw = decode(source) if decode else source
+            entry = downscale(raw, box, crop)
+        except Exception as e:
+            print(f"⚠️ Could not process embedded image ({len(source)} bytes): {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+            return None
+
+        with self._lock:
+            self._counters["misses"] += 1
+            self._counters["source_bytes"] += len(raw)
+            self._counters["output_bytes"] += len(entry[0])
+            if len(entry[0]) <= self.max_bytes and key not in self._entries:
+                self._entries[key] = entry
+                self._bytes += len(entry[0])
+                while self._bytes > self.max_bytes:
+                    _, (old, _) = self._entries.popitem(last=False)
+                    self._bytes -= len(old)
+                    self._counters["evictions"] += 1
+        return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    **self._counters}
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """Process-wide image cache, or None if disabled."""
+    global _image_cache
+    if not IMAGE_CACHE_ENABLED:
+        return None
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = ImageCache()
+        return _image_cache
+
+
+def _normalize_b64(b64, box, crop):
+    cache = get_image_cache()
+    if cache is None or not isinstance(b64, str) or not b64:
+        return None
+    entry = cache.get(b64.encode("ascii", "ignore"), box, crop,
+                      decode=lambda source: base64.b64decode(source.split(b",", 1)[-1]))
+    if entry is None:
+        return None
+    body, fmt = entry
+    return base64.b64encode(body).decode("ascii"), fmt
+
+
+def prepare_document_images(data):
+    """
+    Copy of resume data with the profile and letterhead images replaced by
+    their downscaled versions (the caller's dict is left as it is).
+    """
+    if not isinstance(data, dict):
+        return data
+    data = dict(data)
+    personal = data.get("personal")
+    if isinstance(personal, dict) and personal.get("profile_image_b64"):
+        normalized = _normalize_b64(personal["profile_image_b64"], PROFILE_IMAGE_BOX, crop=True)
+        if normalized:
+            data["personal"] = {**personal, "profile_image_b64": normalized[0], "profile_image_format": normalized[1]}
+    style = data.get("styleOptions")
+    if isinstance(style, dict) and style.get("letterhead_image_b64"):
+        normalized = _normalize_b64(style["letterhead_image_b64"], LETTERHEAD_IMAGE_BOX, crop=False)
+        if normalized:
+            data["styleOptions"] = {**style, "letterhead_image_b64": normalized[0], "letterhead_image_format": normalized[1]}
+    return data
+
+
+_docx_logo = None
+_docx_logo_lock = threading.Lock()
+
+
+def docx_logo():
+    """The logo for DOCX output as bytes (read and reduced once), or None if it's missing."""
+    global _docx_logo
+    if _docx_logo is None:
+        with _docx_logo_lock:
+            if _docx_logo is None:
+                try:
+                    with open(LOGO_PATH, "rb") as f:
+                        raw = f.read()
+                except OSError:
+                    return None
+                try:
+                    _docx_logo = downscale(raw, DOCX_LOGO_BOX)[0]
+                except Exception as e:
+                    print(f"⚠️ Could not process {LOGO_PATH}: {e}")
+                    _docx_logo = raw
+    return _docx_logo
@@ -0,0 +1,313 @@
+# backend/jobs.py
+"""
+Job queue for resume parsing.
+
+POST /api/jobs enqueues an upload and returns straight away; a bounded pool
+of worker threads runs parse_resume_file and clients poll /api/jobs/<id> or
+follow /api/jobs/<id>/events (server-sent events). No external broker: a
+job runs in the process that accepted it, and every status change is also
+written to JOB_STATE_DIR, so with several gunicorn workers any of them can
+answer for any job (from the file, polled every JOB_POLL_SECONDS for the
+event stream). Finished jobs are forgotten after a TTL. A queued job holds a
+small upload's bytes, or the path of a large upload's temp file
+(uploads.detach_upload), which is deleted once the job has run.
+
+Configuration (env):
+  JOB_WORKERS             parse threads per process (default 4)
+  JOB_QUEUE_DEPTH         jobs waiting per process before 503 (default 64)
+  JOB_RESULT_TTL_SECONDS  how long finished jobs are kept (default 900)
+  JOB_STATE_DIR           directory shared by every worker (empty = this process only)
+  JOB_POLL_SECONDS        how often a job held by another worker is re-read (default 0.5)
+"""
+import io
+import json
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+
+from werkzeug.datastructures import FileStorage
+
+from file_parser import parse_resume_file
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", "64"))
+JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", "900"))
+JOB_STATE_DIR = os.getenv("JOB_STATE_DIR", os.path.join(tempfile.gettempdir(), "resume-jobs"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.5"))
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at JOB_QUEUE_DEPTH."""
+
+
+class Job:
+    def __init__(self, filename, upload, content_type, mode=None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.content_type = content_type
+        self.mode = mode
+        self.upload = upload  # bytes, or the path of a temp file the job owns
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.version = 0  # bumped on every status change, used by waiters
+
+    def to_dict(self) -> dict:
+        data = {
+            "jobId": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "createdAt": self.created,
+            "startedAt": self.started,
+            "finishedAt": self.finished,
+        }
+        if self.status == DONE:
+            data["result"] = self.result
+        elif self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+    def to_record(self) -> dict:
+        return {**self.to_dict(), "version": self.version}
+
+    @classmethod
+    def from_record(cls, record):
+        """Read-only copy of a job another process runs, from its to_record()."""
+        job = cls(record["filename"], None, None)
+        job.id = record["jobId"]
+        job.status = record["status"]
+        job.result = record.get("result")
+        job.error = record.get("error")
+        job.created = record["createdAt"]
+        job.started = record["startedAt"]
+        job.finished = record["finishedAt"]
+        job.version = record["version"]
+        return job
+
+
+class JobQueue:
+    """Bounded FIFO of parse jobs served by a fixed number of worker threads."""
+
+    def __init__(self, handler, workers=JOB_WORKERS, max_queue=JOB_QUEUE_DEPTH, ttl=JOB_RESULT_TTL_SECONDS,
+                 directory=JOB_STATE_DIR, poll=JOB_POLL_SECONDS):
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.directory = directory or None
+        self.poll = poll
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._changed = threading.Condition()
+        self._threads = []
+        self._swept = 0.0
+
+    def _ensure_workers(self):
+        # Started on first use rather than at import, so a pre-forking
+        # server doesn't create threads in the master that workers won't have
+        with self._changed:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f"parse-job-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, filename, upload, content_type=None, mode=None) -> Job:
+        """Queue upload (bytes, or a temp file path handed over to the job); raises QueueFull."""
+        self._ensure_workers()
+        self._evict_expired()
+        job = Job(filename, upload, content_type, mode)
+        with self._changed:
+            self._jobs[job.id] = job
+        # written before a worker thread can pick it up, so it never overwrites a newer status
+        self._write(job.to_record())
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._changed:
+                del self._jobs[job.id]
+            self._remove(job.id)
+            _discard(upload)
+            raise QueueFull(f"job queue is full ({self.max_queue} waiting)")
+        return job
+
+    def get(self, job_id):
+        """The job, whichever process runs it, or None."""
+        with self._changed:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        record = self._read(job_id)
+        if record is None:
+            return None
+        if record["finishedAt"] is not None and time.time() - record["finishedAt"] > self.ttl:
+            self._remove(job_id)
+            return None
+        return Job.from_record(record)
+
+    def wait(self, job, seen_version, timeout):
+        """
+        Block until the job changes past seen_version or timeout expires, and
+        return it: the same object for a job this process runs, else a fresh
+        copy from JOB_STATE_DIR.
+        """
+        with self._changed:
+            if self._jobs.get(job.id) is job:
+                self._changed.wait_for(lambda: job.version != seen_version, timeout=timeout)
+                return job
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self._read(job.id)
+            if record is not None and record["version"] != seen_version:
+                return Job.from_record(record)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            time.sleep(min(self.poll, remaining))
+
+    def stats(self) -> dict:
+        with self._changed:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {"workers": self.workers, "maxQueue": self.max_queue, "queueDepth": self._queue.qsize(), **counts}
+
+    def _set(self, job, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.version += 1
+            record = job.to_record()
+            self._changed.notify_all()
+        self._write(record)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            self._set(job, status=RUNNING, started=time.time())
+            upload, job.upload = job.upload, None
+            try:
+                result = self.handler(job.filename, upload, job.content_type, job.mode)
+                if isinstance(result, dict) and "error" in result:
+                    self._set(job, status=FAILED, error=result["error"], finished=time.time())
+                else:
+                    self._set(job, status=DONE, result=result, finished=time.time())
+            except Exception as e:
+                traceback.print_exc()
+                self._set(job, status=FAILED, error=str(e), finished=time.time())
+            finally:
+                _discard(upload)
+                self._queue.task_done()
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.ttl
+        with self._changed:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and job.finished < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        for job_id in expired:
+            self._remove(job_id)
+        self._sweep(cutoff)
+
+    # --- shared state (JOB_STATE_DIR) ---
+    def _path(self, job_id):
+        return os.path.join(self.directory, job_id + ".json")
+
+    def _read(self, job_id):
+        if not self.directory or not _JOB_ID_RE.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, record):
+        if not self.directory:
+            return
+        path = self._path(record["jobId"])
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp, path)  # atomic, so other workers never see half a file
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ job store: could not write {path}: {e}")
+
+    def _remove(self, job_id):
+        if not self.directory:
+            return
+        try:
+            os.remove(self._path(job_id))
+        except OSError:
+            pass
+
+    def _sweep(self, cutoff):
+        """
+        At most once a minute, delete job files nobody has touched for a TTL:
+        finished jobs of other workers, and jobs of workers that have died.
+        """
+        now = time.time()
+        if not self.directory or now - self._swept < 60:
+            return
+        self._swept = now
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        with self._changed:
+            local = {job_id + ".json" for job_id in self._jobs}
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if name not in local and os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            except OSError:
+                continue
+
+
+def _discard(upload):
+    """Delete a job's temp file (uploads held as bytes need nothing)."""
+    if isinstance(upload, str):
+        try:
+            os.remove(upload)
+        except OSError:
+            pass
+
+
+def _parse_upload(filename, upload, content_type, mode=None):
+    # a temp file is opened by name, so file_parser can memory-map it
+    stream = open(upload, "rb") if isinstance(upload, str) else io.BytesIO(upload)
+    with stream:
+        return parse_resume_file(FileStorage(
+            stream=stream,
+            filename=filename,
+            content_type=content_type or "application/octet-stream",
+        ), mode)
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(_parse_upload)
+        return _job_queue
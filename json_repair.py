@@ -0,0 +1,157 @@
+# backend/json_repair.py
+"""
+Tolerant decoding of the JSON the LLMs return.
+
+loads() tries json.loads first. If that fails, it repairs the usual
+damage locally instead of paying for another call:
+
+  fences         ```json ... ``` wrappers
+  prose          text before the first "{" / "[" or after the value closes
+  trailing_comma "," right before "}" or "]"
+  truncated      output cut off mid-value (token limit, dropped stream):
+                 an open string is closed, a half-written member dropped
+                 and the open arrays/objects are closed
+
+A truncated object's repaired value carries TRUNCATED_KEY naming the
+top-level key that was being written when the output stopped, so callers
+can treat that section as incomplete (llm_providers re-requests it).
+
+Configuration (env):
+  LLM_JSON_REPAIR  "0" for strict json.loads (after stripping fences)
+"""
+import json
+import os
+import re
+
+from metrics import LLM_JSON_REPAIRS
+
+LLM_JSON_REPAIR = os.getenv("LLM_JSON_REPAIR", "1") != "0"
+
+# Set on a repaired top-level object whose output was cut off
+TRUNCATED_KEY = "_truncated"
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def strip_fences(text: str) -> str:
+    return _FENCE_RE.sub("", text).strip()
+
+
+def _scan(text, start):
+    """
+    Copy the JSON value starting at text[start], dropping trailing commas.
+    Returns (chars, end, fixes, open_containers, in_string, top_key,
+    cut_points): end is where the value stopped in text, top_key the
+    top-level key whose value was last begun (None once it's complete) and
+    cut_points the (length, open containers) at which the copy can be cut
+    and closed without leaving a half-written member.
+    """
+    out, stack, fixes, cut_points = [], [], set(), []
+    in_string = escaped = False
+    string_start = top_key = last_top_string = None
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                if len(stack) == 1 and stack[0] == "{":
+                    last_top_string = "".join(out[string_start:])
+            continue
+        if ch == '"':
+            in_string = True
+            string_start = len(out)
+            out.append(ch)
+        elif ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+            cut_points.append((len(out), tuple(stack)))
+        elif ch in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                fixes.add("trailing_comma")
+            if not stack or _CLOSERS[stack[-1]] != ch:
+                break  # unbalanced; let json.loads report it
+            stack.pop()
+            out.append(ch)
+            if not stack:
+                return out, i + 1, fixes, stack, False, top_key, cut_points
+        elif ch == ",":
+            cut_points.append((len(out), tuple(stack)))
+            if len(stack) == 1:
+                top_key = None
+            out.append(ch)
+        elif ch == ":":
+            if len(stack) == 1 and stack[0] == "{" and last_top_string:
+                try:
+                    top_key = json.loads(last_top_string)
+                except ValueError:
+                    top_key = None
+            out.append(ch)
+        else:
+            out.append(ch)
+    return out, len(text), fixes, stack, in_string, top_key, cut_points
+
+
+def _close(chars, stack) -> str:
+    return "".join(chars) + "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def repair(text: str):
+    """(value, fixes): text decoded after repairs, fixes naming each one applied. Raises ValueError."""
+    fixes = []
+    stripped = text.strip()
+    if "```" in stripped:
+        stripped = strip_fences(stripped)
+        fixes.append("fences")
+    start = min((i for i in (stripped.find("{"), stripped.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        raise ValueError("no JSON object or array in the response")
+
+    chars, end, found, stack, in_string, top_key, cut_points = _scan(stripped, start)
+    fixes.extend(sorted(found))
+    if start > 0 or stripped[end:].strip():
+        fixes.append("prose")
+    if not stack:
+        return json.loads("".join(chars)), fixes
+
+    fixes.append("truncated")
+    candidates = []
+    if in_string:
+        body = "".join(chars)
+        candidates.append(_close(list(body[:-1] if body.endswith("\\") else body) + ['"'], stack))
+    candidates.append(_close(chars, stack))
+    # back off to the last complete member, then to earlier ones
+    for length, open_containers in reversed(cut_points[-8:]):
+        candidates.append(_close(chars[:length], open_containers))
+    for candidate in candidates:
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(value, dict) and top_key is not None:
+            value[TRUNCATED_KEY] = top_key
+        return value, fixes
+    raise ValueError("truncated JSON could not be closed")
+
+
+def loads(text: str):
+    """Decode an LLM's JSON response, repairing it locally if needed (see module docstring)."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        if not LLM_JSON_REPAIR:
+            return json.loads(strip_fences(text))
+    value, fixes = repair(text)
+    for fix in fixes:
+        LLM_JSON_REPAIRS.inc(fix)
+    if fixes:
+        print(f"🩹 Repaired LLM JSON locally ({', '.join(fixes)})")
+    return value
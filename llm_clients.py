@@ -0,0 +1,99 @@
+# backend/llm_clients.py
+"""
+Process-wide registry of LLM clients.
+
+Model/client objects are created once and reused by every request thread,
+and HTTP calls (Ollama) go through a shared keep-alive connection pool so
+each AI call doesn't pay for object construction and a fresh TCP handshake.
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Number of distinct hosts to keep pools for, and connections kept per host
+LLM_HTTP_POOL_CONNECTIONS = int(os.getenv("LLM_HTTP_POOL_CONNECTIONS", "4"))
+LLM_HTTP_POOL_MAXSIZE = int(os.getenv("LLM_HTTP_POOL_MAXSIZE", "16"))
+# Ask providers that support it to constrain their output to the response JSON schema
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "1") != "0"
+
+_lock = threading.Lock()
+_gemini_models = {}
+_gemini_configured = False
+_azure_client = None
+_azure_client_loaded = False
+_http_adapter = None
+_local = threading.local()
+
+
+def _configure_gemini(genai):
+    # caller holds _lock
+    global _gemini_configured
+    if _gemini_configured:
+        return
+    _gemini_configured = True
+    try:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in .env file.")
+        genai.configure(api_key=api_key)
+    except Exception as e:
+        print(f"Error configuring Gemini API: {e}")
+
+
+def get_gemini_model(model_name: str):
+    """Shared google.generativeai GenerativeModel for model_name; imports and configures the SDK on first use."""
+    model = _gemini_models.get(model_name)
+    if model is None:
+        import google.generativeai as genai
+
+        with _lock:
+            _configure_gemini(genai)
+            model = _gemini_models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                _gemini_models[model_name] = model
+    return model
+
+
+def _get_http_adapter():
+    global _http_adapter
+    with _lock:
+        if _http_adapter is None:
+            # urllib3's pool manager behind the adapter is thread-safe, so
+            # every thread's session can share these connections
+            _http_adapter = HTTPAdapter(
+                pool_connections=LLM_HTTP_POOL_CONNECTIONS,
+                pool_maxsize=LLM_HTTP_POOL_MAXSIZE,
+                pool_block=False,
+            )
+        return _http_adapter
+
+
+def get_http_session() -> requests.Session:
+    """
+    requests.Session for the calling thread. Sessions themselves aren't
+    guaranteed thread-safe, so each thread gets its own, but they all mount
+    the same pooled adapter and therefore share keep-alive connections.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = _get_http_adapter()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _local.session = session
+    return session
+
+
+def get_azure_client():
+    """Shared Azure AI ChatCompletionsClient, or None if Azure isn't configured."""
+    global _azure_client, _azure_client_loaded
+    with _lock:
+        if not _azure_client_loaded:
+            from azure_utils import get_azure_ai_client
+
+            _azure_client = get_azure_ai_client()
+            _azure_client_loaded = True
+        return _azure_client
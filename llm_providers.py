@@ -0,0 +1,626 @@
+# backend/llm_providers.py
+"""
+One interface over the Gemini, Ollama and Azure integrations.
+
+Every backend implements the same three operations (structure resume,
+elevator pitch, enhance section) and returns the same resume schema. The
+LLMRouter tries providers in the order given by LLM_PROVIDERS, falling over
+to the next one on errors. With LLM_HEDGE=1 it also hedges: if the primary
+hasn't answered within its recent p95 latency for that operation, the same
+request is sent to the secondary and whichever succeeds first wins.
+
+Structured resumes are requested as schema-constrained JSON where the
+provider supports it (see LLM_STRUCTURED_OUTPUT in llm_clients) and decoded
+with json_repair, which fixes truncation, trailing commas and stray prose
+locally. Sections that still fail validation (missing, wrongly typed or
+cut off) are then re-requested on their own instead of the whole resume.
+
+Configuration (env):
+  LLM_PROVIDERS          comma-separated order, e.g. "gemini,ollama" (default "gemini")
+  LLM_HEDGE              "1" to enable hedged requests
+  LLM_HEDGE_PERCENTILE   latency percentile used as the hedge deadline (default 95)
+  LLM_HEDGE_DEFAULT_S    deadline until enough samples are collected (default 8)
+  LLM_HEDGE_MIN_S        lower bound on the deadline (default 0.5)
+  LLM_HEDGE_POOL_SIZE    hedged calls in flight, losers included (default 16); when
+                         all are busy, calls run unhedged on the request thread
+  LLM_SECTIONED          "auto" (default), "on" or "off": structure long resumes one section
+                         at a time, with the section calls running concurrently
+  LLM_SECTIONED_MIN_CHARS  text length from which "auto" goes sectioned (default 6000)
+  LLM_SECTION_CONCURRENCY  section calls in flight across all requests (default 12)
+  LLM_SECTION_RETRY      "0" to not re-request sections that fail validation
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import gemini_utils
+import json_repair
+import ollama_utils
+import resume_sections
+from gemini_utils import empty_resume_structure
+from metrics import LLM_CALLS, LLM_ERRORS, LLM_FALLBACKS, LLM_SECTION_RETRIES, stage
+
+LLM_PROVIDERS = [name.strip() for name in os.getenv("LLM_PROVIDERS", "gemini").split(",") if name.strip()]
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_DEFAULT_S = float(os.getenv("LLM_HEDGE_DEFAULT_S", "8"))
+LLM_HEDGE_MIN_S = float(os.getenv("LLM_HEDGE_MIN_S", "0.5"))
+LLM_HEDGE_POOL_SIZE = int(os.getenv("LLM_HEDGE_POOL_SIZE", "16"))
+LLM_SECTIONED = os.getenv("LLM_SECTIONED", "auto").lower()
+LLM_SECTIONED_MIN_CHARS = int(os.getenv("LLM_SECTIONED_MIN_CHARS", "6000"))
+LLM_SECTION_CONCURRENCY = int(os.getenv("LLM_SECTION_CONCURRENCY", "12"))
+LLM_SECTION_RETRY = os.getenv("LLM_SECTION_RETRY", "1") != "0"
+
+STRUCTURE, PITCH, ENHANCE = "structure_resume", "elevator_pitch", "enhance_section"
+STREAM_PITCH = "stream_elevator_pitch"
+STRUCTURE_SECTION = "structure_section"
+
+
+class ProviderError(Exception):
+    """A provider failed or returned nothing usable."""
+
+
+def normalize_resume(data) -> dict:
+    """
+    Coerce any provider's output to the full schema from gemini_utils, so
+    callers never see a missing key (Azure has no publications/projects,
+    Ollama no projects).
+    """
+    if not isinstance(data, dict):
+        raise ProviderError("structured resume is not a JSON object")
+    normalized = empty_resume_structure()
+    for key, default in normalized.items():
+        value = data.get(key, default)
+        if isinstance(default, list):
+            normalized[key] = value if isinstance(value, list) else []
+        elif isinstance(default, dict):
+            normalized[key] = value if isinstance(value, dict) else {}
+        else:
+            normalized[key] = value if isinstance(value, str) else ""
+    return normalized
+
+
+# Every provider is prompted with, and asked for output in, this one schema
+# (gemini_utils.RESUME_JSON_SCHEMA), so a key missing here is a real failure
+def _valid_value(key, value) -> bool:
+    default = empty_resume_structure()[key]
+    if value is None and isinstance(default, str):
+        return True  # a missing summary is no reason to call again
+    if isinstance(default, list):
+        return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+    return isinstance(value, type(default))
+
+
+def invalid_sections(data, sections: dict) -> list:
+    """
+    Sections (from resume_sections.split_sections, those with text) whose
+    schema keys are missing or wrongly typed in data, or were cut off in a
+    truncated response.
+    """
+    if not isinstance(data, dict):
+        return [section for section, text in sections.items() if text]
+    truncated = data.get(json_repair.TRUNCATED_KEY)
+    return [section for section, text in sections.items()
+            if text and any(key == truncated or not _valid_value(key, data.get(key))
+                            for key in gemini_utils.SECTION_SCHEMA_KEYS[section])]
+
+
+class LLMProvider:
+    """Base class; subclasses raise on failure instead of returning fallbacks."""
+
+    name = "base"
+
+    def structure_resume(self, raw_text: str) -> dict:
+        raise NotImplementedError
+
+    def structure_section(self, section: str, text: str) -> dict:
+        """Structure one resume section into its schema keys (see gemini_utils.SECTION_SCHEMA_KEYS)."""
+        raise NotImplementedError
+
+    def elevator_pitch(self, resume_data: dict) -> str:
+        raise NotImplementedError
+
+    def enhance_section(self, section_name: str, text: str) -> list:
+        raise NotImplementedError
+
+    def stream_elevator_pitch(self, resume_data: dict):
+        """Yield the pitch in chunks; providers without streaming send it whole."""
+        yield self.elevator_pitch(resume_data)
+
+    def cache_identity(self) -> tuple:
+        """Model and prompts that decide what structure_resume returns (part of parse_cache's version)."""
+        return (self.name,)
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def structure_resume(self, raw_text):
+        return gemini_utils.structure_text_raising(raw_text)
+
+    def structure_section(self, section, text):
+        return gemini_utils.structure_section_raising(section, text)
+
+    def elevator_pitch(self, resume_data):
+        return gemini_utils.generate_elevator_pitch_raising(resume_data)
+
+    def enhance_section(self, section_name, text):
+        return gemini_utils.enhance_section_raising(section_name, text)
+
+    def stream_elevator_pitch(self, resume_data):
+        return gemini_utils.stream_elevator_pitch(resume_data)
+
+    def cache_identity(self):
+        return (self.name, gemini_utils.MODEL_NAME, gemini_utils.STRUCTURE_PROMPT, gemini_utils.SECTION_PROMPT)
+
+
+class OllamaProvider(LLMProvider):
+    name = "ollama"
+
+    def structure_resume(self, raw_text):
+        data = ollama_utils._query_ollama(ollama_utils.build_structure_prompt(raw_text), is_json=True,
+                                          raise_errors=True, schema=ollama_utils.RESUME_RESPONSE_SCHEMA)
+        if not data:
+            raise ProviderError("Ollama returned no structured data")
+        return data
+
+    def structure_section(self, section, text):
+        # the section prompt is provider-neutral; reuse the Gemini one
+        data = ollama_utils._query_ollama(gemini_utils.build_section_prompt(section, text), is_json=True,
+                                          raise_errors=True, schema=gemini_utils.section_response_schema(section))
+        if not data:
+            raise ProviderError("Ollama returned no structured data")
+        return data
+
+    def elevator_pitch(self, resume_data):
+        pitch = ollama_utils._query_ollama(ollama_utils.build_pitch_prompt(resume_data), raise_errors=True)
+        if not pitch:
+            raise ProviderError("Ollama returned an empty pitch")
+        return pitch
+
+    def enhance_section(self, section_name, text):
+        return ollama_utils.enhance_with_ollama_raising(section_name, text)
+
+    def stream_elevator_pitch(self, resume_data):
+        return ollama_utils.stream_ollama(ollama_utils.build_pitch_prompt(resume_data))
+
+    def cache_identity(self):
+        return (self.name, ollama_utils.MODEL_NAME, ollama_utils.STRUCTURE_PROMPT, gemini_utils.SECTION_PROMPT)
+
+
+class AzureProvider(LLMProvider):
+    name = "azure"
+
+    def _client(self):
+        from llm_clients import get_azure_client
+
+        client = get_azure_client()
+        if client is None:
+            raise ProviderError("Azure AI is not configured")
+        return client
+
+    def structure_resume(self, raw_text):
+        import azure_utils
+
+        content = azure_utils.complete_text(self._client(), azure_utils.build_structure_prompt(raw_text), json_mode=True)
+        with stage("json_decode"):
+            return json_repair.loads(content)
+
+    def structure_section(self, section, text):
+        import azure_utils
+
+        content = azure_utils.complete_text(self._client(), gemini_utils.build_section_prompt(section, text), json_mode=True)
+        with stage("json_decode"):
+            return json_repair.loads(content)
+
+    def elevator_pitch(self, resume_data):
+        import azure_utils
+
+        # Azure has no pitch prompt of its own; reuse the Gemini one
+        return azure_utils.complete_text(self._client(), gemini_utils.build_pitch_prompt(resume_data)).strip()
+
+    def enhance_section(self, section_name, text):
+        import azure_utils
+
+        return azure_utils.enhance_with_azure_raising(self._client(), section_name, text)
+
+    def stream_elevator_pitch(self, resume_data):
+        import azure_utils
+
+        return azure_utils.stream_text(self._client(), gemini_utils.build_pitch_prompt(resume_data))
+
+    def cache_identity(self):
+        try:
+            import azure_utils
+        except ImportError:
+            return (self.name,)  # no Azure SDK, so this provider never answers
+        # the endpoint is the deployment, and so the model
+        return (self.name, azure_utils.AZURE_AI_ENDPOINT, azure_utils.STRUCTURE_PROMPT, gemini_utils.SECTION_PROMPT)
+
+
+PROVIDER_CLASSES = {cls.name: cls for cls in (GeminiProvider, OllamaProvider, AzureProvider)}
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per (provider, operation)."""
+
+    def __init__(self, window=200, min_samples=20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider, op, seconds):
+        with self._lock:
+            self._samples.setdefault((provider, op), deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, provider, op, pct):
+        with self._lock:
+            samples = sorted(self._samples.get((provider, op), ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self):
+        with self._lock:
+            keys = list(self._samples)
+        return {f"{p}.{op}": {"samples": len(self._samples[(p, op)]),
+                              "p50": self.percentile(p, op, 50),
+                              "p95": self.percentile(p, op, 95)}
+                for p, op in keys}
+
+
+class LLMRouter:
+    def __init__(self, providers, hedge=LLM_HEDGE, hedge_percentile=LLM_HEDGE_PERCENTILE,
+                 default_deadline=LLM_HEDGE_DEFAULT_S, min_deadline=LLM_HEDGE_MIN_S):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = providers
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.default_deadline = default_deadline
+        self.min_deadline = min_deadline
+        self.latency = LatencyTracker()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._in_flight = 0  # pool calls not yet finished, abandoned losers included
+        self.counters = {"calls": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0, "hedges_skipped": 0}
+        self._counters_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    def _failover(self):
+        self._count("failovers")
+        LLM_FALLBACKS.inc("provider_failover")
+
+    @staticmethod
+    def _failed(provider, op, e, errors):
+        print(f"⚠️ LLM provider '{provider.name}' failed {op}: {e}")
+        LLM_ERRORS.inc(provider.name, op)
+        errors.append(f"{provider.name}: {e}")
+
+    def hedge_deadline(self, provider, op) -> float:
+        observed = self.latency.percentile(provider.name, op, self.hedge_percentile)
+        return max(self.min_deadline, observed if observed is not None else self.default_deadline)
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=LLM_HEDGE_POOL_SIZE, thread_name_prefix="llm-hedge")
+            return self._pool
+
+    def _submit(self, provider, op, args, spare=0):
+        """
+        Start a call on the hedge pool, or return None unless a thread (plus
+        spare more) is free, so callers don't queue behind abandoned losers
+        that are still running.
+        """
+        with self._pool_lock:
+            if self._in_flight + 1 + spare > LLM_HEDGE_POOL_SIZE:
+                return None
+            self._in_flight += 1
+        # the call runs on a pool thread but its stage timings belong to this request
+        future = self._executor().submit(contextvars.copy_context().run, self._timed, provider, op, args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._pool_lock:
+            self._in_flight -= 1
+
+    def _timed(self, provider, op, args):
+        LLM_CALLS.inc(provider.name, op)
+        start = time.perf_counter()
+        result = getattr(provider, op)(*args)
+        self.latency.record(provider.name, op, time.perf_counter() - start)
+        return result
+
+    def call(self, op, *args):
+        """Run op on the configured providers; raises ProviderError if all fail."""
+        self._count("calls")
+        if self.hedge and len(self.providers) > 1:
+            return self._call_hedged(op, args)
+        return self._call_failover(op, args, self.providers)
+
+    def _call_failover(self, op, args, providers):
+        errors = []
+        for i, provider in enumerate(providers):
+            if i:
+                self._failover()
+            try:
+                return self._timed(provider, op, args)
+            except Exception as e:
+                self._failed(provider, op, e, errors)
+        raise ProviderError("; ".join(errors))
+
+    def _call_hedged(self, op, args):
+        primary, secondary = self.providers[0], self.providers[1]
+        # leave room for the hedge, or don't hedge this call at all
+        first = self._submit(primary, op, args, spare=1)
+        if first is None:
+            self._count("hedges_skipped")
+            return self._call_failover(op, args, self.providers)
+        pending = {first: primary}
+        errors = []
+
+        done, _ = wait(pending, timeout=self.hedge_deadline(primary, op))
+        for future in done:
+            try:
+                return future.result()
+            except Exception as e:
+                self._failed(primary, op, e, errors)
+                del pending[future]
+
+        # Primary is slow (or already failed): race the secondary against it.
+        # The loser keeps running in the background; its answer is dropped.
+        hedge = self._submit(secondary, op, args)
+        if hedge is None:
+            self._count("hedges_skipped")
+        else:
+            self._count("hedges")
+            pending[hedge] = secondary
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self._failed(provider, op, e, errors)
+                    continue
+                if provider is secondary:
+                    self._count("hedge_wins")
+                return result
+
+        # The hedged providers failed; fall over to the rest (the secondary too if it never ran)
+        try:
+            return self._call_failover(op, args, self.providers[2 if hedge is not None else 1:])
+        except ProviderError as e:
+            errors.append(str(e))
+        raise ProviderError("; ".join(err for err in errors if err))
+
+    def stream(self, op, *args):
+        """
+        Stream op from the first provider that produces output. Falls over to
+        the next provider only while nothing has been yielded yet; hedging
+        doesn't apply because the first token is already the answer.
+        """
+        self._count("calls")
+        errors = []
+        for i, provider in enumerate(self.providers):
+            if i:
+                self._failover()
+            started = False
+            chunks = None
+            try:
+                chunks = getattr(provider, op)(*args)
+                for chunk in chunks:
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started:
+                    raise
+                self._failed(provider, op, e, errors)
+            finally:
+                close = getattr(chunks, "close", None)
+                if callable(close):
+                    close()
+        raise ProviderError("; ".join(errors))
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            counters = dict(self.counters)
+        with self._pool_lock:
+            in_flight = self._in_flight
+        return {"providers": [p.name for p in self.providers], "hedge": self.hedge,
+                **counters, "hedge_pool_in_flight": in_flight, "latency": self.latency.snapshot()}
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> LLMRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            unknown = [name for name in LLM_PROVIDERS if name not in PROVIDER_CLASSES]
+            if unknown:
+                print(f"🚨 Unknown LLM providers ignored: {', '.join(unknown)}")
+            providers = [PROVIDER_CLASSES[name]() for name in LLM_PROVIDERS if name in PROVIDER_CLASSES]
+            _router = LLMRouter(providers or [GeminiProvider()])
+        return _router
+
+
+def cache_identity() -> list:
+    """Every configured provider's cache_identity(), in router order."""
+    return [part for provider in get_router().providers for part in provider.cache_identity()]
+
+
+_section_pool = None
+_section_pool_lock = threading.Lock()
+
+
+def _get_section_pool():
+    global _section_pool
+    with _section_pool_lock:
+        if _section_pool is None:
+            _section_pool = ThreadPoolExecutor(max_workers=LLM_SECTION_CONCURRENCY, thread_name_prefix="llm-section")
+        return _section_pool
+
+
+def use_sectioned(raw_text: str, sections: dict) -> bool:
+    if LLM_SECTIONED == "off" or len(sections) < 3:
+        # without at least two recognized sections there is nothing to parallelize
+        return False
+    return LLM_SECTIONED == "on" or len(raw_text) >= LLM_SECTIONED_MIN_CHARS
+
+
+def _structure_sections(sections: dict):
+    """
+    (merged, failed): the schema keys of every section that came back valid,
+    and {section: error} for those that didn't. Sections run concurrently.
+    """
+    router = get_router()
+    pool = _get_section_pool()
+    futures = {section: pool.submit(contextvars.copy_context().run, router.call, STRUCTURE_SECTION, section, text)
+               for section, text in sections.items() if text}
+    merged, failed = {}, {}
+    for section, future in futures.items():
+        try:
+            data = future.result()
+        except Exception as e:
+            failed[section] = e
+            continue
+        if invalid_sections(data, {section: sections[section]}):
+            failed[section] = ProviderError(f"structured {section} section failed validation")
+            continue
+        for key in gemini_utils.SECTION_SCHEMA_KEYS[section]:
+            merged[key] = data.get(key)  # a missing summary is valid; normalize_resume fills it in
+    return merged, failed
+
+
+def _retry_sections(failed, sections: dict):
+    """Re-request the failed sections once; returns (merged, still failed)."""
+    for section in failed:
+        LLM_SECTION_RETRIES.inc(section)
+    print(f"🔁 Re-requesting {len(failed)} section(s) that failed validation ({', '.join(failed)})")
+    return _structure_sections({section: sections[section] for section in failed})
+
+
+def structure_resume_sectioned(sections: dict):
+    """
+    Structure each section with its own (smaller) prompt, all concurrently,
+    and merge them into one resume. Wall time is roughly that of the slowest
+    section. Failed sections are retried once (LLM_SECTION_RETRY). Returns
+    (merged, failed) like _structure_sections, so the valid sections survive
+    one that still fails.
+    """
+    merged, failed = _structure_sections(sections)
+    if failed and LLM_SECTION_RETRY:
+        retried, failed = _retry_sections(failed, sections)
+        merged.update(retried)
+    for section, e in failed.items():
+        print(f"⚠️ Section {section} could not be structured: {e}")
+    return merged, failed
+
+
+# Sections structuring gave up on during collect_incomplete(), or None outside it
+_incomplete_sections = contextvars.ContextVar("incomplete_sections", default=None)
+
+
+def collect_incomplete(fn, *args):
+    """
+    (fn(*args), sections it left missing or incomplete): lets the caller
+    tell a partial resume from a complete one, e.g. to not cache it.
+    """
+    incomplete = []
+    token = _incomplete_sections.set(incomplete)
+    try:
+        return fn(*args), incomplete
+    finally:
+        _incomplete_sections.reset(token)
+
+
+def record_incomplete(sections):
+    incomplete = _incomplete_sections.get()
+    if incomplete is not None:
+        incomplete.extend(section for section in sections if section not in incomplete)
+
+
+def complete_sections(data, sections: dict, retry: bool = True) -> dict:
+    """
+    Keep the valid sections of a whole-resume response and re-request only
+    the ones that failed validation (unless retry is False). Returns what
+    could be recovered (an empty dict if nothing); sections still invalid
+    are recorded for collect_incomplete().
+    """
+    data = dict(data) if isinstance(data, dict) else {}
+    unrecovered = invalid_sections(data, sections)
+    # with nothing back and no section headings, a section call would only see the header
+    if unrecovered and retry and LLM_SECTION_RETRY and (data or len(sections) >= 3):
+        retried, failed = _retry_sections(unrecovered, sections)
+        data.update(retried)
+        unrecovered = list(failed)
+        for section, e in failed.items():
+            print(f"⚠️ Section {section} is still invalid after a retry: {e}")
+    record_incomplete(unrecovered)
+    return {key: value for key, value in data.items() if key in empty_resume_structure() and _valid_value(key, value)}
+
+
+# --- Entry points used by the rest of the app (never raise) ---
+def structure_resume(raw_text: str) -> dict:
+    with stage("prompt_build"):
+        sections = resume_sections.split_sections(raw_text)
+    sectioned = use_sectioned(raw_text, sections)
+    if sectioned:
+        print(f"--- Structuring {len(sections)} sections concurrently ({', '.join(sections)}) ---")
+        merged, failed = structure_resume_sectioned(sections)
+        if merged:
+            record_incomplete(failed)
+            return normalize_resume(merged)
+        # nothing came back; try the whole text in one call
+        print("⚠️ No section could be structured; falling back to a single call")
+        LLM_FALLBACKS.inc("sectioned_to_single")
+    try:
+        data = get_router().call(STRUCTURE, raw_text)
+    except Exception as e:
+        print(f"An error occurred while structuring the resume with the AI providers: {e}")
+        data = None
+    # after a sectioned attempt every section has already been requested (and retried) on its own
+    recovered = complete_sections(data, sections, retry=not sectioned)
+    if not recovered:
+        LLM_FALLBACKS.inc("empty_structure")
+        # Return a default empty structure on error to prevent frontend crashes
+        return empty_resume_structure()
+    return normalize_resume(recovered)
+
+
+def elevator_pitch(resume_data: dict) -> str:
+    try:
+        return get_router().call(PITCH, resume_data)
+    except Exception as e:
+        print(f"Error generating elevator pitch with the AI providers: {e}")
+        LLM_FALLBACKS.inc("pitch_message")
+        return "Could not generate elevator pitch at this time."
+
+
+def enhance_section(section_name: str, text: str) -> list:
+    try:
+        return get_router().call(ENHANCE, section_name, text)
+    except Exception as e:
+        print(f"Error enhancing section with the AI providers: {e}")
+        LLM_FALLBACKS.inc("enhance_original")
+        return [text]
+
+
+def stream_elevator_pitch(resume_data: dict):
+    """Generator of pitch text chunks; raises ProviderError if no provider can start."""
+    return get_router().stream(STREAM_PITCH, resume_data)
@@ -0,0 +1,269 @@
+# backend/metrics.py
+"""
+Per-stage request timings, exported for Prometheus and in Server-Timing.
+
+Code on the request path wraps its work in stage("name") (or decorates it
+with @timed("name")). Every stage duration is observed in the
+resume_stage_seconds histogram; during an HTTP request it is also
+collected for that request's Server-Timing header. Stages:
+
+  upload_read      parsing the multipart body and opening the upload
+  extract          PDF/DOCX text extraction
+  prompt_build     compaction, section splitting and prompt formatting
+  llm              waiting for a provider's response
+  json_decode      decoding the provider's JSON
+  template_render  Jinja HTML for a PDF
+  pdf_write        WeasyPrint layout and PDF output
+  docx_build       building a DOCX document
+  docx_save        serializing it
+
+A stage that runs several times in one request (e.g. concurrent section
+calls) appears once in Server-Timing with its durations summed. Stages
+timed in the PDF render workers are sent back with the result and
+recorded here. Stages of a streamed response that run after the headers
+are sent only reach the histograms.
+
+/api/metrics serves the histograms, request counts and in-flight gauges
+and the LLM call, error, fallback, JSON repair and section retry counters
+in the Prometheus text format. Values
+are per process: under gunicorn each worker keeps its own, and a scrape
+sees whichever worker answers it.
+
+Configuration (env):
+  METRICS_ENABLED        "0" to stop recording (and serve 404 on /api/metrics)
+  SERVER_TIMING_ENABLED  "0" to leave the Server-Timing header off
+"""
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1") != "0"
+
+# Seconds; spans a cached parse (milliseconds) to a slow LLM call (a minute)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+_registry = []  # every metric, in the order /api/metrics lists them
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _samples(self):
+        with self._lock:
+            return [(labels, value) for labels, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self._samples()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def add(self, amount, *labels):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=STAGE_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # per-bucket (not cumulative) counts, then sum and count
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            return [(labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, (counts, total, count) in sorted(self._samples()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return "\n".join(lines)
+
+
+STAGE_SECONDS = Histogram("resume_stage_seconds", "Time spent in each request stage.", ("stage",))
+REQUEST_SECONDS = Histogram("resume_http_request_seconds", "HTTP request handling time.", ("endpoint",))
+REQUESTS = Counter("resume_http_requests_total", "HTTP requests handled.", ("endpoint", "status"))
+IN_FLIGHT = Gauge("resume_http_requests_in_flight", "HTTP requests being handled.", ("endpoint",))
+LLM_CALLS = Counter("resume_llm_calls_total", "LLM provider calls (round trips) made.", ("provider", "op"))
+LLM_ERRORS = Counter("resume_llm_errors_total", "Failed LLM provider calls.", ("provider", "op"))
+LLM_FALLBACKS = Counter("resume_llm_fallbacks_total",
+                        "LLM results replaced by a fallback (another provider, a single call, or a default).",
+                        ("kind",))
+LLM_JSON_REPAIRS = Counter("resume_llm_json_repairs_total", "LLM JSON responses repaired locally, by fix.", ("fix",))
+LLM_SECTION_RETRIES = Counter("resume_llm_section_retries_total",
+                              "Resume sections re-requested after failing validation.", ("section",))
+
+
+def render_metrics() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# --- stage timing ---
+# (stage, seconds) pairs of the current request, or None outside one
+_request_stages = contextvars.ContextVar("request_stages", default=None)
+
+
+def record(name, seconds):
+    STAGE_SECONDS.observe(seconds, name)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time the block as one run of the named stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def timed(name):
+    """Decorator: every call of the function is one run of the named stage."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def collect_stages(fn, *args):
+    """(fn(*args), [(stage, seconds)] it timed): for work done in another process."""
+    stages = []
+    token = _request_stages.set(stages)
+    try:
+        return fn(*args), stages
+    finally:
+        _request_stages.reset(token)
+
+
+def record_stages(stages):
+    """Record stages returned by collect_stages() as if timed here."""
+    for name, seconds in stages:
+        record(name, seconds)
+
+
+def server_timing(stages, total=None) -> str:
+    """Server-Timing header value: one entry per stage (durations summed) in first-seen order."""
+    summed, counts = {}, {}
+    for name, seconds in stages:
+        summed[name] = summed.get(name, 0.0) + seconds
+        counts[name] = counts.get(name, 0) + 1
+    entries = [f"{name};dur={seconds * 1000:.1f}" + (f';desc="{counts[name]} runs"' if counts[name] > 1 else "")
+               for name, seconds in summed.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+# --- Flask integration ---
+def _endpoint():
+    from flask import request
+
+    # the route pattern, not the path, so job IDs don't each get a series
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def init_app(app):
+    """Count and time every request and add its Server-Timing header."""
+    from flask import g
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_endpoint = _endpoint()
+        g.metrics_token = _request_stages.set([])
+        IN_FLIGHT.add(1, g.metrics_endpoint)
+
+    @app.after_request
+    def _finish_request_metrics(response):
+        started = g.get("metrics_started")
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        REQUEST_SECONDS.observe(elapsed, g.metrics_endpoint)
+        REQUESTS.inc(g.metrics_endpoint, str(response.status_code))
+        if SERVER_TIMING_ENABLED:
+            response.headers["Server-Timing"] = server_timing(_request_stages.get() or (), elapsed)
+        return response
+
+    @app.teardown_request
+    def _end_request_metrics(exc=None):
+        # runs even when the handler raised, so the gauge can't drift
+        if g.get("metrics_started") is None:
+            return
+        IN_FLIGHT.add(-1, g.metrics_endpoint)
+        try:
+            _request_stages.reset(g.metrics_token)
+        except ValueError:  # torn down from another context; just stop collecting
+            _request_stages.set(None)
+        g.metrics_started = None
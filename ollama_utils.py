@@ -1,47 +1,224 @@
 # backend/ollama_utils.py
+import os
 import requests
 import json
-import re
+import threading
+import time
+from datetime import datetime
+
+import json_repair
+from gemini_utils import COMPACT_RESUME_JSON_SCHEMA, RESUME_RESPONSE_SCHEMA
+from llm_clients import LLM_STRUCTURED_OUTPUT, get_http_session
+from metrics import stage, timed
 
 # This is the confirmed working endpoint from your test
 OLLAMA_API_URL = "http://localhost:11434/api/generate" 
 MODEL_NAME = "llama3:latest" # Using :latest as shown in your ollama list output
 
-def _query_ollama(prompt, is_json=False):
-    """Generic function to query the Ollama API using the generate endpoint."""
+# How long Ollama keeps the model loaded after each call ("30m", "24h", "-1" = forever)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Load the model at app startup so the first real request isn't a cold load
+# (on by default whenever Ollama is one of the configured LLM providers)
+OLLAMA_WARMUP = os.getenv(
+    "OLLAMA_WARMUP", "1" if "ollama" in os.getenv("LLM_PROVIDERS", "gemini").lower() else "0") == "1"
+# Ping the model this often to keep it resident (0 = no heartbeat)...
+OLLAMA_HEARTBEAT_SECONDS = int(os.getenv("OLLAMA_HEARTBEAT_SECONDS", "0"))
+# ...but only during these local hours [start, end) and weekdays (Mon=0)
+OLLAMA_HEARTBEAT_HOURS = os.getenv("OLLAMA_HEARTBEAT_HOURS", "8-19")
+OLLAMA_HEARTBEAT_DAYS = os.getenv("OLLAMA_HEARTBEAT_DAYS", "0-4")
+# A call whose load_duration exceeds this counts as a cold (model-loading) call
+OLLAMA_COLD_LOAD_MS = float(os.getenv("OLLAMA_COLD_LOAD_MS", "500"))
+
+
+class OllamaLatencyStats:
+    """Cold- vs warm-call latency, classified from Ollama's own load_duration."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies = {"cold": [], "warm": []}
+        self._counts = {"cold": 0, "warm": 0}
+        self.last_cold_at = None
+
+    def record(self, seconds, load_duration_ns):
+        kind = "cold" if (load_duration_ns or 0) / 1e6 > OLLAMA_COLD_LOAD_MS else "warm"
+        with self._lock:
+            samples = self._latencies[kind]
+            samples.append(seconds)
+            if len(samples) > self.window:
+                del samples[0]
+            self._counts[kind] += 1
+            if kind == "cold":
+                self.last_cold_at = time.time()
+        return kind
+
+    def snapshot(self) -> dict:
+        def summary(samples):
+            if not samples:
+                return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+            ordered = sorted(samples)
+            pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * (len(ordered) - 1)))] * 1000, 1)
+            return {"p50_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": round(ordered[-1] * 1000, 1)}
+
+        with self._lock:
+            return {
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+                "cold_calls": self._counts["cold"],
+                "warm_calls": self._counts["warm"],
+                "last_cold_at": self.last_cold_at,
+                "cold": summary(list(self._latencies["cold"])),
+                "warm": summary(list(self._latencies["warm"])),
+            }
+
+
+latency_stats = OllamaLatencyStats()
+
+# Output schema (JSON schema) for the summary enhancement
+VERSIONS_SCHEMA = {"type": "object", "properties": {"versions": {"type": "array", "items": {"type": "string"}}},
+                   "required": ["versions"]}
+
+def _query_ollama(prompt, is_json=False, raise_errors=False, schema=None):
+    """
+    Generic function to query the Ollama API using the generate endpoint.
+    With is_json, a schema (JSON schema dict) constrains the output to it
+    when LLM_STRUCTURED_OUTPUT is on; otherwise Ollama's plain JSON mode is used.
+    Returns None on failure, or re-raises when raise_errors is set.
+    """
     
     payload = {
         "model": MODEL_NAME,
         "prompt": prompt,
-        "stream": False
+        "stream": False,
+        "keep_alive": OLLAMA_KEEP_ALIVE
     }
     if is_json:
-        payload["format"] = "json"
+        payload["format"] = schema if schema is not None and LLM_STRUCTURED_OUTPUT else "json"
         
     try:
         # Increased timeout to 300 seconds (5 minutes) for complex tasks
-        response = requests.post(OLLAMA_API_URL, json=payload, timeout=300)
-        response.raise_for_status()
-        
-        response_text = response.json().get('response', '')
+        # Pooled keep-alive session shared across requests
+        started = time.perf_counter()
+        with stage("llm"):
+            response = get_http_session().post(OLLAMA_API_URL, json=payload, timeout=300)
+            response.raise_for_status()
+            body = response.json()
+        latency_stats.record(time.perf_counter() - started, body.get('load_duration'))
+        response_text = body.get('response', '')
 
         if is_json:
-            # The model might wrap the JSON in markdown backticks, so we clean it.
-            cleaned_json = re.sub(r'^```json\s*|\s*```$', '', response_text.strip(), flags=re.MULTILINE)
-            return json.loads(cleaned_json)
+            # Backticks, stray prose or a cut-off reply are repaired locally
+            with stage("json_decode"):
+                return json_repair.loads(response_text)
         
         return response_text.strip()
         
     except requests.exceptions.RequestException as e:
         print(f"🚨 Error connecting to Ollama API: {e}")
+        if raise_errors:
+            raise
         return None
-    except json.JSONDecodeError as e:
+    except ValueError as e:
         print(f"🚨 Error decoding JSON from Ollama response: {e}")
         print(f"Raw response: {response_text}")
+        if raise_errors:
+            raise
         return None
 
-def enhance_with_ollama(section_name: str, text_to_enhance: str) -> list[str]:
-    """Sends text to Ollama for enhancement and returns multiple versions."""
+def stream_ollama(prompt):
+    """
+    Yields response text from Ollama's streaming /api/generate as it arrives.
+    Closing the generator closes the HTTP response, which makes Ollama stop
+    generating.
+    """
+    payload = {
+        "model": MODEL_NAME,
+        "prompt": prompt,
+        "stream": True,
+        "keep_alive": OLLAMA_KEEP_ALIVE
+    }
+    started = time.perf_counter()
+    response = get_http_session().post(OLLAMA_API_URL, json=payload, stream=True, timeout=300)
+    try:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"])
+            if chunk.get("response"):
+                yield chunk["response"]
+            if chunk.get("done"):
+                # the final chunk carries the timings, load_duration included
+                latency_stats.record(time.perf_counter() - started, chunk.get("load_duration"))
+                break
+    finally:
+        response.close()
+
+def warm_up_ollama() -> bool:
+    """
+    Load the model (or refresh its keep-alive) without generating anything:
+    Ollama treats a generate call with an empty prompt as a pure load.
+    """
+    payload = {"model": MODEL_NAME, "prompt": "", "stream": False, "keep_alive": OLLAMA_KEEP_ALIVE}
+    try:
+        started = time.perf_counter()
+        response = get_http_session().post(OLLAMA_API_URL, json=payload, timeout=300)
+        response.raise_for_status()
+        kind = latency_stats.record(time.perf_counter() - started, response.json().get('load_duration'))
+        print(f"🔥 Ollama model {MODEL_NAME} resident ({kind} load, {time.perf_counter() - started:.2f}s)")
+        return True
+    except (requests.exceptions.RequestException, ValueError) as e:
+        # ValueError: a reply that isn't JSON (e.g. a proxy's error page)
+        print(f"🚨 Ollama warm-up failed: {e}")
+        return False
+
+def _parse_range(spec, default):
+    try:
+        start, end = (int(part) for part in spec.split("-"))
+        return start, end
+    except ValueError:
+        return default
+
+def _in_business_hours(now=None) -> bool:
+    now = now or datetime.now()
+    first_day, last_day = _parse_range(OLLAMA_HEARTBEAT_DAYS, (0, 4))
+    start_hour, end_hour = _parse_range(OLLAMA_HEARTBEAT_HOURS, (8, 19))
+    return first_day <= now.weekday() <= last_day and start_hour <= now.hour < end_hour
+
+_residency_started = False
+_residency_lock = threading.Lock()
+
+def start_ollama_residency():
+    """
+    Background warm-up at startup and, if configured, a heartbeat that keeps
+    the model loaded during business hours. Safe to call more than once.
+    """
+    global _residency_started
+    with _residency_lock:
+        if _residency_started or not (OLLAMA_WARMUP or OLLAMA_HEARTBEAT_SECONDS > 0):
+            return
+        _residency_started = True
+
+    def warm_up():
+        # nothing may end the thread, or the model silently stops being kept loaded
+        try:
+            warm_up_ollama()
+        except Exception as e:
+            print(f"🚨 Ollama warm-up failed: {e}")
+
+    def run():
+        if OLLAMA_WARMUP:
+            warm_up()
+        while OLLAMA_HEARTBEAT_SECONDS > 0:
+            time.sleep(OLLAMA_HEARTBEAT_SECONDS)
+            if _in_business_hours():
+                warm_up()
+
+    threading.Thread(target=run, name="ollama-residency", daemon=True).start()
+
+def enhance_with_ollama_raising(section_name: str, text_to_enhance: str) -> list[str]:
+    """Like enhance_with_ollama, but raises when Ollama fails or returns nothing usable."""
     if not text_to_enhance.strip():
         return [text_to_enhance]
     
@@ -60,12 +237,11 @@ def enhance_with_ollama(section_name: str, text_to_enhance: str) -> list[str]:
         {text_to_enhance}
         ---
         """
-        response_data = _query_ollama(prompt, is_json=True)
-        if response_data and isinstance(response_data, dict):
-            versions = response_data.get("versions", [])
-            if isinstance(versions, list) and all(isinstance(v, str) for v in versions):
-                return versions
-        return [text_to_enhance] # Fallback
+        response_data = _query_ollama(prompt, is_json=True, raise_errors=True, schema=VERSIONS_SCHEMA)
+        versions = response_data.get("versions") if isinstance(response_data, dict) else None
+        if not (isinstance(versions, list) and versions and all(isinstance(v, str) for v in versions)):
+            raise ValueError("Ollama returned no enhanced versions")
+        return versions
     else:
         prompt = f"""
         You are a professional resume advisor.
@@ -78,31 +254,27 @@ def enhance_with_ollama(section_name: str, text_to_enhance: str) -> list[str]:
         ---
         Improved Text:
         """
-        response_text = _query_ollama(prompt)
-        return [response_text] if response_text else [text_to_enhance]
+        response_text = _query_ollama(prompt, raise_errors=True)
+        if not response_text:
+            raise ValueError("Ollama returned an empty enhancement")
+        return [response_text]
 
+def enhance_with_ollama(section_name: str, text_to_enhance: str) -> list[str]:
+    """Sends text to Ollama for enhancement and returns multiple versions."""
+    try:
+        return enhance_with_ollama_raising(section_name, text_to_enhance)
+    except Exception as e:
+        print(f"🚨 Error enhancing '{section_name}' with Ollama: {e}")
+        return [text_to_enhance] # Fallback
 
-def generate_resume_fields_from_raw_text(resume_text: str) -> dict:
-    """Extracts structured resume data from raw text using a local Ollama model."""
-    if not resume_text.strip():
-        return {}
-        
-    schema = {
-        "personal": {"name": "string", "email": "string", "phone": "string", "location": "string"},
-        "summary": "string",
-        "experience": [{"jobTitle": "string", "company": "string", "dates": "string", "description": "string"}],
-        "education": [{"degree": "string", "institution": "string", "graduationYear": "string", "gpa": "string", "achievements": "string"}],
-        "skills": [{"category": "string", "skills_list": "string"}],
-        "certifications": [{"name": "string", "issuer": "string", "date": "string"}],
-        "publications": [{"title": "string", "authors": "string", "journal": "string", "date": "string", "link": "string"}]
-    }
-    
-    prompt = f"""
+
+# Prompt used to structure raw resume text; filled in with str.format
+STRUCTURE_PROMPT = """
     You are an expert resume parser. Extract the information from the following resume text and provide the output in a valid JSON format that adheres to the schema provided below.
     Ensure all fields are filled, even if with an empty string or empty list if no information is found.
     
     Schema:
-    {json.dumps(schema, indent=2)}
+    {json_schema}
     
     Resume Text:
     ---
@@ -111,14 +283,23 @@ def generate_resume_fields_from_raw_text(resume_text: str) -> dict:
     
     JSON Output:
     """
+
+@timed("prompt_build")
+def build_structure_prompt(resume_text: str) -> str:
+    return STRUCTURE_PROMPT.format(json_schema=COMPACT_RESUME_JSON_SCHEMA, resume_text=resume_text)
+
+def generate_resume_fields_from_raw_text(resume_text: str) -> dict:
+    """Extracts structured resume data from raw text using a local Ollama model."""
+    if not resume_text.strip():
+        return {}
     
-    response_data = _query_ollama(prompt, is_json=True)
+    response_data = _query_ollama(build_structure_prompt(resume_text), is_json=True, schema=RESUME_RESPONSE_SCHEMA)
     return response_data if isinstance(response_data, dict) else {}
 
-def generate_elevator_pitch(resume_data: dict) -> str:
-    """Generates a concise elevator pitch from resume data using Ollama."""
+@timed("prompt_build")
+def build_pitch_prompt(resume_data: dict) -> str:
     resume_summary_text = json.dumps(resume_data, indent=2)
-    prompt = f"""
+    return f"""
     Based on the following resume data, generate a compelling and concise 30-second elevator pitch.
     The pitch should be professional, engaging, and highlight the candidate's key strengths and career goals.
     
@@ -129,4 +310,7 @@ def generate_elevator_pitch(resume_data: dict) -> str:
     
     Elevator Pitch:
     """
-    return _query_ollama(prompt) or "Could not generate elevator pitch."
\ No newline at end of file
+
+def generate_elevator_pitch(resume_data: dict) -> str:
+    """Generates a concise elevator pitch from resume data using Ollama."""
+    return _query_ollama(build_pitch_prompt(resume_data)) or "Could not generate elevator pitch."
@@ -0,0 +1,277 @@
+# backend/parse_cache.py
+"""
+Content-addressed cache for /api/parse-resume results.
+
+Two tiers: an in-memory LRU in front of a JSON-file store on disk. Entries are
+looked up by a hash of the raw upload bytes first and then by a hash of the
+normalized extracted text, so a re-upload of the same file (or the same
+resume re-exported to another format) never reaches the LLM again.
+
+Every entry lives under a version derived from the JSON schema and each
+configured provider's model and structuring prompts
+(LLMProvider.cache_identity); editing any of them invalidates the cache.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import gemini_utils
+import llm_providers
+import rule_extractor
+import text_compaction
+
+PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "1") != "0"
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "resume-parse-cache"))
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "512"))
+PARSE_CACHE_MAX_DISK_MB = int(os.getenv("PARSE_CACHE_MAX_DISK_MB", "256"))
+PARSE_CACHE_TTL_SECONDS = int(os.getenv("PARSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Bump when the shape of what parse_resume_file returns changes
+PARSE_CACHE_FORMAT = "1"
+
+_HASH_CHUNK = 8 * 1024 * 1024  # a multiple of the page size
+
+
+def _sha256(data):
+    """
+    sha256 of bytes or of a memory-mapped upload. A map is hashed a slice
+    at a time, and each slice's pages are dropped from this process once
+    hashed (they stay in the page cache), so hashing a large upload doesn't
+    pull all of it into the server's resident memory.
+    """
+    if not isinstance(data, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED"):
+        return hashlib.sha256(data)
+    h = hashlib.sha256()
+    size = len(data)
+    with memoryview(data) as view:
+        for start in range(0, size, _HASH_CHUNK):
+            length = min(_HASH_CHUNK, size - start)
+            h.update(view[start:start + length])
+            data.madvise(mmap.MADV_DONTNEED, start, length)
+    return h
+
+
+def current_cache_version() -> str:
+    """Hash of everything that determines what the LLM returns for a given text."""
+    h = hashlib.sha256()
+    compaction = text_compaction.COMPACTION_VERSION if text_compaction.TEXT_COMPACTION_ENABLED else "off"
+    for part in (PARSE_CACHE_FORMAT, *llm_providers.cache_identity(), gemini_utils.RESUME_JSON_SCHEMA,
+                 compaction, llm_providers.LLM_SECTIONED, rule_extractor.RULES_VERSION):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of extracted text used for the secondary key."""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+class ParseCache:
+    """
+    In-memory LRU backed by an on-disk store, both bounded.
+
+    Values are kept as JSON strings so every hit hands the caller a fresh
+    dict that can be mutated freely.
+    """
+
+    def __init__(self, version, directory=PARSE_CACHE_DIR, max_entries=PARSE_CACHE_MAX_ENTRIES,
+                 max_disk_bytes=PARSE_CACHE_MAX_DISK_MB * 1024 * 1024, ttl=PARSE_CACHE_TTL_SECONDS):
+        self.version = version
+        self.directory = os.path.join(directory, version) if directory else None
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (created, json_text)
+        self._lock = threading.Lock()
+        self._disk_bytes = None  # computed lazily on first write
+        self._counters = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "puts": 0,
+            "memory_evictions": 0, "disk_evictions": 0, "expired": 0,
+        }
+
+    # --- keys ---
+    # Results differ per parse mode, so non-default modes get their own keys
+    @staticmethod
+    def bytes_key(raw_bytes, mode="llm") -> str:
+        return "b-" + _sha256(raw_bytes).hexdigest() + ("" if mode == "llm" else "-" + mode)
+
+    @staticmethod
+    def text_key(text: str, mode="llm") -> str:
+        return ("t-" + hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+                + ("" if mode == "llm" else "-" + mode))
+
+    # --- public API ---
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._expired(entry[0], now):
+                    del self._memory[key]
+                    self._counters["expired"] += 1
+                else:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return json.loads(entry[1])
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            if self._expired(entry[0], now):
+                self._remove_disk(key)
+                with self._lock:
+                    self._counters["expired"] += 1
+            else:
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+                    self._remember(key, entry)
+                return json.loads(entry[1])
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def put(self, key, value):
+        entry = (time.time(), json.dumps(value))
+        with self._lock:
+            self._counters["puts"] += 1
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                "version": self.version,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "ttl_seconds": self.ttl,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                **self._counters,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for path, _, _ in self._disk_files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._disk_bytes = 0
+
+    # --- memory tier ---
+    def _expired(self, created, now):
+        return self.ttl > 0 and now - created > self.ttl
+
+    def _remember(self, key, entry):
+        # caller holds self._lock
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["memory_evictions"] += 1
+
+    # --- disk tier ---
+    def _path(self, key):
+        return os.path.join(self.directory, key[2:4], key + ".json")
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                record = json.load(f)
+            return record["created"], record["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.directory or self.max_disk_bytes <= 0:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            payload = json.dumps({"created": entry[0], "value": entry[1]})
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, path)  # atomic, so concurrent readers never see half a file
+        except OSError as e:
+            print(f"⚠️ parse cache: could not write {path}: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_bytes += len(payload)
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._prune_disk()
+
+    def _remove_disk(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _disk_files(self):
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, st.st_size, st.st_mtime))
+        return files
+
+    def _prune_disk(self):
+        """Drop the oldest files until the store is back under 90% of its limit."""
+        files = sorted(self._disk_files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_disk_bytes * 0.9)
+        evicted = 0
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self._counters["disk_evictions"] += evicted
+
+
+_parse_cache = None
+_parse_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """Process-wide cache for the current prompt/schema/model version, or None if disabled."""
+    global _parse_cache
+    if not PARSE_CACHE_ENABLED:
+        return None
+    version = current_cache_version()
+    with _parse_cache_lock:
+        if _parse_cache is None or _parse_cache.version != version:
+            _parse_cache = ParseCache(version)
+        return _parse_cache
@@ -0,0 +1,235 @@
+# backend/pdf_pool.py
+"""
+Process pool for WeasyPrint PDF rendering.
+
+Layout in write_pdf() is CPU-bound Python, so rendering in the request
+thread serializes concurrent PDF requests on the GIL and starves every
+other endpoint. Instead, PDF_RENDER_WORKERS pre-forked processes each build
+their own PdfRenderEngine (compiled template, parsed base CSS, font config)
+once and render requests sent to them.
+
+Admission is bounded: at most workers + PDF_RENDER_QUEUE_DEPTH renders may
+be running or waiting; beyond that render_pdf() raises RenderPoolBusy
+immediately so the route can answer 503 with Retry-After. A render that
+runs for longer than PDF_RENDER_TIMEOUT_S raises RenderTimeout; since a running job
+can't be cancelled, the pool is killed and recreated, and any other jobs
+in it fail with RenderPoolBusy.
+
+PDF_RENDER_WORKERS=0 renders in the calling thread, as before.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import document_generator
+import document_output
+import metrics
+import profiling
+from image_cache import prepare_document_images
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Renders allowed to wait for a free worker before new ones are rejected
+PDF_RENDER_QUEUE_DEPTH = int(os.getenv("PDF_RENDER_QUEUE_DEPTH", str(2 * max(1, PDF_RENDER_WORKERS))))
+PDF_RENDER_TIMEOUT_S = float(os.getenv("PDF_RENDER_TIMEOUT_S", "30"))
+PDF_RENDER_RETRY_AFTER_S = int(os.getenv("PDF_RENDER_RETRY_AFTER_S", "2"))
+
+
+class RenderPoolBusy(Exception):
+    """No room in the render pool (or it was restarted under this job); retry later."""
+
+
+class RenderTimeout(Exception):
+    """A render ran past PDF_RENDER_TIMEOUT_S."""
+
+
+def _init_render_worker():
+    # A forked worker must not reuse the parent's engine: its WeasyPrint and
+    # fontconfig state belongs to another process. Build and warm its own.
+    document_generator._pdf_engine = None
+    document_generator.init_pdf_engine(warm_up=True)
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def _render_pdf_to_temp(data):
+    return document_output.write_to_temp(
+        lambda f: document_generator.generate_pdf_from_data(data, target=f), suffix=".pdf")
+
+
+def _render_with_stages(render, data, profile=False):
+    # The worker's stage timings (and, for a profiled request, its profile)
+    # go back with the result, to be recorded by the process that handles
+    # the request
+    if profile:
+        (body, stages), stats = profiling.profile_call(metrics.collect_stages, render, data)
+        return body, stages, stats
+    return (*metrics.collect_stages(render, data), None)
+
+
+class PdfRenderPool:
+    def __init__(self, workers=PDF_RENDER_WORKERS, queue_depth=PDF_RENDER_QUEUE_DEPTH, timeout=PDF_RENDER_TIMEOUT_S):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.workers + max(0, queue_depth))
+        self.capacity = self.workers + max(0, queue_depth)
+        # Renders wait here, in this process, until a worker is free; only then
+        # are they handed to the executor, so the timeout measures rendering
+        # rather than time spent queued behind other renders
+        self._dispatch = threading.BoundedSemaphore(self.workers)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.counters = {"rendered": 0, "rejected": 0, "timeouts": 0, "failed": 0, "restarts": 0}
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self.counters[name] += delta
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(method),
+                    initializer=_init_render_worker,
+                )
+            return self._executor
+
+    def start(self):
+        """Fork every worker now and wait until each has built its engine."""
+        executor = self._get_executor()
+        # workers are only forked when there's work and no idle one, so submit
+        # one trivial job per worker to bring them all up together
+        pids = {f.result() for f in [executor.submit(_worker_ready) for _ in range(self.workers)]}
+        return len(pids)
+
+    def shutdown(self, wait=True):
+        """Stop accepting work; with wait, let running renders finish first."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def restart(self):
+        """Kill every worker (a hung render can't be cancelled otherwise)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.counters["restarts"] += 1
+        if executor is None:
+            return
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            try:
+                process.kill()
+            except Exception:
+                pass
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, data, to_file=False):
+        """PDF bytes, or with to_file the path of a temp file holding them (see document_output)."""
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise RenderPoolBusy(f"PDF render pool is full ({self.capacity} renders in flight)")
+        with self._lock:
+            self._in_flight += 1
+        self._dispatch.acquire()
+        try:
+            render = _render_pdf_to_temp if to_file else document_generator.generate_pdf_from_data
+            future = self._get_executor().submit(_render_with_stages, render, data, profiling.is_profiling())
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+
+        try:
+            body, stages, profile = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._count("timeouts")
+            print(f"🚨 PDF render timed out after {self.timeout:g}s; restarting the render pool")
+            self.restart()
+            raise RenderTimeout(f"PDF rendering took longer than {self.timeout:g}s")
+        except BrokenProcessPool:
+            self._count("failed")
+            self.restart()
+            raise RenderPoolBusy("PDF render pool restarted; please retry")
+        except Exception:
+            self._count("failed")
+            raise
+        self._count("rendered")
+        metrics.record_stages(stages)
+        profiling.add_worker_stats(profile)
+        return body
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._dispatch.release()
+        self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"workers": self.workers, "capacity": self.capacity, "in_flight": self._in_flight,
+                    "timeout_s": self.timeout, "running": self._executor is not None, **self.counters}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """The process-wide render pool, or None when PDF_RENDER_WORKERS is 0."""
+    global _pool
+    if PDF_RENDER_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = PdfRenderPool()
+        return _pool
+
+
+def start_render_pool():
+    """Pre-fork the render workers, or warm the in-process engine when the pool is off."""
+    pool = get_render_pool()
+    if pool is None:
+        document_generator.init_pdf_engine()
+        return
+    started = time.perf_counter()
+    ready = pool.start()
+    print(f"🖨️ PDF render pool ready: {ready} worker process(es) in {time.perf_counter() - started:.2f}s")
+
+
+def stop_render_pool():
+    """Shut the render workers down gracefully (worker exit / server shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def render_pdf(data) -> bytes:
+    """PDF bytes for resume data, rendered in the pool when it's enabled."""
+    # Downscale embedded images here, once per distinct image for the whole
+    # process, rather than in each worker (and so less data is sent to it)
+    data = prepare_document_images(data)
+    pool = get_render_pool()
+    if pool is None:
+        return document_generator.generate_pdf_from_data(data)
+    return pool.render(data)
+
+
+def render_pdf_document(data):
+    """
+    The PDF for resume data as document_output hands it over: bytes if it's
+    small, else an open temp file to stream from.
+    """
+    data = prepare_document_images(data)
+    pool = get_render_pool()
+    if pool is None:
+        return document_output.spool(lambda f: document_generator.generate_pdf_from_data(data, target=f))
+    return document_output.open_rendered(pool.render(data, to_file=True))
@@ -0,0 +1,265 @@
+# backend/profiling.py
+"""
+On-demand cProfile capture of single requests.
+
+A request is profiled when it carries the admin token in an
+"X-Profile: <token>" header (never a query parameter, which would land in
+the access log), or when it is picked by sampling: PROFILE_SAMPLE_PERCENT of the requests
+whose path starts with one of PROFILE_SAMPLE_PATHS. Without a token and
+with sampling at 0 (the defaults) no hooks are installed at all; with a
+token, a request that isn't profiled costs one header lookup.
+
+Each profile is stored in PROFILE_DIR as <id>.prof (pstats format, for
+snakeviz or pstats) and <id>.json (request details and the top functions
+by cumulative and by own time). The newest PROFILE_MAX_FILES are kept.
+A profiled response carries X-Profile-Id. With the admin token,
+GET /api/profiles lists them, /api/profiles/<id> returns the summary
+and /api/profiles/<id>/raw the .prof file.
+
+cProfile follows the request's own thread. PDF renders in the render
+pool are profiled in the worker and merged in; calls handed to thread
+pools (sectioned or hedged LLM calls) show up as time spent waiting.
+Only one request per process is profiled at a time: on Python 3.12+ the
+profiler is process-wide, so others running meanwhile can appear in it.
+
+Configuration (env):
+  PROFILE_ADMIN_TOKEN     token for triggering and retrieval (empty = both off)
+  PROFILE_SAMPLE_PERCENT  share of eligible requests to profile (default 0)
+  PROFILE_SAMPLE_PATHS    comma-separated path prefixes eligible for sampling
+  PROFILE_DIR             where profiles are stored
+  PROFILE_MAX_FILES       profiles kept (default 200)
+  PROFILE_TOP_N           functions listed in each summary (default 30)
+"""
+import contextvars
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import re
+import sysconfig
+import tempfile
+import threading
+import time
+import uuid
+
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_PERCENT = float(os.getenv("PROFILE_SAMPLE_PERCENT", "0"))
+PROFILE_SAMPLE_PATHS = tuple(p.strip() for p in os.getenv(
+    "PROFILE_SAMPLE_PATHS", "/api/parse-resume,/api/generate-pdf,/api/generate-docx").split(",") if p.strip())
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "resume-profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "30"))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+STDLIB_DIR = sysconfig.get_paths()["stdlib"]
+PROFILES_PATH = "/api/profiles"
+_ID_RE = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{8}$")
+
+# Held by the request being profiled; others skip profiling rather than wait
+_profiling_slot = threading.Lock()
+_session = contextvars.ContextVar("profile_session", default=None)
+
+
+def enabled() -> bool:
+    return bool(PROFILE_ADMIN_TOKEN) or PROFILE_SAMPLE_PERCENT > 0
+
+
+def is_admin(request) -> bool:
+    """Whether the request carries the admin token in its X-Profile header."""
+    if not PROFILE_ADMIN_TOKEN:
+        return False
+    supplied = request.headers.get("X-Profile") or ""
+    return hmac.compare_digest(supplied.encode(), PROFILE_ADMIN_TOKEN.encode())
+
+
+def _trigger(request):
+    """Why to profile this request: "admin", "sampled" or None."""
+    if request.path.startswith(PROFILES_PATH):
+        return None  # fetching profiles carries the token too
+    if is_admin(request):
+        return "admin"
+    if (PROFILE_SAMPLE_PERCENT > 0 and request.path.startswith(PROFILE_SAMPLE_PATHS)
+            and random.random() * 100 < PROFILE_SAMPLE_PERCENT):
+        return "sampled"
+    return None
+
+
+class _Session:
+    def __init__(self, trigger):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.trigger = trigger
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile()
+        self.worker_stats = []  # raw pstats dicts from render workers
+
+
+def is_profiling() -> bool:
+    """Whether the current request is being profiled (so pool work should be too)."""
+    return _session.get() is not None
+
+
+def profile_call(fn, *args):
+    """(fn(*args), raw pstats dict): for profiling work in another process."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args)
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+def add_worker_stats(stats):
+    """Merge a profile_call() profile into the current request's."""
+    session = _session.get()
+    if session is not None and stats:
+        session.worker_stats.append(stats)
+
+
+class _RawStats:
+    # what pstats.Stats.add() needs to load an already-collected profile
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _where(filename, line, name) -> str:
+    if filename == "~":  # built-ins
+        return name
+    if filename.startswith(BACKEND_DIR + os.sep):
+        filename = os.path.relpath(filename, BACKEND_DIR)
+    elif "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    elif filename.startswith(STDLIB_DIR + os.sep):
+        filename = os.path.relpath(filename, STDLIB_DIR)
+    return f"{name} ({filename}:{line})"
+
+
+def summarize(stats, top_n=PROFILE_TOP_N) -> dict:
+    """Top functions of a pstats.Stats by cumulative and by own time."""
+    rows = [{"function": _where(*func), "calls": nc, "primitive_calls": cc,
+             "tottime_s": round(tt, 6), "cumtime_s": round(ct, 6)}
+            for func, (cc, nc, tt, ct, _) in stats.stats.items()]
+    return {
+        "total_calls": stats.total_calls,
+        "top_cumulative": sorted(rows, key=lambda r: r["cumtime_s"], reverse=True)[:top_n],
+        "top_own_time": sorted(rows, key=lambda r: r["tottime_s"], reverse=True)[:top_n],
+    }
+
+
+def _save(session, request, status):
+    elapsed = time.perf_counter() - session.started
+    stats = pstats.Stats(session.profiler)
+    for worker_stats in session.worker_stats:
+        stats.add(_RawStats(worker_stats))
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, session.id)
+    stats.dump_stats(base + ".prof")
+    summary = {"id": session.id, "trigger": session.trigger, "method": request.method, "path": request.path,
+               "status": status, "started_at": session.started_at, "duration_s": round(elapsed, 6),
+               "render_workers_merged": len(session.worker_stats), **summarize(stats)}
+    tmp = base + ".json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(summary, f, indent=1)
+    os.replace(tmp, base + ".json")
+    _prune()
+    print(f"🔬 Profiled {request.method} {request.path} ({session.trigger}, {elapsed:.2f}s): profile {session.id}")
+
+
+def _prune():
+    try:
+        ids = sorted(name[:-5] for name in os.listdir(PROFILE_DIR) if name.endswith(".json"))
+    except OSError:
+        return
+    for profile_id in ids[:max(0, len(ids) - PROFILE_MAX_FILES)]:
+        for suffix in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, profile_id + suffix))
+            except OSError:
+                pass
+
+
+# --- retrieval ---
+def list_profiles() -> list:
+    """Stored profile summaries without their function tables, newest first."""
+    try:
+        names = sorted((n for n in os.listdir(PROFILE_DIR) if n.endswith(".json")), reverse=True)
+    except OSError:
+        return []
+    listed = []
+    for name in names:
+        summary = load_summary(name[:-5])
+        if summary:
+            listed.append({k: v for k, v in summary.items() if not k.startswith("top_")})
+    return listed
+
+
+def load_summary(profile_id):
+    """The stored summary for profile_id, or None."""
+    if not _ID_RE.match(profile_id or ""):
+        return None
+    try:
+        with open(os.path.join(PROFILE_DIR, profile_id + ".json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def raw_profile_path(profile_id):
+    """Path of the .prof file for profile_id, or None."""
+    if not _ID_RE.match(profile_id or ""):
+        return None
+    path = os.path.join(PROFILE_DIR, profile_id + ".prof")
+    return path if os.path.isfile(path) else None
+
+
+# --- Flask integration ---
+def init_app(app):
+    """Profile requests picked by token or sampling (no-op unless configured)."""
+    from flask import g, request
+
+    if not enabled():
+        return
+
+    @app.before_request
+    def _start_profile():
+        trigger = _trigger(request)
+        if trigger is None or not _profiling_slot.acquire(blocking=False):
+            return
+        session = _Session(trigger)
+        g.profile_session = session
+        g.profile_token = _session.set(session)
+        session.profiler.enable()
+
+    def _finish(status):
+        session = g.pop("profile_session", None)
+        if session is None:
+            return None
+        session.profiler.disable()
+        try:
+            _save(session, request, status)
+        except Exception as e:
+            print(f"⚠️ Could not store request profile: {e}")
+            return None
+        finally:
+            try:
+                _session.reset(g.pop("profile_token"))
+            except ValueError:
+                _session.set(None)
+            _profiling_slot.release()
+        return session.id
+
+    @app.after_request
+    def _stop_profile(response):
+        profile_id = _finish(response.status_code)
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc=None):
+        # the handler raised before after_request ran
+        _finish(500)
@@ -0,0 +1,252 @@
+# backend/render_cache.py
+"""
+Cache of rendered PDF/DOCX bytes for /api/generate-pdf and /api/generate-docx.
+
+Keys are a hash of the canonical request JSON (sorted keys, no whitespace),
+the output format and a template version that covers the generator code,
+the HTML template, the stylesheet and the logo, so editing any of them
+invalidates old entries. The memory tier is an LRU bounded by total bytes;
+with RENDER_CACHE_DIR set, entries evicted from memory spill to disk.
+
+The key doubles as the response's strong ETag. Identical input renders the
+same document (only embedded zip/PDF timestamps can differ after a cache
+eviction), so a matching If-None-Match is answered with 304 without
+rendering or even looking the entry up.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+RENDER_CACHE_ENABLED = os.getenv("RENDER_CACHE_ENABLED", "1") != "0"
+RENDER_CACHE_MAX_MB = int(os.getenv("RENDER_CACHE_MAX_MB", "64"))
+# Empty = memory only
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", "")
+RENDER_CACHE_MAX_DISK_MB = int(os.getenv("RENDER_CACHE_MAX_DISK_MB", "512"))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_FILES = (
+    "document_generator.py",
+    "image_cache.py",
+    os.path.join("assets", "resume_template.html"),
+    os.path.join("assets", "resume_base.css"),
+    os.path.join("assets", "PamTen_Logo.png"),
+)
+
+_template_version = None
+
+
+def template_version() -> str:
+    """Hash of everything besides the input that determines the rendered bytes."""
+    global _template_version
+    if _template_version is None:
+        h = hashlib.sha256()
+        for name in TEMPLATE_FILES:
+            try:
+                with open(os.path.join(BACKEND_DIR, name), "rb") as f:
+                    h.update(f.read())
+            except OSError:
+                h.update(b"missing")
+            h.update(b"\0")
+        _template_version = h.hexdigest()[:16]
+    return _template_version
+
+
+def render_key(data, fmt: str) -> str:
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    h = hashlib.sha256()
+    for part in (template_version(), fmt, canonical):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return f"{fmt}-{h.hexdigest()}"
+
+
+class RenderCache:
+    """Byte-bounded LRU of rendered documents with an optional disk tier."""
+
+    def __init__(self, max_bytes=RENDER_CACHE_MAX_MB * 1024 * 1024, directory=RENDER_CACHE_DIR,
+                 max_disk_bytes=RENDER_CACHE_MAX_DISK_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.directory = os.path.join(directory, template_version()) if directory else None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> bytes
+        self._memory_bytes = 0
+        self._disk_bytes = None  # computed lazily on first spill
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "not_modified": 0, "puts": 0,
+            "bytes_saved": 0, "memory_evictions": 0, "spills": 0, "disk_evictions": 0,
+        }
+
+    def get(self, key):
+        with self._lock:
+            body = self._memory.get(key)
+            if body is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                self._counters["bytes_saved"] += len(body)
+                return body
+
+        body = self._read_disk(key)
+        if body is not None:
+            with self._lock:
+                self._counters["disk_hits"] += 1
+                self._counters["bytes_saved"] += len(body)
+            self._remember(key, body)
+            return body
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def put(self, key, body: bytes):
+        with self._lock:
+            self._counters["puts"] += 1
+        self._remember(key, body)
+
+    def count_not_modified(self, key):
+        """Record a 304 answered from the ETag alone."""
+        with self._lock:
+            self._counters["not_modified"] += 1
+            self._counters["bytes_saved"] += len(self._memory.get(key, b""))
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["not_modified"]
+            lookups = hits + self._counters["misses"]
+            return {
+                "template_version": template_version(),
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": bool(self.directory),
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                **self._counters,
+            }
+
+    # --- memory tier ---
+    def _remember(self, key, body):
+        if len(body) > self.max_bytes:
+            # would evict everything else; keep it on disk only
+            self._spill([(key, body)])
+            return
+        evicted = []
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._memory[key] = body
+            self._memory_bytes += len(body)
+            while self._memory_bytes > self.max_bytes:
+                old_key, old_body = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old_body)
+                self._counters["memory_evictions"] += 1
+                evicted.append((old_key, old_body))
+        self._spill(evicted)
+
+    # --- disk tier ---
+    def _path(self, key):
+        return os.path.join(self.directory, key.split("-", 1)[1][:2], key)
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _spill(self, entries):
+        if not self.directory or self.max_disk_bytes <= 0 or not entries:
+            return
+        written = 0
+        for key, body in entries:
+            path = self._path(key)
+            if os.path.exists(path):
+                continue
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(body)
+                os.replace(tmp, path)  # atomic, so concurrent readers never see half a file
+            except OSError as e:
+                print(f"⚠️ render cache: could not write {path}: {e}")
+                continue
+            written += len(body)
+
+        with self._lock:
+            self._counters["spills"] += len(entries)
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_bytes += written
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._prune_disk()
+
+    def _disk_files(self):
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, st.st_size, st.st_mtime))
+        return files
+
+    def _prune_disk(self):
+        """Drop the oldest files until the store is back under 90% of its limit."""
+        files = sorted(self._disk_files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_disk_bytes * 0.9)
+        evicted = 0
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self._counters["disk_evictions"] += evicted
+
+
+_render_cache = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache():
+    """Process-wide render cache, or None if disabled."""
+    global _render_cache
+    if not RENDER_CACHE_ENABLED:
+        return None
+    with _render_cache_lock:
+        if _render_cache is None:
+            _render_cache = RenderCache()
+        return _render_cache
+
+
+def cached_render(key, render) -> bytes:
+    """Bytes for key from the cache, or from render() (then cached)."""
+    cache = get_render_cache()
+    body = cache.get(key) if cache else None
+    if body is None:
+        body = render()
+        if cache:
+            cache.put(key, body)
+    return body
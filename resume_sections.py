@@ -0,0 +1,69 @@
+# backend/resume_sections.py
+"""
+Fast heuristic splitter for extracted resume text.
+
+A line counts as a section header when it is short and, once case,
+punctuation and "&" are normalized, matches one of the known headings
+below ("WORK EXPERIENCE", "Education:", "Licenses & Certifications"...).
+Everything before the first header is the "header" section (name, contact
+details, usually the summary too).
+"""
+import re
+
+HEADER = "header"
+SECTION_KEYS = ("experience", "education", "skills", "projects", "publications", "certifications")
+
+# Normalized heading -> section. "summary" headings fold into the header section.
+HEADINGS = {
+    HEADER: ("summary", "professional summary", "profile", "professional profile", "career summary",
+             "objective", "career objective", "about me", "about"),
+    "experience": ("experience", "work experience", "professional experience", "relevant experience",
+                   "employment", "employment history", "work history", "career history", "experience history"),
+    "education": ("education", "academic background", "education and training", "academic qualifications",
+                  "educational background", "education and certifications"),
+    "skills": ("skills", "technical skills", "core competencies", "key skills", "competencies",
+               "skills and tools", "technologies", "tools and technologies", "skills and expertise"),
+    "projects": ("projects", "personal projects", "key projects", "academic projects", "selected projects"),
+    "publications": ("publications", "selected publications", "papers", "research publications",
+                     "publications and presentations"),
+    "certifications": ("certifications", "certification", "certificates", "licenses", "licenses and certifications",
+                       "certifications and licenses", "professional certifications"),
+}
+_HEADING_TO_SECTION = {heading: section for section, headings in HEADINGS.items() for heading in headings}
+
+# Real headings are short; this keeps body lines that merely start with "Skills" out
+MAX_HEADER_CHARS = 40
+
+
+def _normalize_heading(line: str) -> str:
+    line = line.lower().replace("&", " and ")
+    return " ".join(re.sub(r"[^a-z ]", " ", line).split())
+
+
+def section_for_line(line: str):
+    """The section a header line opens, or None if the line isn't a known header."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > MAX_HEADER_CHARS:
+        return None
+    return _HEADING_TO_SECTION.get(_normalize_heading(stripped))
+
+
+def split_sections(text: str) -> dict:
+    """
+    {section: text} for the header section and every recognized section
+    present. Repeated headings (e.g. two experience blocks) are concatenated.
+    Header lines themselves are dropped, except summary headings.
+    """
+    sections = {HEADER: []}
+    current = HEADER
+    for line in (text or "").splitlines():
+        section = section_for_line(line)
+        if section is not None:
+            current = section
+            sections.setdefault(current, [])
+            if section != HEADER:
+                continue
+            # keep "Summary" so the model can tell it from the contact lines
+        sections[current].append(line)
+    texts = {section: "\n".join(lines).strip() for section, lines in sections.items()}
+    return {section: body for section, body in texts.items() if section == HEADER or body}
@@ -269,23 +269,47 @@ def generate_elevator_pitch_route():
         return jsonify({"error": "Internal error while generating elevator pitch."}), 500
 '''
 import io
-from flask import Blueprint, request, jsonify, send_file
-from document_generator import generate_docx_from_data, generate_pdf_from_data
+import json
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context, url_for
+from document_generator import generate_docx_from_data
 from file_parser import parse_resume_file
-from gemini_utils import generate_elevator_pitch
+from llm_providers import elevator_pitch, stream_elevator_pitch, get_router
+from ollama_utils import latency_stats as ollama_latency_stats
+from parse_cache import get_parse_cache
+from jobs import get_job_queue, QueueFull, DONE, FAILED
+from bulk_ingest import uploads_from_zip, uploads_from_files, ingest_ndjson, BulkInputError
+from rule_extractor import resolve_mode
+from uploads import detach_upload
+from metrics import METRICS_ENABLED, render_metrics, stage
+import profiling
+from render_cache import cached_render, get_render_cache, render_key
+from image_cache import get_image_cache
+from document_output import spool, document_size
+from pdf_pool import render_pdf, render_pdf_document, get_render_pool, RenderPoolBusy, RenderTimeout, PDF_RENDER_RETRY_AFTER_S
 
 api_bp = Blueprint("api", __name__)
 
 
+def requested_parse_mode():
+    """Parse mode from the "mode" form field or query arg; raises ValueError if unknown."""
+    return resolve_mode(request.form.get("mode") or request.args.get("mode"))
+
+
 @api_bp.route("/parse-resume", methods=["POST"])
 def parse_resume_route():
-    if "file" not in request.files:
+    with stage("upload_read"):
+        files = request.files  # parses the multipart body (large files spool to disk)
+    if "file" not in files:
         return jsonify({"error": "No file part"}), 400
-    f = request.files["file"]
+    f = files["file"]
     if f.filename == "":
         return jsonify({"error": "No file selected"}), 400
     try:
-        result = parse_resume_file(f)
+        mode = requested_parse_mode()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        result = parse_resume_file(f, mode)
 
         # Normalize the shape so frontend always gets { parsedData: { ... } }
         if "parsedData" in result and isinstance(result["parsedData"], dict):
@@ -299,21 +323,143 @@ def parse_resume_route():
         print("Parse error:", e)
         return jsonify({"error": str(e)}), 500
 
+@api_bp.route("/parse-resume/bulk", methods=["POST"])
+def parse_resume_bulk_route():
+    # archives and multi-file batches get a bigger cap (uploads.BULK_UPLOAD_ENDPOINTS)
+    # Either one zip under "archive" or many files under "files"
+    try:
+        mode = requested_parse_mode()
+        if "archive" in request.files:
+            uploads = uploads_from_zip(request.files["archive"].stream)
+        else:
+            files = [f for f in request.files.getlist("files") if f.filename]
+            if not files:
+                return jsonify({"error": "No files in the request"}), 400
+            uploads = uploads_from_files(files)
+    except (BulkInputError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return Response(stream_with_context(ingest_ndjson(uploads, mode=mode)), mimetype="application/x-ndjson")
+
+# --- Async parse jobs ---
+@api_bp.route("/jobs", methods=["POST"])
+def submit_parse_job():
+    if "file" not in request.files:
+        return jsonify({"error": "No file part"}), 400
+    f = request.files["file"]
+    if f.filename == "":
+        return jsonify({"error": "No file selected"}), 400
+    try:
+        mode = requested_parse_mode()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        # large uploads stay on disk rather than in memory while queued
+        job = get_job_queue().submit(f.filename, detach_upload(f), f.content_type, mode)
+    except QueueFull as e:
+        resp = jsonify({"error": str(e)})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = "5"
+        return resp
+    return jsonify({
+        "jobId": job.id,
+        "status": job.status,
+        "statusUrl": url_for("api.get_parse_job", job_id=job.id),
+        "eventsUrl": url_for("api.parse_job_events", job_id=job.id),
+    }), 202
+
+@api_bp.route("/jobs", methods=["GET"])
+def parse_job_stats():
+    return jsonify(get_job_queue().stats()), 200
+
+@api_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_parse_job(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict()), 200
+
+@api_bp.route("/jobs/<job_id>/events", methods=["GET"])
+def parse_job_events(job_id):
+    jobs = get_job_queue()
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    def stream():
+        current, seen = job, None
+        while True:
+            if current.version != seen:
+                seen = current.version
+                data = current.to_dict()
+                yield f"event: {data['status']}\ndata: {json.dumps(data)}\n\n"
+                if data["status"] in (DONE, FAILED):
+                    return
+            else:
+                yield ": keep-alive\n\n"
+            # a job run by another gunicorn worker comes back as a fresh copy
+            current = jobs.wait(current, seen, timeout=15)
+
+    return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def not_modified(key):
+    """304 for a request whose If-None-Match already names this rendering, else None."""
+    if not request.if_none_match.contains(key):
+        return None
+    cache = get_render_cache()
+    if cache:
+        cache.count_not_modified(key)
+    resp = Response(status=304)
+    resp.set_etag(key)
+    return resp
+
+def render_document(key, render_bytes, render_spooled):
+    """
+    The document for key: from the render cache (which needs it as bytes)
+    when that's on, else written straight to a spooled file. A cached
+    document is sent from the cache's own bytes object, so in-flight
+    downloads add no copy; memory is bounded by RENDER_CACHE_MAX_MB (see
+    benchmarks/bench_download_memory.py, "default").
+    """
+    if get_render_cache():
+        return cached_render(key, render_bytes)
+    return render_spooled()
+
+def send_document(body, key, download_name, mimetype):
+    # BytesIO shares the bytes it's given, so this doesn't copy the document;
+    # a spooled file is streamed from disk (sendfile under gunicorn)
+    size = document_size(body)
+    f = io.BytesIO(body) if isinstance(body, bytes) else body
+    resp = send_file(f, as_attachment=True, download_name=download_name,
+                     mimetype=mimetype, etag=False, conditional=False)
+    resp.content_length = size
+    # Same input JSON and template always render the same document, so the key is a strong ETag
+    resp.set_etag(key)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+def save_docx(doc, f):
+    with stage("docx_save"):
+        doc.save(f)
+
+def render_docx_bytes(data):
+    buf = io.BytesIO()
+    save_docx(generate_docx_from_data(data), buf)
+    return buf.getvalue()
+
 @api_bp.route("/generate-docx", methods=["POST"])
 def generate_docx_route():
     data = request.get_json(force=True) or {}
+    key = render_key(data, "docx")
+    cached = not_modified(key)
+    if cached:
+        return cached
     try:
-        doc = generate_docx_from_data(data)
-        buf = io.BytesIO()
-        doc.save(buf)
-        buf.seek(0)
+        body = render_document(key, lambda: render_docx_bytes(data),
+                               lambda: spool(lambda f: save_docx(generate_docx_from_data(data), f)))
         name = (data.get("personal",{}).get("name","resume") or "resume").replace(" ","_")
-        return send_file(
-            buf,
-            as_attachment=True,
-            download_name=f"{name}.docx",
-            mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
+        return send_document(body, key, f"{name}.docx",
+                             "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
     except Exception as e:
         print("DOCX gen error:", e)
         return jsonify({"error": str(e)}), 500
@@ -321,17 +467,21 @@ def generate_docx_route():
 @api_bp.route("/generate-pdf", methods=["POST"])
 def generate_pdf_route():
     data = request.get_json(force=True) or {}
+    key = render_key(data, "pdf")
+    cached = not_modified(key)
+    if cached:
+        return cached
     try:
-        pdf_bytes = generate_pdf_from_data(data)
-        buf = io.BytesIO(pdf_bytes)
-        buf.seek(0)
+        body = render_document(key, lambda: render_pdf(data), lambda: render_pdf_document(data))
         name = (data.get("personal",{}).get("name","resume") or "resume").replace(" ","_")
-        return send_file(
-            buf,
-            as_attachment=True,
-            download_name=f"{name}.pdf",
-            mimetype="application/pdf"
-        )
+        return send_document(body, key, f"{name}.pdf", "application/pdf")
+    except RenderPoolBusy as e:
+        resp = jsonify({"error": str(e)})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = str(PDF_RENDER_RETRY_AFTER_S)
+        return resp
+    except RenderTimeout as e:
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
         print("PDF gen error:", e)
         return jsonify({"error": str(e)}), 500
@@ -340,13 +490,94 @@ def generate_pdf_route():
 def generate_pitch_route():
     data = request.get_json(force=True) or {}
     try:
-        pitch = generate_elevator_pitch(data)
+        pitch = elevator_pitch(data)
         return jsonify({"elevatorPitch": pitch}), 200
     except Exception as e:
         print("Pitch error:", e)
         return jsonify({"error": str(e)}), 500
 
+@api_bp.route("/generate-elevator-pitch/stream", methods=["POST"])
+def stream_pitch_route():
+    data = request.get_json(force=True) or {}
+
+    def events():
+        # If the browser goes away, the server closes this generator, and the
+        # finally in the provider stream closes the upstream request
+        try:
+            for text in stream_elevator_pitch(data):
+                yield f"event: token\ndata: {json.dumps({'text': text})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            print("Pitch stream error:", e)
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @api_bp.route("/health", methods=["GET"])
 def health_check():
     return jsonify({"status": "ok"}), 200
 
+@api_bp.route("/parse-cache/stats", methods=["GET"])
+def parse_cache_stats():
+    cache = get_parse_cache()
+    if cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **cache.stats()}), 200
+
+@api_bp.route("/render-cache/stats", methods=["GET"])
+def render_cache_stats():
+    cache = get_render_cache()
+    if not cache:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **cache.stats()}), 200
+
+@api_bp.route("/image-cache/stats", methods=["GET"])
+def image_cache_stats():
+    cache = get_image_cache()
+    if cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **cache.stats()}), 200
+
+@api_bp.route("/render-pool/stats", methods=["GET"])
+def render_pool_stats():
+    pool = get_render_pool()
+    if not pool:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **pool.stats()}), 200
+
+@api_bp.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    if not METRICS_ENABLED:
+        return jsonify({"enabled": False}), 404
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+@api_bp.route("/profiles", methods=["GET"])
+def list_profiles():
+    # 404 rather than 403, so the endpoints don't advertise themselves
+    if not profiling.is_admin(request):
+        return jsonify({"error": "Not found"}), 404
+    return jsonify({"profiles": profiling.list_profiles()}), 200
+
+@api_bp.route("/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    summary = profiling.load_summary(profile_id) if profiling.is_admin(request) else None
+    if summary is None:
+        return jsonify({"error": "Not found"}), 404
+    return jsonify(summary), 200
+
+@api_bp.route("/profiles/<profile_id>/raw", methods=["GET"])
+def get_profile_raw(profile_id):
+    path = profiling.raw_profile_path(profile_id) if profiling.is_admin(request) else None
+    if path is None:
+        return jsonify({"error": "Not found"}), 404
+    return send_file(path, as_attachment=True, download_name=f"{profile_id}.prof",
+                     mimetype="application/octet-stream")
+
+@api_bp.route("/llm/stats", methods=["GET"])
+def llm_stats():
+    return jsonify(get_router().stats()), 200
+
+@api_bp.route("/ollama/stats", methods=["GET"])
+def ollama_stats():
+    return jsonify(ollama_latency_stats.snapshot()), 200
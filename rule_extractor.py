@@ -0,0 +1,336 @@
+# backend/rule_extractor.py
+"""
+Deterministic, LLM-free extraction of the well-formed parts of a resume.
+
+extract_with_rules() fills what regexes and layout heuristics can find
+reliably (contact details, dated experience entries, degrees, skill lists,
+certifications) and scores each section 0..1 by how completely its lines
+were accounted for. structure_hybrid() keeps the confident sections and
+sends only the rest to the LLM, skipping the call entirely when every
+section is confident.
+
+Parse modes (PARSE_MODE default, or per request):
+  "llm"     every field from the LLM (original behaviour)
+  "hybrid"  rules first, LLM only for sections below RULES_MIN_CONFIDENCE
+  "rules"   rules only, never calls the LLM
+"""
+import os
+import re
+import uuid
+
+import llm_providers
+import resume_sections
+from llm_providers import normalize_resume
+
+PARSE_MODES = ("llm", "hybrid", "rules")
+PARSE_MODE = os.getenv("PARSE_MODE", "llm").lower()
+RULES_MIN_CONFIDENCE = float(os.getenv("RULES_MIN_CONFIDENCE", "0.8"))
+
+# Bump whenever the rules change what they extract (part of the parse cache version)
+RULES_VERSION = "1"
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE = re.compile(r"(?<![\w/])\+?\(?\d[\d\s().-]{7,}\d(?![\w/])")
+URL = re.compile(r"(?:https?://|www\.)\S+|\b(?:linkedin|github)\.com/\S+", re.IGNORECASE)
+LOCATION = re.compile(r"^[A-Z][A-Za-z.'-]+(?: [A-Z][A-Za-z.'-]+)*, (?:[A-Z]{2}|[A-Z][a-z]+(?: [A-Z][a-z]+)*)$")
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s+\d{{4}}|\d{{1,2}}/\d{{4}}|(?:19|20)\d{{2}})"
+DATE_RANGE = re.compile(rf"{_DATE}\s*(?:-|–|—|to)\s*(?:{_DATE}|present|current|now)", re.IGNORECASE)
+SINGLE_DATE = re.compile(rf"{_DATE}", re.IGNORECASE)
+YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+
+DEGREE = re.compile(r"(?<![A-Za-z])(?:B\.?\s?S\.?|B\.?\s?A\.?|B\.?\s?Sc\.?|M\.?\s?S\.?|M\.?\s?A\.?|M\.?\s?Sc\.?|"
+                    r"M\.?B\.?A\.?|Ph\.?\s?D\.?|B\.?\s?Tech|M\.?\s?Tech|B\.?\s?E\.?|Bachelor|Master|Doctor|"
+                    r"Associate|Diploma)(?![A-Za-z])")
+INSTITUTION = re.compile(r"\b(?:University|College|Institute|School|Academy|Polytechnic)\b", re.IGNORECASE)
+GPA = re.compile(r"\bGPA[:\s]*([0-4]\.\d{1,2})", re.IGNORECASE)
+
+# "Jane Doe - Resume", "Jane Doe | Curriculum Vitae"
+DOCUMENT_TITLE = re.compile(r"\s*[-–—|:]?\s*\b(?:resume|résumé|cv|curriculum vitae)$", re.IGNORECASE)
+PAGE_NUMBER = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?$", re.IGNORECASE)
+
+BULLET = re.compile(r"^\s*(?:[•\-*–▪●◦·]|\d+[.)])\s+")
+_SEPARATORS = " |,-–—@•·"
+
+
+def _new_id(prefix):
+    # unique per entry so the frontend never sees duplicate React keys
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+def _lines(text):
+    return [line.strip() for line in (text or "").splitlines() if line.strip()]
+
+
+def _is_bullet(line):
+    return bool(BULLET.match(line))
+
+
+# --- header: personal details and summary ---
+def _looks_like_name(line):
+    words = line.split()
+    if not 2 <= len(words) <= 5 or any(ch.isdigit() for ch in line) or "@" in line or URL.search(line):
+        return False
+    return all(word[0].isupper() for word in words if word[0].isalpha())
+
+
+def extract_header(text):
+    lines = _lines(text)
+    personal = {"name": "", "email": "", "phone": "", "location": "", "legalStatus": ""}
+    summary_lines, leftover = [], []
+    in_summary = False
+
+    for line in lines:
+        if resume_sections.section_for_line(line) == resume_sections.HEADER:
+            in_summary = True
+            continue
+        if in_summary:
+            summary_lines.append(line)
+            continue
+        if PAGE_NUMBER.match(line):
+            continue
+        consumed = False
+        titled = DOCUMENT_TITLE.sub("", line)
+        if titled != line or titled == personal["name"]:
+            # a document title or the name repeated from it
+            line, consumed = titled, True
+        if not personal["name"] and _looks_like_name(line):
+            personal["name"] = line
+            consumed = True
+        email = EMAIL.search(line)
+        if email and not personal["email"]:
+            personal["email"] = email.group(0)
+            consumed = True
+        phone = PHONE.search(EMAIL.sub("", URL.sub("", line)))
+        if phone and not personal["phone"] and 7 <= sum(ch.isdigit() for ch in phone.group(0)) <= 15:
+            personal["phone"] = phone.group(0).strip()
+            consumed = True
+        # what's left once email, phone and links are cut out, e.g. "Austin, TX"
+        remainder = PHONE.sub("|", EMAIL.sub("|", URL.sub("|", line)))
+        for part in re.split(r"\s*[|•·]\s*|\s{2,}", remainder):
+            if not personal["location"] and LOCATION.match(part.strip()):
+                personal["location"] = part.strip()
+                consumed = True
+        if URL.search(line):
+            consumed = True
+        if not consumed:
+            leftover.append(line)
+
+    # no summary heading: long prose lines after the contact block are the summary
+    if not summary_lines:
+        summary_lines = [line for line in leftover if len(line) > 60]
+        leftover = [line for line in leftover if len(line) <= 60]
+
+    confidence = 1.0
+    if not personal["name"]:
+        confidence -= 0.5
+    if not personal["email"]:
+        confidence -= 0.2
+    if leftover:
+        confidence -= 0.3
+    return {"personal": personal, "summary": "\n".join(summary_lines)}, max(0.0, confidence)
+
+
+# --- experience ---
+def _split_title_company(text):
+    for separator in (" at ", " | ", " - ", " – ", ", "):
+        if separator in text:
+            title, company = text.split(separator, 1)
+            return title.strip(), company.strip()
+    return text.strip(), ""
+
+
+def extract_experience(text):
+    lines = _lines(text)
+    dated = [i for i, line in enumerate(lines) if not _is_bullet(line) and DATE_RANGE.search(line)]
+    if not dated:
+        return [], 0.0
+
+    entries, starts = [], []
+    for i in dated:
+        date_match = DATE_RANGE.search(lines[i])
+        rest = (lines[i][:date_match.start()] + " " + lines[i][date_match.end():]).strip(_SEPARATORS)
+        previous = lines[i - 1] if i > 0 and not _is_bullet(lines[i - 1]) and i - 1 not in dated else None
+        if rest and previous:
+            # "Title" / "Company | Jan 2020 - Dec 2021"
+            title, company, start = previous, rest, i - 1
+        elif rest:
+            # "Title at Company, 2019 - 2021" on one line
+            (title, company), start = _split_title_company(rest), i
+        elif previous and i > 1 and not _is_bullet(lines[i - 2]) and i - 2 not in dated:
+            # "Title" / "Company" / "2019 - Present"
+            title, company, start = lines[i - 2], previous, i - 2
+        elif previous:
+            (title, company), start = _split_title_company(previous), i - 1
+        else:
+            title, company, start = "", "", i
+        starts.append(start)
+        entries.append({"id": _new_id("exp"), "jobTitle": title, "company": company,
+                        "dates": date_match.group(0), "description": ""})
+
+    # description runs from the date line to the next entry's first line
+    ends = starts[1:] + [len(lines)]
+    for entry, i, end in zip(entries, dated, ends):
+        entry["description"] = "\n".join(lines[i + 1:end])
+
+    complete = sum(1 for e in entries if e["jobTitle"] and e["company"] and e["description"])
+    overlapping = any(start <= prev for start, prev in zip(starts[1:], dated))
+    confidence = complete / len(entries)
+    if starts[0] > 0 or overlapping:
+        # text before the first entry or entries without room for a description
+        confidence *= 0.5
+    return entries, confidence
+
+
+# --- education ---
+def extract_education(text):
+    lines = _lines(text)
+    starts = [i for i, line in enumerate(lines) if DEGREE.search(line)]
+    if not starts:
+        return [], 0.0
+
+    entries = []
+    for start, end in zip(starts, starts[1:] + [len(lines)]):
+        block = lines[start:end]
+        joined = " ".join(block)
+        degree_line = block[0]
+        institution = ""
+        # "B.S. Computer Science, State University (2015)" or degree and school on separate lines
+        for part in re.split(r"\s*[,|–—]\s*|\s+-\s+", re.sub(r"\(?\b(?:19|20)\d{2}\b\)?", "", degree_line)):
+            if INSTITUTION.search(part) and not DEGREE.search(part):
+                institution = part.strip()
+                degree_line = degree_line.split(part)[0]
+                break
+        used = {0}
+        if not institution:
+            for j, line in enumerate(block[1:], start=1):
+                if INSTITUTION.search(line):
+                    institution = re.split(r"\s*,\s*(?:19|20)\d{2}|\s*\(", line)[0].strip(_SEPARATORS)
+                    used.add(j)
+                    break
+        years = YEAR.findall(joined)
+        gpa = GPA.search(joined)
+        achievements = [line for j, line in enumerate(block) if j not in used and not GPA.fullmatch(line)
+                        and not YEAR.fullmatch(line.strip("() "))]
+        entries.append({
+            "id": _new_id("edu"),
+            "degree": re.sub(r"\(?\b(?:19|20)\d{2}\b\)?", "", degree_line).strip(_SEPARATORS + "()"),
+            "institution": institution,
+            "graduationYear": years[-1] if years else "",
+            "gpa": gpa.group(1) if gpa else "",
+            "achievements": "\n".join(achievements),
+        })
+
+    complete = sum(1 for e in entries if e["degree"] and e["institution"] and e["graduationYear"])
+    confidence = complete / len(entries)
+    if starts[0] > 0:
+        confidence *= 0.5
+    return entries, confidence
+
+
+# --- skills ---
+def extract_skills(text):
+    lines = _lines(text)
+    if not lines:
+        return [], 1.0
+    entries, uncategorized, prose = [], [], 0
+    for line in lines:
+        line = BULLET.sub("", line)
+        category, sep, items = line.partition(":")
+        if sep and len(category.split()) <= 4 and items.strip():
+            entries.append({"id": _new_id("skill"), "category": category.strip(), "skills_list": items.strip()})
+            continue
+        if len(line.split()) > 12 and "," not in line and "|" not in line:
+            prose += 1
+        uncategorized.append(re.sub(r"\s*[|•·]\s*", ", ", line))
+    if uncategorized:
+        entries.append({"id": _new_id("skill"), "category": "", "skills_list": ", ".join(uncategorized)})
+    return entries, 0.5 if prose else 0.9
+
+
+# --- certifications ---
+def extract_certifications(text):
+    lines = [BULLET.sub("", line) for line in _lines(text)]
+    if not lines:
+        return [], 1.0
+    entries, split_ok = [], 0
+    for line in lines:
+        date = ""
+        dates = list(SINGLE_DATE.finditer(line))
+        if dates and dates[-1].end() >= len(line.rstrip(" )")) - 1:
+            date = dates[-1].group(0)
+            line = line[:dates[-1].start()].rstrip(_SEPARATORS + "(")
+        name, issuer = line, ""
+        issuer_match = re.match(r"^(.*?)\s*(?:\((.+)\)|\s[-–—|]\s(.+)|,\s(.+))$", line)
+        if issuer_match:
+            name = issuer_match.group(1)
+            issuer = next(group for group in issuer_match.groups()[1:] if group)
+            split_ok += 1
+        entries.append({"id": _new_id("cert"), "name": name.strip(), "issuer": issuer.strip(), "date": date})
+    return entries, 0.85 if split_ok == len(lines) else 0.6
+
+
+SECTION_EXTRACTORS = {
+    "experience": extract_experience,
+    "education": extract_education,
+    "skills": extract_skills,
+    "certifications": extract_certifications,
+}
+
+
+def extract_with_rules(raw_text: str):
+    """
+    (partial resume dict, {section: confidence}). Sections missing from the
+    text are empty with confidence 1.0; sections the rules don't handle
+    (projects, publications) are empty with confidence 0.0 when present.
+    """
+    sections = resume_sections.split_sections(raw_text)
+    data, confidence = extract_header(sections.get(resume_sections.HEADER, ""))
+    confidence = {resume_sections.HEADER: confidence}
+    for section in resume_sections.SECTION_KEYS:
+        text = sections.get(section)
+        if not text:
+            data[section], confidence[section] = [], 1.0
+        elif section in SECTION_EXTRACTORS:
+            data[section], confidence[section] = SECTION_EXTRACTORS[section](text)
+        else:
+            data[section], confidence[section] = [], 0.0
+    return data, confidence
+
+
+def structure_hybrid(raw_text: str) -> dict:
+    """Rules for confident sections, section-level LLM calls for the rest."""
+    data, confidence = extract_with_rules(raw_text)
+    low = [section for section, score in confidence.items() if score < RULES_MIN_CONFIDENCE]
+    if not low:
+        print("--- Rule-based extraction covered every section; skipping the LLM. ---")
+        return normalize_resume(data)
+
+    print(f"--- Rules confident except for {', '.join(low)}; sending those to the AI… ---")
+    sections = resume_sections.split_sections(raw_text)
+    merged, failed = llm_providers.structure_resume_sectioned({section: sections.get(section, "") for section in low})
+    if failed and not merged:
+        print("⚠️ Hybrid structuring got nothing back; structuring the whole resume with the AI")
+        return llm_providers.structure_resume(raw_text)
+    # sections the AI couldn't do keep their rule-based result, but the parse isn't complete
+    data.update(merged)
+    llm_providers.record_incomplete(failed)
+    return normalize_resume(data)
+
+
+def structure_with_mode(raw_text: str, mode: str = None) -> dict:
+    mode = resolve_mode(mode)
+    if mode == "rules":
+        return normalize_resume(extract_with_rules(raw_text)[0])
+    if mode == "hybrid":
+        return structure_hybrid(raw_text)
+    return llm_providers.structure_resume(raw_text)
+
+
+def resolve_mode(mode) -> str:
+    """Validated parse mode; None or "" means PARSE_MODE."""
+    mode = (mode or PARSE_MODE).lower()
+    if mode not in PARSE_MODES:
+        raise ValueError(f"Unknown parse mode '{mode}'; expected one of {', '.join(PARSE_MODES)}.")
+    return mode
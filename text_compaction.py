@@ -0,0 +1,126 @@
+# backend/text_compaction.py
+"""
+Shrinks extracted resume text before it is inlined into an LLM prompt.
+
+pypdf output carries a lot that costs tokens without telling the model
+anything: running headers/footers and page numbers repeated on every page,
+runs of spaces, words hyphenated across line breaks and duplicated lines.
+compact_resume_text() removes those while keeping the line structure the
+structuring prompt relies on (descriptions keep their line breaks).
+
+Pages are expected to be separated by PAGE_BREAK (form feed), which is what
+file_parser's PDF extraction emits; text without it is treated as one page.
+"""
+import json
+import math
+import os
+import re
+from collections import Counter
+
+TEXT_COMPACTION_ENABLED = os.getenv("TEXT_COMPACTION_ENABLED", "1") != "0"
+
+# Bump whenever the output of compact_resume_text changes (part of the parse cache version)
+COMPACTION_VERSION = "2"
+
+PAGE_BREAK = "\f"
+
+# Lines this close to the top/bottom of a page are candidates for running headers/footers
+EDGE_LINES = 3
+
+_PAGE_NUMBER = re.compile(r"^(?:page\s*)?[-–(]?\s*\d{1,3}\s*[-–)]?(?:\s*(?:of|/)\s*\d{1,3})?$", re.IGNORECASE)
+# C0 controls and DEL (some PDF fonts map bullet glyphs to \x7f); \t and \n are handled separately
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0e-\x1f\x7f]")
+_INLINE_SPACE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+_HYPHEN_BREAK = re.compile(r"([A-Za-z]{2,})-\n([a-z]{2,})")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English prose)."""
+    return math.ceil(len(text or "") / 4)
+
+
+def compact_schema(schema) -> str:
+    """Minified JSON for a schema given as a dict or as a (pretty-printed) JSON string."""
+    if isinstance(schema, str):
+        schema = json.loads(schema)
+    return json.dumps(schema, separators=(",", ":"))
+
+
+def _boilerplate_signature(line: str) -> str:
+    # "Page 2 of 5" and "Page 3 of 5" are the same footer
+    return re.sub(r"\d+", "#", line.lower())
+
+
+def _edge_indexes(lines):
+    """Indexes of the first and last EDGE_LINES non-blank lines of a page."""
+    filled = [i for i, line in enumerate(lines) if line]
+    return set(filled[:EDGE_LINES] + filled[-EDGE_LINES:])
+
+
+def _strip_page_boilerplate(pages):
+    """
+    Drop the repeats of header/footer lines found at the edges of most
+    pages, and bare page numbers. The first copy of a repeated line is kept:
+    a header repeated on every page is often the name and contact details.
+    """
+    edge_counts = Counter()
+    for lines in pages:
+        edge_counts.update({_boilerplate_signature(lines[i]) for i in _edge_indexes(lines)})
+
+    threshold = max(2, math.ceil(len(pages) / 2))
+    repeated = {sig for sig, count in edge_counts.items() if count >= threshold}
+
+    cleaned, seen = [], set()
+    for lines in pages:
+        edges = _edge_indexes(lines)
+        kept = []
+        for i, line in enumerate(lines):
+            if i in edges:
+                if _PAGE_NUMBER.match(line):
+                    continue
+                signature = _boilerplate_signature(line)
+                if signature in repeated:
+                    if signature in seen:
+                        continue
+                    seen.add(signature)
+            kept.append(line)
+        cleaned.append(kept)
+    return cleaned
+
+
+def compact_resume_text(text: str) -> str:
+    """Compacted version of extracted resume text; see the module docstring."""
+    if not text:
+        return ""
+
+    pages = [[_INLINE_SPACE.sub(" ", _CONTROL.sub("", line)).strip() for line in page.splitlines()]
+             for page in text.split(PAGE_BREAK)]
+    if len(pages) > 1:
+        pages = _strip_page_boilerplate(pages)
+
+    lines = []
+    for page in pages:
+        for line in page:
+            if not line:
+                # keep paragraph breaks, but only one in a row
+                if lines and lines[-1]:
+                    lines.append("")
+            elif not lines or line != lines[-1]:
+                # consecutive duplicates are extraction artifacts (e.g. layered text)
+                lines.append(line)
+
+    compacted = "\n".join(lines).strip()
+    # "develop-\nment" -> "development"; only a lowercase continuation, so
+    # "Full-\nStack" and list items starting a new line stay as they are
+    return _HYPHEN_BREAK.sub(r"\1\2", compacted)
+
+
+def compact_for_prompt(raw_text: str) -> str:
+    """compact_resume_text() with a token-estimate log line, or raw_text if compaction is disabled."""
+    if not TEXT_COMPACTION_ENABLED:
+        return (raw_text or "").replace(PAGE_BREAK, "\n")
+    compacted = compact_resume_text(raw_text)
+    before, after = estimate_tokens(raw_text), estimate_tokens(compacted)
+    saved = (1 - after / before) * 100 if before else 0.0
+    print(f"✂️ Prompt compaction: ~{before} → ~{after} tokens ({saved:.0f}% fewer)")
+    return compacted
@@ -0,0 +1,75 @@
+# backend/uploads.py
+"""
+Size limits and spooling for uploaded files.
+
+Flask's MAX_CONTENT_LENGTH is MAX_UPLOAD_MB, so an oversized request is
+answered with 413 from its Content-Length before any of the body is read
+(a chunked body is cut off as soon as it passes the cap). Routes in
+BULK_UPLOAD_ENDPOINTS get MAX_BULK_UPLOAD_MB instead.
+
+Uploaded files up to UPLOAD_SPOOL_KB are kept in memory. Larger ones are
+written to a named temp file as they arrive, so file_parser can
+memory-map them instead of reading them into one bytes object, and PDF
+page workers can open them by path instead of being sent a copy. Flask
+closes (and so deletes) the file when the request ends; detach_upload()
+keeps an upload for work that runs after that (parse jobs).
+"""
+import io
+import os
+import shutil
+import tempfile
+import uuid
+
+from flask import Request
+
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "20"))
+MAX_BULK_UPLOAD_MB = int(os.getenv("MAX_BULK_UPLOAD_MB", "200"))
+UPLOAD_SPOOL_KB = int(os.getenv("UPLOAD_SPOOL_KB", "512"))
+# Empty = the system temp directory
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "") or None
+
+UPLOAD_TEMP_PREFIX = "resume-upload-"
+
+# Endpoints whose bodies may be up to MAX_BULK_UPLOAD_MB (archives and multi-file batches)
+BULK_UPLOAD_ENDPOINTS = {"api.parse_resume_bulk_route"}
+
+
+class UploadRequest(Request):
+    @property
+    def max_content_length(self):
+        # Decided per request here rather than assigned in the route:
+        # Request.max_content_length is only settable from Flask 3.1 on
+        if self.endpoint in BULK_UPLOAD_ENDPOINTS:
+            return MAX_BULK_UPLOAD_MB * 1024 * 1024
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # total_content_length covers the whole body, so it bounds the file
+        if total_content_length is not None and total_content_length <= UPLOAD_SPOOL_KB * 1024:
+            return io.BytesIO()
+        return tempfile.NamedTemporaryFile("w+b", prefix=UPLOAD_TEMP_PREFIX, dir=UPLOAD_SPOOL_DIR)
+
+
+def detach_upload(storage):
+    """
+    An upload's content in a form that outlives the request: bytes if it is
+    small enough to be held in memory (UPLOAD_SPOOL_KB), otherwise the path
+    of a temp file the caller owns and must delete. A spooled upload is
+    hard-linked rather than copied where the filesystem allows.
+    """
+    stream = storage.stream
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    if size <= UPLOAD_SPOOL_KB * 1024:
+        return stream.read()
+    path = os.path.join(UPLOAD_SPOOL_DIR or tempfile.gettempdir(), f"{UPLOAD_TEMP_PREFIX}{uuid.uuid4().hex}")
+    spooled = getattr(stream, "name", None)
+    if isinstance(spooled, str) and os.path.isfile(spooled):
+        try:
+            os.link(spooled, path)
+            return path
+        except OSError:
+            pass  # another filesystem, or no hard links; copy instead
+    with open(path, "xb") as f:
+        shutil.copyfileobj(stream, f)
+    return path
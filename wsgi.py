@@ -0,0 +1,22 @@
+# backend/wsgi.py
+"""
+Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (the default in gunicorn.conf.py) this module is imported
+once in the gunicorn master: the app and the heavy libraries are loaded and
+warmed there, then shared copy-on-write by every forked worker. Pools,
+threads and the PDF render processes are started per worker in post_fork.
+"""
+import os
+
+# Started per worker by gunicorn.conf.py's post_fork instead
+os.environ.setdefault("DEFER_BACKGROUND_SERVICES", "1")
+
+from app import app, warm_heavy_modules  # noqa: E402
+
+try:
+    warm_heavy_modules()
+except Exception as e:
+    print(f"⚠️ Heavy module warm-up failed: {e}")
+
+application = app